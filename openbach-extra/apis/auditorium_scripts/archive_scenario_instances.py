@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# OpenBACH is a generic testbed able to control/configure multiple
+# network/physical entities (under test) and collect data from them. It is
+# composed of an Auditorium (HMIs), a Controller, a Collector and multiple
+# Agents (one for each network entity that wants to be tested).
+#
+#
+# Copyright © 2016-2023 CNES
+#
+#
+# This file is part of the OpenBACH testbed.
+#
+#
+# OpenBACH is a free software : you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY, without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program. If not, see http://www.gnu.org/licenses/.
+
+
+
+"""Call the openbach-function archive_scenario_instances"""
+
+
+__author__ = 'Viveris Technologies'
+__credits__ = '''Contributors:
+ * Mathias ETTINGER <mathias.ettinger@toulouse.viveris.com>
+'''
+
+
+from auditorium_scripts.frontend import FrontendBase
+
+
+class ArchiveScenarioInstances(FrontendBase):
+    def __init__(self):
+        super().__init__('OpenBACH — Archive old Scenario Instances')
+        self.parser.add_argument(
+                'older_than', type=int, nargs='?',
+                help='age (in days) of the finished scenario instances to '
+                'archive. Defaults to the age configured on the controller.')
+
+    def execute(self, show_response_content=True):
+        return self.request(
+                'POST', 'scenario_instance_archive/',
+                older_than=self.args.older_than,
+                show_response_content=show_response_content)
+
+
+if __name__ == '__main__':
+    ArchiveScenarioInstances.autorun()
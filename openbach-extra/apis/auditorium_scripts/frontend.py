@@ -310,6 +310,34 @@ class FrontendBase:
     def query_state(self):
         return self.session.get(self.base_url)
 
+    def wait_for_scenario_instance(self, scenario_instance_id, timeout=None):
+        """Follow the status transitions of the given scenario instance
+        until it finishes instead of polling its status.
+
+        Return the last state sent by the backend or None if it does
+        not support following scenario instances.
+        """
+        route = 'scenario_instance/{}/events/'.format(scenario_instance_id)
+        params = {} if timeout is None else {'timeout': timeout}
+        since = 0
+        while True:
+            response = self.request('GET', route, show_response_content=False, since=since, **params)
+            try:
+                content = response.json()
+            except ValueError:
+                # Older backends answer with an HTML error page
+                return None
+            response.raise_for_status()
+
+            for event in content['events']:
+                LOG.debug(
+                        '%s %s of scenario instance %s is now %s',
+                        event['type'], event['id'],
+                        event['scenario_instance_id'], event['status'])
+            since = content['sequence']
+            if content['finished']:
+                return content
+
 
 class ActionFailedError(Exception):
     def __init__(self, response, returncode, **kwargs):
@@ -37,6 +37,8 @@ __credits__ = '''Contributors:
 '''
 
 
+from functools import partial
+
 from auditorium_scripts.frontend import FrontendBase
 
 
@@ -48,6 +50,32 @@ class ListScenarioInstances(FrontendBase):
                 '-s', '--scenario-name', '--scenario',
                 help='name of the scenario whose instances should be listed'
                 '. Defaults to all scenarios.')
+        self.parser.add_argument(
+                '-f', '--full', action='store_true',
+                help='retrieve the full description of each instance '
+                'instead of a summary')
+        self.parser.add_argument(
+                '-a', '--archived', action='store_true',
+                help='list the archived instances instead of the active ones')
+        self.parser.add_argument(
+                '--status', action='append',
+                help='only list instances in the given status; '
+                'can be specified several times')
+        self.parser.add_argument(
+                '--started-after', type=int,
+                help='only list instances started after the given '
+                'timestamp (in milliseconds)')
+        self.parser.add_argument(
+                '--started-before', type=int,
+                help='only list instances started before the given '
+                'timestamp (in milliseconds)')
+        self.parser.add_argument(
+                '-l', '--limit', type=int,
+                help='maximum amount of instances to list')
+        self.parser.add_argument(
+                '-c', '--cursor', type=int,
+                help='only list instances older than the one with the '
+                'given ID (usually the last one of a previous listing)')
 
     def execute(self, show_response_content=True):
         scenario = self.args.scenario_name
@@ -58,7 +86,18 @@ class ListScenarioInstances(FrontendBase):
         else:
             route = 'project/{}/scenario/{}/scenario_instance/'.format(project, scenario)
 
-        return self.request('GET', route, show_response_content=show_response_content)
+        action = self.request
+        if self.args.full:
+            action = partial(action, full='')
+        if self.args.archived:
+            action = partial(action, archived='')
+
+        return action(
+                'GET', route, status=self.args.status,
+                started_after=self.args.started_after,
+                started_before=self.args.started_before,
+                limit=self.args.limit, cursor=self.args.cursor,
+                show_response_content=show_response_content)
 
 
 if __name__ == '__main__':
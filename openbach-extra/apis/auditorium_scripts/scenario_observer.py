@@ -239,6 +239,28 @@ class ScenarioObserver(FrontendBase):
 
         scenario_waiter = self.share_state(StatusScenarioInstance)
         scenario_waiter.args.scenario_instance_id = scenario_id
+        try:
+            state = scenario_waiter.wait_for_scenario_instance(scenario_id)
+        except requests.exceptions.RequestException as error:
+            logging.getLogger(__name__).warning(
+                    'Cannot follow scenario status, polling it instead: %s', error)
+            state = None
+
+        if state is None:
+            response = self._poll_scenario_to_completion(scenario_waiter)
+        elif state['status'] in ('Finished Ko',):
+            self.parser.error('scenario instance failed (status is \'{}\')'.format(state['status']))
+        else:
+            response = scenario_waiter.execute(False).json()
+
+        if self.args.path is not None:
+            data_fetcher = self.share_state(GetScenarioInstanceData)
+            data_fetcher.args.scenario_instance_id = scenario_id
+            data_fetcher.execute(False)
+
+        return response
+
+    def _poll_scenario_to_completion(self, scenario_waiter):
         retries_left = MAX_RETRIES_STATUS
         while True:
             time.sleep(self.args.poll_waiting_time)
@@ -258,11 +280,6 @@ class ScenarioObserver(FrontendBase):
             else:
                 retries_left = MAX_RETRIES_STATUS
 
-        if self.args.path is not None:
-            data_fetcher = self.share_state(GetScenarioInstanceData)
-            data_fetcher.args.scenario_instance_id = scenario_id
-            data_fetcher.execute(False)
-
         return response
 
     def _launch_and_wait(self, builder=None):
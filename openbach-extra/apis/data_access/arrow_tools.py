@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# OpenBACH is a generic testbed able to control/configure multiple
+# network/physical entities (under test) and collect data from them. It is
+# composed of an Auditorium (HMIs), a Controller, a Collector and multiple
+# Agents (one for each network entity that wants to be tested).
+#
+#
+# Copyright © 2016-2023 CNES
+#
+#
+# This file is part of the OpenBACH testbed.
+#
+#
+# OpenBACH is a free software : you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY, without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program. If not, see http://www.gnu.org/licenses/.
+
+"""Collection of tools to store statistics in columnar formats.
+
+This module provide:
+    * `statistics_to_table`: a function to convert statistics
+    fetched from InfluxDB into an Apache Arrow table.
+    * `write_table` and `read_table`: functions to store and load
+    such tables as Parquet or Arrow IPC files.
+
+It requires the optional `pyarrow` dependency.
+"""
+
+__author__ = 'Viveris Technologies'
+__credits__ = 'Maintainer: Mathias ETTINGER <mettinger@toulouse.viveris.com>'
+__all__ = ['statistics_to_table', 'write_table', 'read_table', 'FORMATS']
+
+
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.compute
+import pyarrow.parquet
+
+
+# Tags identifying a job instance, stored as table metadata
+# rather than repeated on each row
+METADATA_TAGS = (
+    '@job_name',
+    '@agent_name',
+    '@job_instance_id',
+    '@scenario_instance_id',
+    '@owner_scenario_instance_id',
+)
+FORMATS = {
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+}
+# Arrow timestamp unit and scaling factor of each InfluxDB
+# precision; minutes and hours are stored as seconds
+_PRECISIONS = {
+    'h': ('s', 3600),
+    'm': ('s', 60),
+    's': ('s', 1),
+    'ms': ('ms', 1),
+    'u': ('us', 1),
+    'n': ('ns', 1),
+}
+
+
+def statistics_to_table(statistics, precision='ms', metadata=None):
+    """Build an Arrow table out of statistics as generated by
+    `InfluxDBConnection.raw_statistics` for a single job instance.
+
+    Identification tags are moved out of the columns and into the
+    table metadata, along with any additional `metadata` provided.
+    The time column is converted to timestamps of the given InfluxDB
+    `precision` and the remaining columns types are inferred.
+    """
+    try:
+        unit, scale = _PRECISIONS[precision]
+    except KeyError:
+        raise ValueError('Unknown InfluxDB precision: {}'.format(precision)) from None
+
+    rows = []
+    # Missing values are not reported by InfluxDB so rows may hold
+    # different fields, gather them all to build the columns
+    columns = {}
+    schema_metadata = {} if metadata is None else dict(metadata)
+    for job_name, row in statistics:
+        schema_metadata.setdefault('@job_name', job_name)
+        for tag in METADATA_TAGS:
+            with_value = row.pop(tag, None)
+            if with_value is not None:
+                schema_metadata.setdefault(tag, with_value)
+        columns.update(dict.fromkeys(row))
+        rows.append(row)
+
+    table = pa.Table.from_pydict({
+        column: [row.get(column) for row in rows]
+        for column in columns
+    })
+    if 'time' in table.column_names:
+        index = table.column_names.index('time')
+        timestamps = table.column(index)
+        if scale != 1:
+            timestamps = pyarrow.compute.multiply(timestamps, scale)
+        timestamps = timestamps.cast(pa.timestamp(unit))
+        table = table.set_column(index, 'time', timestamps)
+
+    return table.replace_schema_metadata({
+        str(key): str(value)
+        for key, value in schema_metadata.items()
+        if value is not None
+    })
+
+
+def write_table(table, path, format='parquet'):
+    """Store the given Arrow table in `path` using the requested format"""
+    if format == 'parquet':
+        pyarrow.parquet.write_table(table, path, compression='zstd')
+    elif format == 'arrow':
+        options = pyarrow.ipc.IpcWriteOptions(compression='zstd')
+        with pyarrow.ipc.new_file(path, table.schema, options=options) as writer:
+            writer.write_table(table)
+    else:
+        raise ValueError('Unknown columnar format: {}'.format(format))
+
+
+def read_table(path, format='parquet'):
+    """Load an Arrow table stored in `path` using the requested format"""
+    if format == 'parquet':
+        return pyarrow.parquet.read_table(path)
+    if format == 'arrow':
+        with pyarrow.ipc.open_file(path) as reader:
+            return reader.read_all()
+    raise ValueError('Unknown columnar format: {}'.format(format))
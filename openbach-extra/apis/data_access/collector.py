@@ -182,16 +182,17 @@ class CollectorConnection:
                 job_name, scenario_instance_id, agent_name,
                 job_instance_id, timestamps)
 
-    def orphans(self, timestamps=None, condition=None):
+    def orphans(self, timestamps=None, condition=None, severity=None, limit=None):
         """Retrieve orphans logs from ElasticSearch and orphans
         statistics from InfluxDB.
 
         Orphans have no associated metadata such as scenario instance
         IDs or job instance IDs and are most likely not emitted using
-        the collect-agent API.
+        the collect-agent API. Logs can be restricted to a maximal
+        `severity` and to the `limit` most recent ones.
 
         Returns a couple of a `Log` instance and a `Scenario` instance
         holding statistics data for each job (measurement) in InfluxDB.
         """
-        logs = self.elasticsearch.orphans(timestamps)
+        logs = self.elasticsearch.orphans(timestamps, severity, limit)
         return logs, self.influxdb.orphans(condition, timestamps)
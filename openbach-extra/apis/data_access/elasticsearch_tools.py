@@ -43,6 +43,7 @@ __all__ = ['ElasticSearchConnection']
 import json
 import locale
 import datetime
+import itertools
 from contextlib import suppress
 
 import requests
@@ -50,6 +51,16 @@ import requests
 from .result_data import Log, get_or_create_scenario
 
 
+# Logs lacking any of these fields were not emitted by the collect-agent API
+ORPHANS_MISSING_FIELDS = (
+    'agent_name',
+    'program',
+    'job_instance_id',
+    'scenario_instance_id',
+    'owner_scenario_instance_id',
+)
+
+
 ############################################
 # Helper functions for formatting purposes #
 ############################################
@@ -103,6 +114,35 @@ def tags_to_query(scenario, job, agent, job_instance, timestamps):
     return {'query': {'bool': filter_query}}
 
 
+def orphans_to_query(severity=None, timestamps=None, limit=None):
+    """Build an ElasticSearch query matching logs that were not
+    emitted using the collect-agent API.
+
+    Logs can further be restricted to the ones whose severity
+    is at most `severity` and to the `limit` most recent ones.
+    """
+    query = tags_to_query(None, None, None, None, timestamps)
+    filter_query = query['query']['bool'].setdefault('filter', [])
+    filter_query.append({
+        'bool': {
+            'should': [
+                {'bool': {'must_not': {'exists': {'field': field}}}}
+                for field in ORPHANS_MISSING_FIELDS
+            ],
+            'minimum_should_match': 1,
+        },
+    })
+
+    if severity is not None:
+        filter_query.append({'range': {'severity': {'lte': severity}}})
+
+    if limit is not None:
+        query['size'] = limit
+        query['sort'] = [{'@timestamp': {'order': 'desc'}}]
+
+    return query
+
+
 def extract_field_or_None(record, field_name, converter=str):
     """Helper function to easily convert a result from
     ElasticSearch into a meaningful data.
@@ -264,9 +304,13 @@ class ElasticSearchCommunicator:
         response = requests.get(self.settings_URL + filters, headers=self.auth_header, timeout=self.TIMEOUT)
         return response.json()
 
-    def search_query(self, body=None, **query):
+    def search_query(self, body=None, limit=None, **query):
         """Send a query to ElasticSearch and gather the results"""
 
+        if limit is not None:
+            yield from itertools.islice(self.search_query(body, **query), limit)
+            return
+
         query['scroll'] = '1m'
         session = requests.Session()
         response = session.post(self.querying_URL, params=query, json=body, headers=self.auth_header, timeout=self.TIMEOUT).json()
@@ -356,12 +400,15 @@ class ElasticSearchConnection(ElasticSearchCommunicator):
         response = self.search_query(query)
         return response
 
-    def orphans(self, timestamps=None):
+    def orphans(self, timestamps=None, severity=None, limit=None):
         """Fetch data from ElasticSearch that were not emitted using
         the collect-agent API and generate according `Log`s instances.
+
+        Only logs whose severity is at most `severity` are retrieved,
+        and only the `limit` most recent ones if it is provided.
         """
-        query = tags_to_query(None, None, None, None, timestamps)
-        response = self.search_query(query)
+        query = orphans_to_query(severity, timestamps, limit)
+        response = self.search_query(query, limit)
         result = Log()
         parse_orphans(response, result)
         return result
@@ -51,8 +51,9 @@ __all__ = [
 import re
 import sys
 import enum
+import json
 import itertools
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 from contextlib import suppress
 
 import requests
@@ -184,10 +185,36 @@ class ConditionTimestamp(ComparatorCondition):
 ############################################
 
 LINE_PROTOCOL_CHUNCK_SIZE = 4000
+# Amount of InfluxDB servers and of connections to each
+# of them kept alive by the shared requests session
+SESSION_POOL_HOSTS = 10
+SESSION_POOL_SIZE = 20
 MEASUREMENT_SPECIALS = re.compile(r'[ ,]')
 TAGS_AND_FIELDS_SPECIALS = re.compile(r'[ ,=]')
 FIELDS_VALUE_SPECIALS = re.compile(r'["]')
 
+RollupTier = namedtuple('RollupTier', 'name interval duration')
+# Downsampled copies of the statistics, from the coarsest to the
+# finest: retention policy holding them, duration of their time
+# buckets (in milliseconds) and how long they are kept
+ROLLUP_TIERS = (
+    RollupTier('rollup_1m', 60 * 1000, 'INF'),
+    RollupTier('rollup_1s', 1000, '104w'),
+)
+# Functions applied to each field when downsampling; the
+# resulting fields are prefixed by the lowercased function name
+ROLLUP_FUNCTIONS = ('MIN', 'MAX', 'SUM', 'COUNT', 'FIRST', 'LAST')
+# Aggregations that can be computed out of rolled-up fields
+ROLLUP_AGGREGATIONS = {
+    'mean': 'SUM("sum_{0}") / SUM("count_{0}")',
+    'min': 'MIN("min_{0}")',
+    'max': 'MAX("max_{0}")',
+    'sum': 'SUM("sum_{0}")',
+    'count': 'SUM("count_{0}")',
+    'first': 'FIRST("first_{0}")',
+    'last': 'LAST("last_{0}")',
+}
+
 
 def escape_names(name, measurement=False):
     """Escape measurements and fields names as per InfluxDB parsing rules.
@@ -268,6 +295,69 @@ def select_query(job_name=None, field_names=None, condition=None):
     return query
 
 
+def aggregate_query(
+        job_name, field_name, functions, condition=None,
+        interval=None, offset=0, group_by=(), unit='ms',
+        retention_policy=None):
+    """Build a SELECT query applying the aggregation `functions` to a
+    single field, optionally grouped by time `interval` and tags.
+
+    Each aggregated column is named after its function. When a
+    `retention_policy` holding rolled-up statistics is given, the
+    aggregations are computed out of the rolled-up fields instead.
+    """
+    if retention_policy is None:
+        fields = ','.join(
+                '{}("{}") AS "{}"'.format(function.upper(), field_name, function.lower())
+                for function in functions)
+        query = 'SELECT {} FROM "{}"'.format(fields, job_name)
+    else:
+        fields = ','.join(
+                '{} AS "{}"'.format(
+                    ROLLUP_AGGREGATIONS[function.lower()].format(field_name),
+                    function.lower())
+                for function in functions)
+        query = 'SELECT {} FROM "{}"."{}"'.format(fields, retention_policy, job_name)
+    if condition is not None:
+        query = '{} WHERE {}'.format(query, condition)
+    groups = ['"{}"'.format(tag) for tag in group_by]
+    if interval is not None:
+        groups.insert(0, 'time({0}{2},{1}{2})'.format(interval, offset, unit))
+    if groups:
+        query = '{} GROUP BY {}'.format(query, ','.join(groups))
+    if interval is not None:
+        query += ' fill(none)'
+    return query
+
+
+def rollup_query(database, tier, condition=None):
+    """Build a SELECT INTO query downsampling the statistics
+    of every job into the retention policy of the given tier.
+    """
+    functions = ','.join('{}(*)'.format(function) for function in ROLLUP_FUNCTIONS)
+    query = 'SELECT {} INTO "{}"."{}".:MEASUREMENT FROM /.*/'.format(functions, database, tier.name)
+    if condition is not None:
+        query = '{} WHERE {}'.format(query, condition)
+    return '{} GROUP BY time({}ms),* fill(none)'.format(query, tier.interval)
+
+
+def rollup_tier(interval, functions):
+    """Select the coarsest rollup tier whose resolution is enough
+    to compute the aggregation `functions` over time buckets of
+    `interval` milliseconds. Return None if raw statistics are
+    required instead.
+    """
+    if interval is None:
+        return None
+
+    if not all(function.lower() in ROLLUP_AGGREGATIONS for function in functions):
+        return None
+
+    for tier in ROLLUP_TIERS:
+        if tier.interval <= interval:
+            return tier
+
+
 def measurement_query(job=None, condition=None):
     """Build a SHOW MEASUREMENTS query"""
     query = 'SHOW MEASUREMENTS'
@@ -302,14 +392,22 @@ def tag_query(tag_name, job=None, condition=None):
 
 
 def parse_influx(response):
-    """Extract out relevant informations from an InfluxDB's response"""
-    for result in response.get('results', []):
-        for serie in result.get('series', []):
-            with suppress(KeyError):
-                name = serie.get('name')
-                fields = serie['columns']
-                for values in serie['values']:
-                    yield name, {f: v for f, v in zip(fields, values) if v is not None}
+    """Extract out relevant informations from an InfluxDB's response.
+
+    The response can either be a single JSON document or an iterable
+    of such documents, as generated when querying in chunked mode.
+    """
+    chunks = (response,) if isinstance(response, dict) else response
+    for chunk in chunks:
+        for result in chunk.get('results', []):
+            for serie in result.get('series', []):
+                with suppress(KeyError):
+                    name = serie.get('name')
+                    tags = serie.get('tags', {})
+                    fields = serie['columns']
+                    for values in serie['values']:
+                        statistics = {f: v for f, v in zip(fields, values) if v is not None}
+                        yield name, dict(tags, **statistics)
 
 
 def parse_statistics(influx_result):
@@ -393,13 +491,32 @@ def line_protocol(job_name, scenario_id, owner_id, agent_name, job_id, suffix, s
 # Fetching and receiving data #
 ###############################
 
+def _pooled_session():
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+            pool_connections=SESSION_POOL_HOSTS,
+            pool_maxsize=SESSION_POOL_SIZE)
+    session.mount('http://', adapter)
+    return session
+
+
+_SESSION = _pooled_session()
+
+
 class InfluxDBCommunicator:
     """Manage network access to an InfluxDB server"""
 
     TIMEOUT = (2, 3600)  # Requests (connection, data) timeouts in second
+    CHUNK_SIZE = 10000  # Amount of points per chunk when streaming query results
+
+    def __init__(self, ip, port=8086, db_name='openbach', precision='ms', session=None):
+        """Configure the routes to send/get data to/from InfluxDB.
 
-    def __init__(self, ip, port=8086, db_name='openbach', precision='ms'):
-        """Configure the routes to send/get data to/from InfluxDB"""
+        Requests are sent through `session`, or through a pooled
+        session shared by all communicators if none is provided,
+        so connections are kept alive between queries.
+        """
+        self.session = _SESSION if session is None else session
 
         def url_builder(route, time_unit):
             return requests.Request(
@@ -408,16 +525,37 @@ class InfluxDBCommunicator:
                 params={'db': db_name, time_unit: precision},
             ).prepare().url
 
+        self.database_name = db_name
         self.writing_URL = url_builder('write', 'precision')
         self.querying_URL = url_builder('query', 'epoch')
 
     def sql_query(self, query):
         """Send a query to InfluxDB and gather the results"""
-        return requests.get(self.querying_URL, params={'q': query}, timeout=self.TIMEOUT).json()
+        return self.session.get(self.querying_URL, params={'q': query}, timeout=self.TIMEOUT).json()
+
+    def sql_query_chunked(self, query, chunk_size=None):
+        """Send a query to InfluxDB and generate the results
+        as they arrive, one JSON document per chunk of at most
+        `chunk_size` points, without holding the whole response
+        in memory.
+        """
+        params = {
+                'q': query,
+                'chunked': 'true',
+                'chunk_size': self.CHUNK_SIZE if chunk_size is None else chunk_size,
+        }
+        with self.session.get(self.querying_URL, params=params, timeout=self.TIMEOUT, stream=True) as response:
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
 
     def data_write(self, data):
         """Send data to InfluxDB so they are stored"""
-        return requests.post(self.writing_URL, data.encode(), timeout=self.TIMEOUT)
+        return self.session.post(self.writing_URL, data.encode(), timeout=self.TIMEOUT)
+
+    def sql_execute(self, query):
+        """Send a query modifying the database to InfluxDB"""
+        return self.session.post(self.querying_URL, data={'q': query}, timeout=self.TIMEOUT).json()
 
 
 class InfluxDBConnection(InfluxDBCommunicator):
@@ -475,6 +613,111 @@ class InfluxDBConnection(InfluxDBCommunicator):
             (_, origin_stat), = parse_influx(response)
             return origin_stat['time']
 
+    def time_span(self, job=None, scenario=None, agent=None,
+                  job_instance=None, suffix=None, fields=None):
+        """Retrieve the first and last timestamps in InfluxDB
+        that correspond to the given constraints.
+        """
+        condition = tags_to_condition(scenario, agent, job_instance, suffix)
+        query = select_query(job, fields, condition)
+        response = self.sql_query('{0} LIMIT 1; {0} ORDER BY time DESC LIMIT 1'.format(query))
+        with suppress(ValueError, KeyError):
+            (_, first), (_, last) = parse_influx(response)
+            return first['time'], last['time']
+
+    def aggregated_statistics(
+            self, job, field, functions, scenario=None, agent=None,
+            job_instance=None, suffix=None, condition=None,
+            interval=None, offset=0, group_by=(), rollups=True):
+        """Fetch data from InfluxDB that correspond to the given
+        constraints once aggregated by the given functions, optionally
+        over time intervals (in milliseconds), and generate values in
+        series. Tags used in `group_by` are included in each value.
+
+        Unless `rollups` is False, the coarsest rollup tier fitting the
+        requested interval is queried first, rounding the interval and
+        its offset to the resolution of the tier. Raw statistics are
+        used if this tier does not hold any matching value.
+        """
+        _condition = tags_to_condition(scenario, agent, job_instance, suffix, condition)
+        tier = rollup_tier(interval, functions) if rollups else None
+        if tier is not None:
+            tier_interval = -(-interval // tier.interval) * tier.interval
+            tier_offset = offset % tier_interval // tier.interval * tier.interval
+            query = aggregate_query(
+                    job, field, functions, _condition, tier_interval,
+                    tier_offset, group_by, retention_policy=tier.name)
+            values = list(parse_influx(self.sql_query(query)))
+            if values:
+                yield from values
+                return
+
+        query = aggregate_query(job, field, functions, _condition, interval, offset, group_by)
+        yield from parse_influx(self.sql_query(query))
+
+    def create_rollup_tiers(self):
+        """Create the retention policies holding rolled-up
+        statistics, if they do not exist already.
+        """
+        for tier in ROLLUP_TIERS:
+            self.sql_execute(
+                    'CREATE RETENTION POLICY "{}" ON "{}" DURATION {} REPLICATION 1'
+                    .format(tier.name, self.database_name, tier.duration))
+
+    def drop_rollup_tiers(self):
+        """Remove the retention policies holding rolled-up
+        statistics along with all their data.
+        """
+        for tier in ROLLUP_TIERS:
+            self.sql_execute(
+                    'DROP RETENTION POLICY "{}" ON "{}"'
+                    .format(tier.name, self.database_name))
+
+    def rollup_statistics(self, scenario=None, condition=None):
+        """Downsample the statistics that correspond to the given
+        constraints into each rollup tier. Statistics of subscenarios
+        of the given `scenario` are downsampled as well.
+
+        Rolling up the same statistics several times is harmless
+        as the downsampled points are overwritten.
+        """
+        self.create_rollup_tiers()
+        _condition = tags_to_condition(scenario, None, None, None, condition, subscenarios=True)
+        for tier in ROLLUP_TIERS:
+            response = self.sql_execute(rollup_query(self.database_name, tier, _condition))
+            for result in response.get('results', []):
+                if 'error' in result:
+                    raise ValueError(
+                            'Rollup into {} failed: {}'
+                            .format(tier.name, result['error']))
+
+    def ingest_rates(self, window=600):
+        """Estimate the amount of points per second written
+        into InfluxDB by each agent over the last `window` seconds.
+        """
+        condition = ConditionTimestamp(Operator.GreaterThan, window, 's', from_now=True)
+        query = 'SELECT COUNT(*) FROM /.*/ WHERE {} GROUP BY "@agent_name"'.format(condition)
+        points = defaultdict(int)
+        for _, counts in parse_influx(self.sql_query(query)):
+            agent = counts.pop('@agent_name', '')
+            counts.pop('time', None)
+            # Fields of a measurement are mostly written
+            # together, count the most populated one
+            points[agent] += max(counts.values(), default=0)
+        return {agent: count / window for agent, count in points.items()}
+
+    def disk_usage(self):
+        """Retrieve the amount of bytes used on disk by the database, as
+        reported by the InfluxDB monitoring database, if it is enabled.
+        """
+        condition = ConditionAnd(
+                ConditionTag('database', Operator.Equal, self.database_name),
+                ConditionTimestamp(Operator.GreaterThan, 1, 'm', from_now=True))
+        query = 'SELECT LAST("diskBytes") FROM "_internal".."shard" WHERE {} GROUP BY "id"'.format(condition)
+        shards = [shard['last'] for _, shard in parse_influx(self.sql_query(query))]
+        if shards:
+            return sum(shards)
+
     def suffixes(self, job=None, scenario=None, agent=None, job_instance=None):
         """List the available suffixes in InfluxDB
         that correspond to the given constraints.
@@ -493,7 +736,7 @@ class InfluxDBConnection(InfluxDBCommunicator):
             timestamp_condition = ConditionTimestamp.from_timestamps(timestamps)
             condition = timestamp_condition if condition is None else ConditionAnd(condition, timestamp_condition)
         _condition = tags_to_condition(scenario, agent, job_instance, suffix, condition)
-        response = self.sql_query(select_query(job, fields, _condition))
+        response = self.sql_query_chunked(select_query(job, fields, _condition))
         yield from parse_influx(response)
 
     def statistics(
@@ -506,16 +749,18 @@ class InfluxDBConnection(InfluxDBCommunicator):
             timestamp_condition = ConditionTimestamp.from_timestamps(timestamps)
             condition = timestamp_condition if condition is None else ConditionAnd(condition, timestamp_condition)
         _condition = tags_to_condition(scenario, agent, job_instance, suffix, condition, subscenarios=True)
-        response = self.sql_query(select_query(job, fields, _condition))
+        response = self.sql_query_chunked(select_query(job, fields, _condition))
+        scenarios = list(parse_statistics(response))
 
         if scenario is not None:
-            for scenario_instance in parse_statistics(response):
+            for scenario_instance in scenarios:
                 if scenario_instance.instance_id == scenario:
                     owner = scenario_instance.owner_instance_id
                     _condition = tags_to_condition(owner, agent, job_instance, suffix, condition, subscenarios=True)
-                    response = self.sql_query(select_query(job, fields, _condition))
+                    response = self.sql_query_chunked(select_query(job, fields, _condition))
+                    scenarios = list(parse_statistics(response))
                     break
-        yield from parse_statistics(response)
+        yield from scenarios
 
     def orphans(self, condition=None, timestamps=None):
         """Fetch data from InfluxDB that were not emitted using
@@ -526,7 +771,7 @@ class InfluxDBConnection(InfluxDBCommunicator):
         if timestamps is not None:
             timestamp_condition = ConditionTimestamp.from_timestamps(timestamps)
             condition = ConditionAnd(condition, timestamp_condition)
-        return parse_orphans(self.sql_query(select_query(None, None, condition)))
+        return parse_orphans(self.sql_query_chunked(select_query(None, None, condition)))
 
     def remove_statistics(
             self, job=None, scenario=None, agent=None,
@@ -31,14 +31,13 @@
 """
 
 __author__ = 'Mathias ETTINGER <mettinger@toulouse.viveris.com>'
-__all__ = ['save', 'Statistics']
+__all__ = ['save', 'Statistics', 'largest_triangle_three_buckets']
 
 import math
 import pickle
 import stat
 import warnings
 import itertools
-from functools import partial
 from contextlib import suppress
 from datetime import datetime,timedelta
 
@@ -55,6 +54,8 @@ from .influxdb_tools import (
 
 
 DEFAULT_COLLECTOR_FILEPATH = '/opt/openbach/agent/collector.yml'
+# Tags identifying the statistics of a single job instance
+_GROUPING_TAGS = ['@job_instance_id', '@scenario_instance_id', '@agent_name', '@suffix']
 
 
 def _identity(x):
@@ -65,6 +66,19 @@ def _column_name_serializer(name):
     return '_'.join(map(str, name))
 
 
+def _to_numeric(series):
+    if pd.api.types.is_numeric_dtype(series):
+        return pd.to_numeric(series, errors='coerce')
+
+    # Tags are stored as strings and repeated on each
+    # row: only convert each distinct value once
+    codes, uniques = pd.factorize(series)
+    converted = np.asarray(pd.to_numeric(uniques, errors='coerce'))
+    if (codes < 0).any():
+        converted = np.append(converted, np.nan)
+    return pd.Series(converted[codes], index=series.index, name=series.name)
+
+
 def _prepare_columns(df, columns):
     df = df.sort_values(['suffix', 'statistic'], axis=1)
     df.columns = [next(columns, name) or name for name in df.columns]
@@ -72,25 +86,49 @@ def _prepare_columns(df, columns):
 
 
 def influx_to_pandas(response, query):
-    try:
-        results = response['results']
-    except KeyError:
-        warnings.warn('The query \'{}\' returned no result, ignoring'.format(query))
-        return
-
-    for result in results:
+    """Build a DataFrame out of each series in an InfluxDB's response.
+
+    The response can either be a single JSON document or an iterable
+    of chunks as generated by `InfluxDBCommunicator.sql_query_chunked`,
+    in which case each chunk is converted as soon as it arrives and
+    parts of a series spread over several chunks are concatenated
+    back into a single DataFrame.
+    """
+    chunks = (response,) if isinstance(response, dict) else response
+    series = {}
+    has_results = False
+    for chunk in chunks:
         try:
-            series = result['series']
+            results = chunk['results']
         except KeyError:
-            warnings.warn('The query \'{}\' result contained no time series, ignoring'.format(query))
             continue
+        has_results = True
 
-        for serie in series:
+        for result in results:
             try:
-                yield pd.DataFrame(serie['values'], columns=serie['columns'])
+                result_series = result['series']
             except KeyError:
-                warnings.warn('The query \'{}\' returned time series with no data, ignoring'.format(query))
-                pass
+                warnings.warn('The query \'{}\' result contained no time series, ignoring'.format(query))
+                continue
+
+            for serie in result_series:
+                try:
+                    columns, values = serie['columns'], serie['values']
+                except KeyError:
+                    warnings.warn('The query \'{}\' returned time series with no data, ignoring'.format(query))
+                    continue
+                tags = tuple(sorted(serie.get('tags', {}).items()))
+                key = (serie.get('name'), tags, tuple(columns))
+                series.setdefault(key, []).append(pd.DataFrame(values, columns=columns))
+
+    if not has_results:
+        warnings.warn('The query \'{}\' returned no result, ignoring'.format(query))
+
+    for dataframes in series.values():
+        if len(dataframes) == 1:
+            yield dataframes[0]
+        else:
+            yield pd.concat(dataframes, ignore_index=True)
 
 
 def compute_histogram(bins):
@@ -120,6 +158,43 @@ def save(figure, filename, use_pickle=False, set_legend=True):
         figure.savefig(filename, bbox_inches='tight')
 
 
+def largest_triangle_three_buckets(x, y, threshold):
+    """Select the indices of the points to keep when downsampling
+    the series (x, y) to `threshold` points while preserving its
+    visual shape, using the Largest-Triangle-Three-Buckets algorithm.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    length = len(x)
+    if threshold >= length or threshold < 3:
+        return np.arange(length)
+
+    indices = np.empty(threshold, dtype=int)
+    indices[0] = 0
+    indices[-1] = length - 1
+
+    # First and last points are always kept, the others
+    # are spread evenly across threshold - 2 buckets
+    every = (length - 2) / (threshold - 2)
+    selected = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, length)
+        average_x = x[end:next_end].mean()
+        average_y = y[end:next_end].mean()
+
+        # Keep the point forming the largest triangle with the previously
+        # selected one and the average of the next bucket
+        areas = np.abs(
+                (x[selected] - average_x) * (y[start:end] - y[selected])
+                - (x[selected] - x[start:end]) * (average_y - y[selected]))
+        selected = start + int(np.argmax(areas))
+        indices[bucket + 1] = selected
+
+    return indices
+
+
 def aggregator_factory(mapping):
     def aggregator(pd_datetime):
         for moment, intervals in mapping.items():
@@ -181,24 +256,18 @@ class Statistics(InfluxDBCommunicator):
         offset = self.origin
         names = ['job', 'scenario', 'agent', 'suffix', 'statistic']
         for df in influx_to_pandas(response, query):
-            converters = dict.fromkeys(df.columns, partial(pd.to_numeric, errors='coerce'))            
-            converters.pop('@owner_scenario_instance_id')
-            converters.pop('@suffix', None)
-            converters['@agent_name'] = _identity
-            converted = [convert(df[column]) for column, convert in converters.items()]
-
-            if '@suffix' in df:
-                converted.append(df['@suffix'].fillna(''))
-            else:
-                converted.append(pd.Series('', index=df.index, name='@suffix'))
-            df = pd.concat(converted, axis=1)
-
-            df.set_index(['@job_instance_id', '@scenario_instance_id', '@agent_name', '@suffix'], inplace=True)
-            for index in df.index.unique():
-                extract = df.xs(index)
-                if isinstance(extract, pd.Series):
-                    extract = pd.DataFrame(extract.to_dict(), index=[0])
-                section = extract.reset_index(drop=True).dropna(axis=1, how='all')
+            df = df.drop(columns='@owner_scenario_instance_id')
+            suffix = df.pop('@suffix').fillna('') if '@suffix' in df else ''
+            agent = df.pop('@agent_name')
+            df = df.apply(_to_numeric)
+            df['@agent_name'] = agent
+            df['@suffix'] = suffix
+
+            # Split each column once per group instead of extracting
+            # each group from the whole DataFrame in turn
+            groups = df.groupby(_GROUPING_TAGS, sort=False, dropna=False)
+            for index, section in groups:
+                section = section.drop(columns=_GROUPING_TAGS).reset_index(drop=True).dropna(axis=1, how='all')
                 section['time'] -= section.time[0] if offset is None else offset
                 section.set_index('time', inplace=True)
                 section.index.name = 'Time (ms)'
@@ -210,14 +279,14 @@ class Statistics(InfluxDBCommunicator):
             self, job=None, scenario=None, agent=None, job_instances=(),
             suffix=None, fields=None,timestamps=None, condition=None):
         query = self._raw_influx_query(job, scenario, agent, job_instances, suffix, fields, timestamps,condition)
-        data = self.sql_query(query)
+        data = self.sql_query_chunked(query)
         yield from (_Plot(df) for df in self._parse_dataframes(data, query))
 
     def fetch_all(
             self, job=None, scenario=None, agent=None, job_instances=(),
             suffix=None, fields=None, timestamps=None, condition=None, columns=None):
         query = self._raw_influx_query(job, scenario, agent, job_instances, suffix, fields,timestamps, condition)
-        data = self.sql_query(query)
+        data = self.sql_query_chunked(query)
         df = pd.concat(self._parse_dataframes(data, query), axis=1)
         if not job_instances or columns is None:
             return _Plot(df)
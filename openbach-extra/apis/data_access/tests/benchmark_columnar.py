@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# OpenBACH is a generic testbed able to control/configure multiple
+# network/physical entities (under test) and collect data from them.
+# It is composed of an Auditorium (HMIs), a Controller, a Collector
+# and multiple Agents (one for each network entity that wants to be
+# tested).
+#
+#
+# Copyright © 2016-2023 CNES
+#
+#
+# This file is part of the OpenBACH testbed.
+#
+#
+# OpenBACH is a free software : you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY, without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+
+"""Compare the size and loading time of statistics exported as
+CSV against the columnar formats provided by `data_access.arrow_tools`.
+
+Synthetic statistics are generated for a number of job instances,
+each export format stores them in a temporary directory, and the
+resulting files are then loaded back into pandas DataFrames.
+"""
+
+__author__ = 'Mathias ETTINGER <mathias.ettinger@toulouse.viveris.com>'
+__version__ = 'v0.1'
+
+
+import csv
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from data_access import arrow_tools
+
+
+def generate_statistics(job_instance_id, rows, fields):
+    timestamp = 1495094155683
+    for _ in range(rows):
+        timestamp += random.randint(1, 1000)
+        statistics = {
+                'time': timestamp,
+                '@agent_name': 'agent',
+                '@job_instance_id': job_instance_id,
+                '@scenario_instance_id': 1,
+                '@owner_scenario_instance_id': 1,
+        }
+        for field in range(fields):
+            statistics['stat_{}'.format(field)] = random.random() * 1000
+        yield 'job', statistics
+
+
+def export_csv(directory, job_instances, rows, fields):
+    path = Path(directory, 'statistics.csv')
+    headers = None
+    with path.open('w', newline='') as csvfile:
+        for job_instance_id in range(job_instances):
+            for _, statistics in generate_statistics(job_instance_id, rows, fields):
+                if headers is None:
+                    headers = ['@job_name', *statistics]
+                    writer = csv.DictWriter(csvfile, fieldnames=headers)
+                    writer.writeheader()
+                writer.writerow(dict(statistics, **{'@job_name': 'job'}))
+    return [path]
+
+
+def export_columnar(directory, job_instances, rows, fields, format):
+    paths = []
+    for job_instance_id in range(job_instances):
+        statistics = generate_statistics(job_instance_id, rows, fields)
+        table = arrow_tools.statistics_to_table(statistics)
+        path = Path(directory, 'job_({}){}'.format(job_instance_id, arrow_tools.FORMATS[format]))
+        arrow_tools.write_table(table, path.as_posix(), format)
+        paths.append(path)
+    return paths
+
+
+def load_csv(paths):
+    return [pd.read_csv(path.as_posix()) for path in paths]
+
+
+def load_columnar(paths, format):
+    return [arrow_tools.read_table(path.as_posix(), format).to_pandas() for path in paths]
+
+
+def benchmark(name, export, load, repeat):
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        paths = export(directory)
+        export_time = time.perf_counter() - start
+        size = sum(path.stat().st_size for path in paths)
+
+        load_times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            load(paths)
+            load_times.append(time.perf_counter() - start)
+
+    print('{:>8}: {:>12} bytes, export {:8.3f}s, load {:8.3f}s'.format(
+        name, size, export_time, min(load_times)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-j', '--job-instances', type=int, default=20)
+    parser.add_argument('-r', '--rows', type=int, default=50000)
+    parser.add_argument('-f', '--fields', type=int, default=5)
+    parser.add_argument('-n', '--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    random.seed(0)
+    parameters = (args.job_instances, args.rows, args.fields)
+    benchmark('csv', lambda d: export_csv(d, *parameters), load_csv, args.repeat)
+    for format in arrow_tools.FORMATS:
+        benchmark(
+                format,
+                lambda d: export_columnar(d, *parameters, format),
+                lambda paths: load_columnar(paths, format),
+                args.repeat)
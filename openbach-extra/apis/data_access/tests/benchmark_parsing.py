@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# OpenBACH is a generic testbed able to control/configure multiple
+# network/physical entities (under test) and collect data from them.
+# It is composed of an Auditorium (HMIs), a Controller, a Collector
+# and multiple Agents (one for each network entity that wants to be
+# tested).
+#
+#
+# Copyright © 2016-2023 CNES
+#
+#
+# This file is part of the OpenBACH testbed.
+#
+#
+# OpenBACH is a free software : you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY, without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+
+"""Compare the time needed to parse statistics fetched from InfluxDB
+by the row-oriented parsers of `data_access.influxdb_tools` against
+the columnar parser of `data_access.post_processing`.
+
+A synthetic InfluxDB response is generated for a number of job
+instances and fed to each parser, optionally split into chunks as
+when streaming query results.
+"""
+
+__author__ = 'Mathias ETTINGER <mathias.ettinger@toulouse.viveris.com>'
+__version__ = 'v0.1'
+
+
+import time
+import random
+import argparse
+
+from data_access.influxdb_tools import parse_influx, parse_statistics
+from data_access.post_processing import Statistics
+
+
+def generate_response(job_instances, rows, fields, chunk_size=None):
+    columns = [
+            'time', '@agent_name', '@job_instance_id',
+            '@owner_scenario_instance_id', '@scenario_instance_id', '@suffix',
+    ]
+    columns.extend('stat_{}'.format(field) for field in range(fields))
+
+    timestamp = 1495094155683
+    values = []
+    for _ in range(rows):
+        timestamp += random.randint(1, 1000)
+        job_instance_id = random.randrange(job_instances)
+        values.append([
+            timestamp, 'agent_{}'.format(job_instance_id),
+            str(job_instance_id), '1', '1', None,
+            *(random.random() * 1000 for _ in range(fields)),
+        ])
+
+    if chunk_size is None:
+        return {'results': [{'series': [{'name': 'job', 'columns': columns, 'values': values}]}]}
+
+    return [
+            {'results': [{'series': [{'name': 'job', 'columns': columns, 'values': values[i:i + chunk_size]}]}]}
+            for i in range(0, rows, chunk_size)
+    ]
+
+
+def parse_rows(response):
+    return sum(1 for _ in parse_influx(response))
+
+
+def parse_scenarios(response):
+    return list(parse_statistics(response))
+
+
+def parse_columns(response):
+    return list(Statistics('localhost')._parse_dataframes(response, 'SELECT * FROM "job"'))
+
+
+def benchmark(name, parse, response, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(response)
+        timings.append(time.perf_counter() - start)
+    print('{:>10}: {:8.3f}s'.format(name, min(timings)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-j', '--job-instances', type=int, default=20)
+    parser.add_argument('-r', '--rows', type=int, default=1000000)
+    parser.add_argument('-f', '--fields', type=int, default=5)
+    parser.add_argument('-c', '--chunk-size', type=int)
+    parser.add_argument('-n', '--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    random.seed(0)
+    response = generate_response(args.job_instances, args.rows, args.fields, args.chunk_size)
+    benchmark('rows', parse_rows, response, args.repeat)
+    benchmark('scenarios', parse_scenarios, response, args.repeat)
+    benchmark('columns', parse_columns, response, args.repeat)
@@ -31,13 +31,25 @@ __author__ = 'Mathias ETTINGER <mathias.ettinger@toulouse.viveris.com>'
 __version__ = 'v0.3'
 
 
+import json
 import unittest
+import tempfile
+from pathlib import Path
 
 from data_access.influxdb_tools import (Operator,
         ConditionAnd, ConditionOr, ConditionField, ConditionTag, ConditionTimestamp,
         escape_names, escape_field, tags_to_condition,
-        select_query, measurement_query, delete_query, tag_query,
-        parse_influx, parse_statistics, parse_orphans, line_protocol)
+        select_query, aggregate_query, measurement_query, delete_query, tag_query,
+        rollup_query, rollup_tier, ROLLUP_TIERS, InfluxDBCommunicator, parse_influx, parse_statistics, parse_orphans, line_protocol)
+from data_access.elasticsearch_tools import orphans_to_query
+try:
+    from data_access import arrow_tools
+except ImportError:
+    arrow_tools = None
+try:
+    from data_access import post_processing
+except ImportError:
+    post_processing = None
 
 
 class TestDataAccessInfluxDB(unittest.TestCase):
@@ -140,6 +152,99 @@ class TestDataAccessInfluxDB(unittest.TestCase):
         self.assertEqual(tags, 'SHOW TAG VALUES FROM "job_name" WITH '
                                'KEY = "tag_name" WHERE "field_name" = 42')
 
+    def test_aggregate_queries(self):
+        condition = ConditionTimestamp(Operator.GreaterOrEqual, 1000)
+        summary = aggregate_query('job_name', 'field', ['mean', 'stddev'])
+        grouped = aggregate_query(
+                'job_name', 'field', ['max'], condition,
+                interval=250, offset=0, group_by=['@suffix'])
+
+        self.assertEqual(summary, 'SELECT MEAN("field") AS "mean",STDDEV("field") AS "stddev" FROM "job_name"')
+        self.assertEqual(grouped, 'SELECT MAX("field") AS "max" FROM "job_name" WHERE "time" >= 1000ms '
+                                  'GROUP BY time(250ms,0ms),"@suffix" fill(none)')
+
+    def test_rollup_queries(self):
+        condition = ConditionTag('@owner_scenario_instance_id', Operator.Equal, 3)
+        rollup = rollup_query('openbach', ROLLUP_TIERS[-1], condition)
+        rolled_up = aggregate_query(
+                'job_name', 'field', ['mean', 'max'],
+                interval=60000, retention_policy='rollup_1m')
+
+        self.assertEqual(rollup, 'SELECT MIN(*),MAX(*),SUM(*),COUNT(*),FIRST(*),LAST(*) '
+                                 'INTO "openbach"."rollup_1s".:MEASUREMENT FROM /.*/ '
+                                 'WHERE "@owner_scenario_instance_id" = \'3\' '
+                                 'GROUP BY time(1000ms),* fill(none)')
+        self.assertEqual(rolled_up, 'SELECT SUM("sum_field") / SUM("count_field") AS "mean",'
+                                    'MAX("max_field") AS "max" FROM "rollup_1m"."job_name" '
+                                    'GROUP BY time(60000ms,0ms) fill(none)')
+
+    def test_rollup_tier(self):
+        self.assertIsNone(rollup_tier(None, ['mean']))
+        self.assertIsNone(rollup_tier(500, ['mean']))
+        self.assertIsNone(rollup_tier(120000, ['median']))
+        self.assertEqual(rollup_tier(1500, ['mean', 'max']).name, 'rollup_1s')
+        self.assertEqual(rollup_tier(60000, ['count']).name, 'rollup_1m')
+
+    def test_grouped_parse(self):
+        data = {'results': [{'series': [{
+            'name': 'job',
+            'tags': {'@suffix': ''},
+            'columns': ['time', 'mean'],
+            'values': [[1000, 1.5], [1250, None]],
+        }]}]}
+        parsed = list(parse_influx(data))
+        self.assertEqual(parsed, [
+                ('job', {'@suffix': '', 'time': 1000, 'mean': 1.5}),
+                ('job', {'@suffix': '', 'time': 1250}),
+        ])
+
+    def test_chunked_parse(self):
+        chunks = [
+            {'results': [{'statement_id': 0, 'partial': True, 'series': [{
+                'name': 'job',
+                'columns': ['time', 'mean'],
+                'values': [[1000, 1.5], [1250, 2.5]],
+                'partial': True,
+            }]}]},
+            {'results': [{'statement_id': 0, 'series': [{
+                'name': 'job',
+                'columns': ['time', 'mean'],
+                'values': [[1500, None]],
+            }]}]},
+        ]
+        lines = [json.dumps(chunk).encode() + b'\n' for chunk in chunks]
+
+        class Response:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                pass
+
+            def iter_lines(self):
+                yield from lines
+
+        class Session:
+            def get(self, url, params, timeout, stream):
+                self.params = params
+                return Response()
+
+        session = Session()
+        communicator = InfluxDBCommunicator('localhost', session=session)
+        parsed = list(parse_influx(communicator.sql_query_chunked('SELECT * FROM "job"', 2)))
+        self.assertEqual(session.params['chunked'], 'true')
+        self.assertEqual(session.params['chunk_size'], 2)
+        self.assertEqual(parsed, [
+                ('job', {'time': 1000, 'mean': 1.5}),
+                ('job', {'time': 1250, 'mean': 2.5}),
+                ('job', {'time': 1500}),
+        ])
+
+    def test_shared_session(self):
+        first = InfluxDBCommunicator('172.20.34.45')
+        second = InfluxDBCommunicator('172.20.34.46', 8087, 'other')
+        self.assertIs(first.session, second.session)
+
     def test_simple_parse(self):
         data = {'results': [{'series': [{
             'name': 'Debug',
@@ -251,5 +356,108 @@ class TestDataAccessInfluxDB(unittest.TestCase):
     # TODO test_orphans_parse, test_line_protocol / test_f
 
 
+class TestDataAccessElasticSearch(unittest.TestCase):
+    def test_orphans_query(self):
+        query = orphans_to_query()
+        self.assertNotIn('size', query)
+        filters = query['query']['bool']['filter']
+        self.assertEqual(len(filters), 1)
+        missing_fields = [
+                clause['bool']['must_not']['exists']['field']
+                for clause in filters[0]['bool']['should']
+        ]
+        self.assertIn('job_instance_id', missing_fields)
+        self.assertIn('scenario_instance_id', missing_fields)
+
+    def test_orphans_query_pushdown(self):
+        query = orphans_to_query(severity=3, timestamps=(10, 20), limit=5)
+        filters = query['query']['bool']['filter']
+        self.assertIn({'range': {'@timestamp': {'gte': 10, 'lte': 20}}}, filters)
+        self.assertIn({'range': {'severity': {'lte': 3}}}, filters)
+        self.assertEqual(query['size'], 5)
+        self.assertEqual(query['sort'], [{'@timestamp': {'order': 'desc'}}])
+
+
+@unittest.skipIf(arrow_tools is None, 'pyarrow is not installed')
+class TestDataAccessArrow(unittest.TestCase):
+    STATISTICS = [
+            ('job', {'time': 1495094155683, '@agent_name': 'agent', '@job_instance_id': '12', 'field': 1}),
+            ('job', {'time': 1495094163291, '@agent_name': 'agent', '@job_instance_id': '12', 'field': 2.5}),
+    ]
+
+    def test_statistics_to_table(self):
+        statistics = [(name, dict(stats)) for name, stats in self.STATISTICS]
+        table = arrow_tools.statistics_to_table(statistics, metadata={'@scenario_instance_id': 3})
+        self.assertEqual(table.column_names, ['time', 'field'])
+        self.assertEqual(str(table.schema.field('time').type), 'timestamp[ms]')
+        self.assertEqual(table.column('field').to_pylist(), [1.0, 2.5])
+        metadata = table.schema.metadata
+        self.assertEqual(metadata[b'@job_name'], b'job')
+        self.assertEqual(metadata[b'@agent_name'], b'agent')
+        self.assertEqual(metadata[b'@job_instance_id'], b'12')
+        self.assertEqual(metadata[b'@scenario_instance_id'], b'3')
+
+    def test_sparse_statistics_to_table(self):
+        statistics = [
+                ('job', {'time': 1495094155683, '@job_instance_id': '12', 'field': 1}),
+                ('job', {'time': 1495094163291, '@job_instance_id': '12', 'other': 'value'}),
+                ('job', {'time': 1495094165203, '@job_instance_id': '12', 'field': 3, 'other': 'again'}),
+        ]
+        table = arrow_tools.statistics_to_table(statistics)
+        self.assertEqual(table.column_names, ['time', 'field', 'other'])
+        self.assertEqual(table.column('field').to_pylist(), [1, None, 3])
+        self.assertEqual(table.column('other').to_pylist(), [None, 'value', 'again'])
+
+    def test_statistics_to_table_precisions(self):
+        statistics = [('job', {'time': 2, 'field': 1})]
+        table = arrow_tools.statistics_to_table(statistics, precision='m')
+        self.assertEqual(str(table.schema.field('time').type), 'timestamp[s]')
+        self.assertEqual(table.column('time').cast('int64').to_pylist(), [120])
+        with self.assertRaises(ValueError):
+            arrow_tools.statistics_to_table(statistics, precision='d')
+
+    def test_write_read_table(self):
+        statistics = [(name, dict(stats)) for name, stats in self.STATISTICS]
+        table = arrow_tools.statistics_to_table(statistics)
+        with tempfile.TemporaryDirectory() as directory:
+            for format, extension in arrow_tools.FORMATS.items():
+                path = Path(directory, 'table' + extension).as_posix()
+                arrow_tools.write_table(table, path, format)
+                self.assertTrue(arrow_tools.read_table(path, format).equals(table, check_metadata=True))
+
+
+@unittest.skipIf(post_processing is None, 'pandas and matplotlib are required for post-processing')
+class TestDataAccessPostProcessing(unittest.TestCase):
+    COLUMNS = [
+            'time', '@agent_name', '@job_instance_id',
+            '@owner_scenario_instance_id', '@scenario_instance_id', 'field']
+    VALUES = [
+            [1000, 'agent', '12', '100', '100', 1],
+            [1500, 'other', '13', '100', '100', 2],
+            [2000, 'agent', '12', '100', '100', 3],
+            [2500, 'other', '13', '100', '100', None],
+            [3000, 'agent', '12', '100', '100', 5],
+    ]
+
+    def test_chunked_dataframes(self):
+        chunks = [
+                {'results': [{'series': [{'name': 'job', 'columns': self.COLUMNS, 'values': self.VALUES[:2]}]}]},
+                {'results': [{'series': [{'name': 'job', 'columns': self.COLUMNS, 'values': self.VALUES[2:]}]}]},
+        ]
+        df, = post_processing.influx_to_pandas(chunks, 'SELECT * FROM "job"')
+        self.assertEqual(list(df.columns), self.COLUMNS)
+        self.assertEqual(list(df.time), [1000, 1500, 2000, 2500, 3000])
+
+    def test_grouped_dataframes(self):
+        data = {'results': [{'series': [{'name': 'job', 'columns': self.COLUMNS, 'values': self.VALUES}]}]}
+        statistics = post_processing.Statistics('localhost')
+        agent, other = statistics._parse_dataframes(data, 'SELECT * FROM "job"')
+        self.assertEqual(list(agent.index), [0, 1000, 2000])
+        self.assertEqual(list(agent.columns), [(12, 100, 'agent', '', 'field')])
+        self.assertEqual(list(agent.iloc[:, 0]), [1, 3, 5])
+        self.assertEqual(list(other.index), [0, 1000])
+        self.assertEqual(list(other.columns), [(13, 100, 'other', '', 'field')])
+
+
 if __name__ == '__main__':
     unittest.main()
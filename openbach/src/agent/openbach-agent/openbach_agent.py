@@ -194,9 +194,12 @@ class JobManager:
             infos.update(self.jobs[name]['instances'][instance_id])
             return infos
 
-    def set_instance_started(self, name, instance_id, pid):
+    def set_instance_started(self, name, instance_id, pid, lateness=None):
         with self._mutex:
-            self.jobs[name]['instances'][instance_id].update(pid=pid, return_code=None)
+            instance = self.jobs[name]['instances'][instance_id]
+            instance.update(pid=pid, return_code=None)
+            if lateness is not None:
+                instance['lateness'] = lateness
 
     def set_instance_status(self, name, instance_id, pid, return_code):
         if return_code is None:
@@ -324,6 +327,29 @@ class StatusJobInstanceAgent(AgentAction):
             return 'Not Running'
 
 
+class StatusJobInstancesAgent(AgentAction):
+    def __init__(self, instances):
+        super().__init__(instances=instances)
+
+    def _action(self):
+        statuses = []
+        for instance in self.instances:
+            status = StatusJobInstanceAgent(instance['name'], instance['instance_id'])
+            try:
+                result = status.action()
+            except Exception as e:
+                syslog.syslog(syslog.LOG_ERR, getattr(e, 'reason', str(e)))
+                result = 'Error'
+            status = {'instance_id': instance['instance_id'], 'status': result}
+
+            # Let the controller know how late dated starts were
+            with suppress(KeyError, BadRequest), JobManager() as manager:
+                infos = manager.get_instance(instance['name'], instance['instance_id'])
+                status['lateness'] = infos['lateness']
+            statuses.append(status)
+        return statuses
+
+
 class StartJobInstanceAgent(AgentAction):
     def __init__(self, name, instance_id, scenario_id, owner_id, date, interval, arguments, reschedule=False):
         super().__init__(
@@ -485,6 +511,25 @@ class StopJobInstanceAgent(AgentAction):
                     date=date.timestamp() * 1000)
 
 
+class StopJobInstancesAgent(AgentAction):
+    def __init__(self, instances, date):
+        super().__init__(instances=instances, date=date)
+
+    def _action(self):
+        failures = []
+        for instance in self.instances:
+            stopper = StopJobInstanceAgent(
+                    instance['name'], instance['instance_id'], self.date)
+            try:
+                stopper.action()
+            except Exception as e:
+                failures.append({
+                    'instance_id': instance['instance_id'],
+                    'error': getattr(e, 'reason', str(e)),
+                })
+        return failures
+
+
 class StatusJobsAgent(AgentAction):
     def __init__(self):
         super().__init__()
@@ -580,11 +625,22 @@ def launch_job(
         'OWNER_SCENARIO_INSTANCE_ID': str(owner_scenario_instance_id),
     })
 
+    # Report how late a job instance sent ahead of its date started
+    lateness = None
+    with suppress(KeyError):
+        infos = JobManager().get_instance(job_name, instance_id)
+        if infos['interval'] is None and infos['date'] is not None:
+            lateness = (datetime.now() - infos['date']).total_seconds() * 1000
+            syslog.syslog(
+                    syslog.LOG_INFO,
+                    'Job instance {} of {} started {:.1f} ms after '
+                    'its requested date'.format(instance_id, job_name, lateness))
+
     # Launch the Job Instance
     job_config = JobManager().get_job(job_name)
     proc = popen(command, args, env=environ, shell=job_config['sudo'])
     pid = proc.pid
-    JobManager().set_instance_started(job_name, instance_id, pid)
+    JobManager().set_instance_started(job_name, instance_id, pid, lateness)
     return_code = proc.wait()
     JobManager().set_instance_status(job_name, instance_id, pid, return_code)
 
@@ -0,0 +1,157 @@
+#!/usr/bin/python3
+
+# OpenBACH is a generic testbed able to control/configure multiple
+# network/physical entities (under test) and collect data from them. It is
+# composed of an Auditorium (HMIs), a Controller, a Collector and multiple
+# Agents (one for each network entity that wants to be tested).
+#
+#
+# Copyright © 2016-2023 CNES
+#
+#
+# This file is part of the OpenBACH testbed.
+#
+#
+# OpenBACH is a free software : you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY, without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+
+
+"""Throughput benchmark of the statistics pipeline of a collector
+
+Send statistics to a collector the way rstats does and measure how fast
+they become available in InfluxDB. Run it once against a collector using
+Logstash and once against a collector using the ingest gateway to compare
+both pipelines.
+"""
+
+
+__author__ = 'Viveris Technologies'
+__credits__ = '''Contributors:
+ * Mathias ETTINGER <mathias.ettinger@toulouse.viveris.com>
+'''
+
+
+import json
+import time
+import random
+import socket
+import argparse
+import urllib.parse
+import urllib.request
+
+
+JOB_NAME = 'ingest_benchmark'
+
+
+def build_message(job_instance_id, index, fields):
+    statistics = {
+            'value_{}'.format(field): random.random() * 1000
+            for field in range(fields)
+    }
+    statistics['_metadata'] = {
+            'time': int(time.time() * 1000) + index,
+            'is_file': False,
+            'job_name': JOB_NAME,
+            'agent_name': 'benchmark',
+            'job_instance_id': job_instance_id,
+            'scenario_instance_id': 0,
+            'owner_scenario_instance_id': 0,
+            'flag': 1,
+    }
+    return json.dumps(statistics).encode()
+
+
+def send_statistics(address, mode, job_instance_id, count, fields, rate):
+    delay = 1 / rate if rate else 0
+    start = time.perf_counter()
+    if mode == 'udp':
+        udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    for index in range(count):
+        message = build_message(job_instance_id, index, fields)
+        if mode == 'udp':
+            udp.sendto(message, address)
+        else:
+            # rstats opens a new connection for each message
+            with socket.create_connection(address) as tcp:
+                tcp.sendall(message)
+        if delay:
+            time.sleep(max(0, start + (index + 1) * delay - time.perf_counter()))
+    return time.perf_counter() - start
+
+
+def stored_points(host, port, database, job_instance_id):
+    query = 'SELECT COUNT("value_0") FROM "{}" WHERE "@job_instance_id" = \'{}\''.format(JOB_NAME, job_instance_id)
+    url = 'http://{}:{}/query?{}'.format(host, port, urllib.parse.urlencode({'db': database, 'q': query}))
+    with urllib.request.urlopen(url) as response:
+        result = json.load(response)
+    try:
+        return result['results'][0]['series'][0]['values'][0][1]
+    except (KeyError, IndexError):
+        return 0
+
+
+def main(args):
+    job_instance_id = random.randint(1000000, 9999999)
+    address = (args.collector, args.port)
+
+    start = time.perf_counter()
+    send_time = send_statistics(address, args.mode, job_instance_id, args.count, args.fields, args.rate)
+    print('Sent {} statistics in {:.3f}s ({:.0f} msg/s)'.format(args.count, send_time, args.count / send_time))
+
+    stored, stable_since = 0, time.perf_counter()
+    stored_at = stable_since
+    while time.perf_counter() - stable_since < args.settle:
+        time.sleep(0.2)
+        points = stored_points(args.collector, args.influxdb_port, args.database, job_instance_id)
+        if points != stored:
+            stored, stable_since = points, time.perf_counter()
+            stored_at = stable_since
+        if stored >= args.count:
+            break
+
+    elapsed = stored_at - start
+    print('Stored {} points ({:.2%} lost) in {:.3f}s ({:.0f} points/s)'.format(
+        stored, 1 - stored / args.count, elapsed, stored / elapsed))
+    print('Benchmark data is tagged with "@job_instance_id" = {} in measurement "{}"'.format(
+        job_instance_id, JOB_NAME))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+            description=__doc__,
+            formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('collector', help='address of the collector')
+    parser.add_argument(
+            '-p', '--port', type=int, default=2222,
+            help='port of the statistics pipeline')
+    parser.add_argument(
+            '-m', '--mode', choices=['udp', 'tcp'], default='udp',
+            help='protocol used to send statistics')
+    parser.add_argument(
+            '--influxdb-port', type=int, default=8086,
+            help='port of the InfluxDB server')
+    parser.add_argument(
+            '-d', '--database', default='openbach',
+            help='name of the InfluxDB database')
+    parser.add_argument(
+            '-n', '--count', type=int, default=100000,
+            help='amount of statistics to send')
+    parser.add_argument(
+            '-f', '--fields', type=int, default=5,
+            help='amount of fields in each statistic')
+    parser.add_argument(
+            '-r', '--rate', type=float, default=0,
+            help='amount of statistics sent per second (0 for as fast as possible)')
+    parser.add_argument(
+            '-s', '--settle', type=float, default=10,
+            help='delay (in seconds) without new points before stopping')
+    main(parser.parse_args())
@@ -0,0 +1,426 @@
+#!/usr/bin/python3
+
+# OpenBACH is a generic testbed able to control/configure multiple
+# network/physical entities (under test) and collect data from them. It is
+# composed of an Auditorium (HMIs), a Controller, a Collector and multiple
+# Agents (one for each network entity that wants to be tested).
+#
+#
+# Copyright © 2016-2023 CNES
+#
+#
+# This file is part of the OpenBACH testbed.
+#
+#
+# OpenBACH is a free software : you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY, without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+
+
+"""Statistics ingest gateway
+
+Lightweight alternative to the statistics pipeline of the collector's
+Logstash. It receives the statistics sent by rstats over TCP or UDP,
+tags and routes them according to their flag the same way Logstash
+does, stores them into InfluxDB using batched line protocol requests
+and forwards the broadcasted ones to the auditorium.
+"""
+
+
+__author__ = 'Viveris Technologies'
+__credits__ = '''Contributors:
+ * Mathias ETTINGER <mathias.ettinger@toulouse.viveris.com>
+'''
+
+
+import time
+import socket
+import syslog
+import argparse
+import threading
+import traceback
+import http.client
+import socketserver
+import urllib.parse
+from datetime import datetime, timezone
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+
+# Amount of points sent to InfluxDB in a single request and
+# maximal delay (in seconds) before sending a partial batch
+BATCH_SIZE = 5000
+FLUSH_INTERVAL = 1.0
+# Amount of points kept in memory while InfluxDB is unreachable
+MAX_PENDING_POINTS = 500000
+# Flag & 0x01 => Storage
+# Flag & 0x10 => Broadcast
+STORAGE_FLAGS = {1, 3}
+BROADCAST_FLAGS = {2, 3}
+# Event fields built out of the metadata sent by rstats
+METADATA_FIELDS = {
+    '@owner_scenario_instance_id': 'owner_scenario_instance_id',
+    '@scenario_instance_id': 'scenario_instance_id',
+    '@job_instance_id': 'job_instance_id',
+    '@agent_name': 'agent_name',
+    '@job_name': 'job_name',
+    '@stored_file': 'is_file',
+}
+INFLUXDB_TAGS = (
+    '@owner_scenario_instance_id',
+    '@scenario_instance_id',
+    '@job_instance_id',
+    '@agent_name',
+    '@stored_file',
+    '@suffix',
+)
+INFLUXDB_PRECISIONS = {
+    'n': 1000000,
+    'u': 1000,
+    'ms': 1,
+    's': 1 / 1000,
+    'm': 1 / 60000,
+    'h': 1 / 3600000,
+}
+
+
+def _interpolate(metadata, name):
+    """Format a metadata value the way Logstash's sprintf does"""
+    try:
+        value = metadata[name]
+    except KeyError:
+        return '%{{[@metadata][{}]}}'.format(name)
+    if value is None:
+        return '%{{[@metadata][{}]}}'.format(name)
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+def parse_statistics(message):
+    """Build an event out of a message sent by rstats.
+
+    Return the flag of the event and the event itself, or None if
+    the message should be dropped.
+    """
+    try:
+        event = json.loads(message)
+    except ValueError:
+        return None
+
+    if not isinstance(event, dict):
+        return None
+    metadata = event.pop('_metadata', None)
+    if not isinstance(metadata, dict):
+        return None
+    flag = metadata.get('flag')
+    if not flag:
+        return None
+
+    for field, name in METADATA_FIELDS.items():
+        event[field] = _interpolate(metadata, name)
+    if metadata.get('suffix') is not None and metadata['suffix'] is not False:
+        event['@suffix'] = _interpolate(metadata, 'suffix')
+
+    try:
+        timestamp = int(metadata['time'])
+    except (KeyError, TypeError, ValueError):
+        timestamp = int(time.time() * 1000)
+    event['@timestamp'] = timestamp
+
+    return flag, event
+
+
+def _escape(value, specials=' ,='):
+    for special in specials:
+        value = value.replace(special, '\\' + special)
+    return value
+
+
+def _field_value(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        return '{}i'.format(value)
+    if isinstance(value, float):
+        return repr(value)
+    if not isinstance(value, str):
+        value = json.dumps(value)
+    return '"{}"'.format(value.replace('\\', '\\\\').replace('"', '\\"'))
+
+
+def line_protocol(event, precision='ms'):
+    """Convert an event into a line of InfluxDB line protocol,
+    or None if it does not contain any field.
+    """
+    measurement = _escape(event['@job_name'], ' ,')
+    tags = ''.join(
+            ',{}={}'.format(tag, _escape(event[tag]))
+            for tag in INFLUXDB_TAGS
+            if event.get(tag))
+    fields = ','.join(
+            '{}={}'.format(_escape(name), _field_value(value))
+            for name, value in event.items()
+            if name not in INFLUXDB_TAGS
+            and name not in ('@job_name', '@timestamp')
+            and value is not None)
+    if not fields:
+        return None
+
+    timestamp = int(event['@timestamp'] * INFLUXDB_PRECISIONS[precision])
+    return '{}{} {} {}'.format(measurement, tags, fields, timestamp)
+
+
+def broadcast_message(event):
+    """Serialize an event the way Logstash sends it to the auditorium"""
+    timestamp = datetime.fromtimestamp(event['@timestamp'] / 1000, tz=timezone.utc)
+    event = dict(event, **{'@timestamp': timestamp.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'})
+    return json.dumps(event)
+
+
+class InfluxDBWriter:
+    """Accumulate lines of line protocol and send them by batches"""
+
+    def __init__(self, host, port, database, precision, retention_policy=None,
+                 batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        parameters = {'db': database, 'precision': precision}
+        if retention_policy:
+            parameters['rp'] = retention_policy
+        self.url = '/write?' + urllib.parse.urlencode(parameters)
+        self.address = (host, port)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._connection = None
+        self._pending = []
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, line):
+        with self._condition:
+            self._pending.append(line)
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if len(self._pending) < self.batch_size:
+                    self._condition.wait(self.flush_interval)
+                batch, self._pending = self._pending, []
+
+            for start in range(0, len(batch), self.batch_size):
+                chunk = batch[start:start + self.batch_size]
+                if not self._send(chunk):
+                    self._requeue(batch[start:])
+                    time.sleep(self.flush_interval)
+                    break
+
+    def _send(self, lines):
+        body = '\n'.join(lines).encode()
+        for _ in range(2):
+            try:
+                if self._connection is None:
+                    self._connection = http.client.HTTPConnection(*self.address, timeout=30)
+                self._connection.request('POST', self.url, body)
+                response = self._connection.getresponse()
+                content = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                # Stale keep-alive connection, retry once with a new one
+                if self._connection is not None:
+                    self._connection.close()
+                    self._connection = None
+                error = e
+            else:
+                if response.status >= 500:
+                    error = content.decode(errors='replace')
+                    break
+                if response.status >= 400:
+                    # Malformed points will never be accepted, drop them
+                    syslog.syslog(
+                            syslog.LOG_WARNING,
+                            'InfluxDB rejected a batch of {} points: {}'
+                            .format(len(lines), content.decode(errors='replace')))
+                return True
+
+        syslog.syslog(syslog.LOG_ERR, 'Cannot write points into InfluxDB: {}'.format(error))
+        return False
+
+    def _requeue(self, lines):
+        with self._condition:
+            self._pending[:0] = lines
+            dropped = len(self._pending) - MAX_PENDING_POINTS
+            if dropped > 0:
+                del self._pending[:dropped]
+                syslog.syslog(
+                        syslog.LOG_WARNING,
+                        'Dropped {} points waiting for InfluxDB'.format(dropped))
+
+
+class Broadcaster:
+    """Forward events to the auditorium"""
+
+    def __init__(self, mode, host, port):
+        self.address = (host, port)
+        self.mode = mode
+        self._socket = None
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        data = message.encode()
+        with self._lock:
+            try:
+                if self.mode == 'tcp':
+                    if self._socket is None:
+                        self._socket = socket.create_connection(self.address, timeout=5)
+                    self._socket.sendall(data + b'\n')
+                else:
+                    if self._socket is None:
+                        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                    self._socket.sendto(data, self.address)
+            except OSError as e:
+                syslog.syslog(syslog.LOG_WARNING, 'Cannot broadcast statistics: {}'.format(e))
+                if self._socket is not None:
+                    self._socket.close()
+                    self._socket = None
+
+
+class Gateway:
+    """Route events according to their flag"""
+
+    def __init__(self, writer, broadcaster, precision):
+        self.writer = writer
+        self.broadcaster = broadcaster
+        self.precision = precision
+
+    def ingest(self, message):
+        parsed = parse_statistics(message)
+        if parsed is None:
+            return
+
+        flag, event = parsed
+        if flag in STORAGE_FLAGS:
+            line = line_protocol(event, self.precision)
+            if line is not None:
+                self.writer.write(line)
+        if flag in BROADCAST_FLAGS and self.broadcaster is not None:
+            self.broadcaster.send(broadcast_message(event))
+
+
+class UDPStatisticsHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        data, _ = self.request
+        try:
+            self.server.gateway.ingest(data.decode())
+        except Exception:
+            syslog.syslog(syslog.LOG_ERR, traceback.format_exc())
+
+
+class TCPStatisticsHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            for line in self.rfile:
+                line = line.strip()
+                if line:
+                    self.server.gateway.ingest(line.decode())
+        except Exception:
+            syslog.syslog(syslog.LOG_ERR, traceback.format_exc())
+
+
+class UDPStatisticsServer(socketserver.UDPServer):
+    allow_reuse_address = True
+    max_packet_size = 2**16
+
+    def __init__(self, address, gateway):
+        super().__init__(address, UDPStatisticsHandler)
+        self.gateway = gateway
+
+
+class TCPStatisticsServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, gateway):
+        super().__init__(address, TCPStatisticsHandler)
+        self.gateway = gateway
+
+
+def main(args):
+    writer = InfluxDBWriter(
+            args.influxdb_host, args.influxdb_port,
+            args.database, args.precision,
+            args.retention_policy, args.batch_size,
+            args.flush_interval)
+    broadcaster = None
+    if args.broadcast_host:
+        broadcaster = Broadcaster(args.broadcast_mode, args.broadcast_host, args.broadcast_port)
+    gateway = Gateway(writer, broadcaster, args.precision)
+
+    servers = [
+            UDPStatisticsServer(('', args.port), gateway),
+            TCPStatisticsServer(('', args.port), gateway),
+    ]
+    threads = [threading.Thread(target=server.serve_forever) for server in servers]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            thread.join()
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+            description=__doc__,
+            formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+            '-p', '--port', type=int, default=2222,
+            help='port to listen on for statistics, both in TCP and UDP')
+    parser.add_argument(
+            '--influxdb-host', default='localhost',
+            help='address of the InfluxDB server')
+    parser.add_argument(
+            '--influxdb-port', type=int, default=8086,
+            help='port of the InfluxDB server')
+    parser.add_argument(
+            '-d', '--database', default='openbach',
+            help='name of the InfluxDB database to write into')
+    parser.add_argument(
+            '--precision', choices=list(INFLUXDB_PRECISIONS), default='ms',
+            help='precision of the timestamps stored into InfluxDB')
+    parser.add_argument(
+            '--retention-policy',
+            help='retention policy to write into')
+    parser.add_argument(
+            '--broadcast-mode', choices=['udp', 'tcp'], default='udp',
+            help='protocol used to forward broadcasted statistics')
+    parser.add_argument(
+            '--broadcast-host',
+            help='address of the auditorium receiving broadcasted statistics')
+    parser.add_argument(
+            '--broadcast-port', type=int, default=2223,
+            help='port of the auditorium receiving broadcasted statistics')
+    parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='maximal amount of points sent in a single request to InfluxDB')
+    parser.add_argument(
+            '--flush-interval', type=float, default=FLUSH_INTERVAL,
+            help='maximal delay (in seconds) before sending points to InfluxDB')
+
+    syslog.openlog('openbach_ingest', syslog.LOG_PID, syslog.LOG_USER)
+    main(parser.parse_args())
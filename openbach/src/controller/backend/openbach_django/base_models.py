@@ -419,6 +419,8 @@ class ContentTyped(models.Model):
     def get_content_model(self):
         """Return content model, or an error if it is the base class"""
         if self.content_model:
+            if self._meta.model_name == self.content_model:
+                return self
             return getattr(self, self.content_model)
         raise NotImplementedError
 
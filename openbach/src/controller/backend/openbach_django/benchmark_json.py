@@ -0,0 +1,76 @@
+# OpenBACH is a generic testbed able to control/configure multiple
+# network/physical entities (under test) and collect data from them. It is
+# composed of an Auditorium (HMIs), a Controller, a Collector and multiple
+# Agents (one for each network entity that wants to be tested).
+#
+#
+# Copyright © 2016-2023 CNES
+#
+#
+# This file is part of the OpenBACH testbed.
+#
+#
+# OpenBACH is a free software : you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY, without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program. If not, see http://www.gnu.org/licenses/.
+
+"""Count the database queries needed to serialize a scenario instance.
+
+Not part of the regular test suite, run it explicitly with:
+
+    python3 manage.py test openbach_django.benchmark_json
+
+The amount of OpenBACH Functions in the scenario can be changed
+using the OPENBACH_BENCHMARK_FUNCTIONS environment variable.
+"""
+
+import os
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .models import ScenarioInstance
+from .tests import FinishedScenarioInstanceMixin
+
+
+FUNCTIONS = int(os.environ.get('OPENBACH_BENCHMARK_FUNCTIONS', 200))
+
+
+class ScenarioInstanceJsonBenchmark(FinishedScenarioInstanceMixin, TestCase):
+    def setUp(self):
+        self.scenario_instance, _ = self.create_finished_scenario_instance('Benchmark', FUNCTIONS)
+
+    def _count_queries(self, serialize):
+        instance = ScenarioInstance.objects.get(id=self.scenario_instance.id)
+        with CaptureQueriesContext(connection) as queries:
+            serialize(instance)
+        return len(queries)
+
+    def test_queries_count(self):
+        legacy = self._count_queries(lambda instance: [
+                openbach_function.json for openbach_function in
+                instance.openbach_functions_instances.order_by('launch_date')
+        ])
+        prefetched = self._count_queries(lambda instance: instance._build_json())
+        snapshotted = self._count_queries(lambda instance: instance.snapshot())
+        cached = self._count_queries(lambda instance: instance.json)
+
+        print()
+        print('Queries to serialize {} OpenBACH Functions:'.format(FUNCTIONS))
+        print('  one by one:       {}'.format(legacy))
+        print('  prefetched:       {}'.format(prefetched))
+        print('  snapshot stored:  {}'.format(snapshotted))
+        print('  snapshot served:  {}'.format(cached))
+
+        self.assertLess(prefetched, legacy)
+        self.assertEqual(cached, 0)
@@ -0,0 +1,134 @@
+# OpenBACH is a generic testbed able to control/configure multiple
+# network/physical entities (under test) and collect data from them. It is
+# composed of an Auditorium (HMIs), a Controller, a Collector and multiple
+# Agents (one for each network entity that wants to be tested).
+#
+#
+# Copyright © 2016-2023 CNES
+#
+#
+# This file is part of the OpenBACH testbed.
+#
+#
+# OpenBACH is a free software : you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY, without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program. If not, see http://www.gnu.org/licenses/.
+
+"""Measure the time and database queries needed to load a large scenario.
+
+Not part of the regular test suite, run it explicitly with:
+
+    python3 manage.py test openbach_django.benchmark_scenario_load
+
+The amount of OpenBACH Functions in the synthetic scenario can be
+changed using the OPENBACH_BENCHMARK_FUNCTIONS environment variable.
+"""
+
+import os
+import time
+
+from collections import Counter
+
+from django.db import connection
+from django.test import TestCase
+
+from .models import Project, Scenario, Job, RequiredJobArgument, OptionalJobArgument
+
+
+FUNCTIONS = int(os.environ.get('OPENBACH_BENCHMARK_FUNCTIONS', 5000))
+
+
+def synthetic_scenario(functions):
+    """Build a chain of job instances, each one started once
+    the previous one is launched and stopped after a while.
+    """
+    openbach_functions = []
+    for function_id in range(0, functions, 2):
+        start = {
+                'id': function_id,
+                'start_job_instance': {
+                    'entity_name': 'node',
+                    'ping': {
+                        'destination': '172.20.0.{}'.format(function_id % 256),
+                        'count': 10,
+                    },
+                    'offset': 0,
+                },
+                'on_fail': {'policy': 'ignore'},
+        }
+        if function_id:
+            start['wait'] = {'launched_ids': [function_id - 2], 'time': 1}
+        openbach_functions.append(start)
+        openbach_functions.append({
+                'id': function_id + 1,
+                'stop_job_instances': {'openbach_function_ids': [function_id]},
+                'wait': {'launched_ids': [function_id], 'time': '$duration'},
+        })
+
+    return {
+            'name': 'Synthetic',
+            'description': 'Generated scenario',
+            'arguments': {'duration': 'Duration of each job instance'},
+            'constants': {},
+            'openbach_functions': openbach_functions,
+    }
+
+
+class ScenarioLoadBenchmark(TestCase):
+    def setUp(self):
+        job = Job.objects.create(name='ping')
+        RequiredJobArgument.objects.create(
+                name='destination', type='str',
+                subcommand=job.subcommands.get(name=None),
+                count='1', rank=0)
+        OptionalJobArgument.objects.create(
+                name='count', type='int', flag='-c',
+                subcommand=job.subcommands.get(name=None),
+                count='1')
+
+        self.project = Project.objects.create(name='Benchmark', description='')
+        self.project.load_from_json({
+            'name': 'Benchmark',
+            'description': '',
+            'entity': [{
+                'name': 'node',
+                'description': '',
+                'agent': None,
+                'networks': [],
+            }],
+            'network': [],
+            'scenario': [],
+        })
+
+    def test_load_scenario(self):
+        scenario = Scenario.objects.create(name='Synthetic', project=self.project)
+        json_data = synthetic_scenario(FUNCTIONS)
+
+        queries = Counter()
+
+        def count_queries(execute, sql, params, many, context):
+            queries[sql.split(None, 1)[0]] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_queries):
+            start = time.perf_counter()
+            scenario.load_from_json(json_data)
+            elapsed = time.perf_counter() - start
+
+        print()
+        print('Loaded a scenario of {} OpenBACH Functions in {:.2f}s '
+              'using {} queries'.format(FUNCTIONS, elapsed, sum(queries.values())))
+        for kind, count in queries.most_common():
+            print('  {}: {}'.format(kind, count))
+
+        version = scenario.versions.last()
+        self.assertEqual(version.openbach_functions.count(), FUNCTIONS)
@@ -41,9 +41,13 @@ __credits__ = '''Contributors:
 '''
 
 
+import os
+import time
+import threading
 from contextlib import suppress
 
 import requests
+from requests.adapters import HTTPAdapter
 from django.db import models
 from django.core.exceptions import MultipleObjectsReturned
 
@@ -52,6 +56,82 @@ from .base_models import ContentTyped, OpenbachFunctionParameter
 from .project_models import Agent
 
 
+# Delay (in seconds) after which a query to a collector
+# evaluating a statistic condition is abandoned
+STATISTICS_QUERY_TIMEOUT = float(os.environ.get('OPENBACH_CONDITIONS_QUERY_TIMEOUT', 5))
+# Delay (in seconds) during which the latest value of a
+# statistic is reused when evaluating conditions
+STATISTICS_CACHE_TTL = float(os.environ.get('OPENBACH_CONDITIONS_CACHE_TTL', 1))
+# Amount of connections kept open to each collector
+STATISTICS_POOL_SIZE = 10
+
+
+class LatestStatistics:
+    """Short-lived cache of the latest values of the statistics
+    used when evaluating conditions.
+
+    Values are identified by the scenario instance, agent name and
+    job name that produced them, along with the statistic name.
+    They are either queried from the collectors, using a pool of
+    connections, or fed from the statistics they broadcast.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._values = {}
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=STATISTICS_POOL_SIZE)
+        self.session.mount('http://', adapter)
+
+    @staticmethod
+    def key(scenario_id, agent_name, job_name, field):
+        return str(scenario_id), agent_name, job_name, field
+
+    def get(self, key):
+        """Return the cached value for the given key.
+
+        Raise KeyError if it is absent or too old.
+        """
+        with self._lock:
+            value, expiration = self._values[key]
+            if expiration < time.monotonic():
+                del self._values[key]
+                raise KeyError(key)
+        return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._values[key] = (value, time.monotonic() + self.ttl)
+
+    def feed(self, statistics):
+        """Store the values of a message broadcasted by a collector"""
+        try:
+            scenario_id = statistics['@scenario_instance_id']
+            agent_name = statistics['@agent_name']
+            job_name = statistics['@job_name']
+        except KeyError:
+            # Not a statistics message
+            return
+
+        expiration = time.monotonic() + self.ttl
+        with self._lock:
+            for field, value in statistics.items():
+                if not field.startswith('@') and field not in ('time', 'timestamp'):
+                    key = self.key(scenario_id, agent_name, job_name, field)
+                    self._values[key] = (value, expiration)
+            self._purge()
+
+    def _purge(self):
+        now = time.monotonic()
+        expired = [key for key, (_, expiration) in self._values.items() if expiration < now]
+        for key in expired:
+            del self._values[key]
+
+
+LATEST_STATISTICS = LatestStatistics(STATISTICS_CACHE_TTL)
+
+
 class Operand(ContentTyped):
     """Operand used in comparison operations.
 
@@ -188,12 +268,21 @@ class OperandStatistic(Operand):
     agent_address = OpenbachFunctionParameter(type=str)
 
     def get_value(self, scenario_id, parameters):
-        job_name = self._get_field_value('job_name', self.job_name, parameters)
-        agent_ip = self.agent_address
-        agent_ip = self._get_field_value('agent_address', agent_ip, parameters)
-        agent = Agent.objects.get(address=agent_ip)
+        job_name = self._get_field_value('job_name', parameters)
+        agent_ip = self._get_field_value('agent_address', parameters)
+        agent = Agent.objects.select_related('collector').get(address=agent_ip)
+        field_name = self._get_field_value('field', parameters)
+
+        key = LATEST_STATISTICS.key(scenario_id, agent.name, job_name, field_name)
+        try:
+            return LATEST_STATISTICS.get(key)
+        except KeyError:
+            value = self._query_collector(agent, scenario_id, job_name, field_name)
+            LATEST_STATISTICS.set(key, value)
+            return value
+
+    def _query_collector(self, agent, scenario_id, job_name, field_name):
         collector = agent.collector
-        field_name = self._get_field_value('field', self.field, parameters)
         url = 'http://{0.address}:{0.stats_query_port}/query'.format(collector)
         parameters = {
                 'db': collector.stats_database_name,
@@ -204,11 +293,19 @@ class OperandStatistic(Operand):
                      .format(field_name, job_name, agent.name, scenario_id),
         }
 
-        result = requests.get(url, params=parameters).json()
+        try:
+            response = LATEST_STATISTICS.session.get(
+                    url, params=parameters,
+                    timeout=STATISTICS_QUERY_TIMEOUT)
+            result = response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise self.DoesNotExist(
+                    'Cannot retrieve Stats from the collector: {}'.format(e))
+
         try:
             columns = result['results'][0]['series'][0]['columns']
             values = result['results'][0]['series'][0]['values'][0]
-        except KeyError:
+        except (KeyError, IndexError):
             raise self.DoesNotExist(
                     'Required Stats doesn\'t exist in the Database')
 
@@ -432,11 +432,18 @@ class JobInstance(models.Model):
 
     @property
     def required_arguments(self):
-        return self.required_arguments_values.select_related('argument')
+        return self._arguments_values('required_arguments_values')
 
     @property
     def optional_arguments(self):
-        return self.optional_arguments_values.select_related('argument')
+        return self._arguments_values('optional_arguments_values')
+
+    def _arguments_values(self, related_name):
+        manager = getattr(self, related_name)
+        if related_name in getattr(self, '_prefetched_objects_cache', {}):
+            # Keep the values loaded using prefetch_related
+            return manager
+        return manager.select_related('argument')
 
     @property
     def json(self):
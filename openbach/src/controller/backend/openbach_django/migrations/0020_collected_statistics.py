@@ -0,0 +1,31 @@
+# Generated by Django 3.0 on 2026-10-19 10:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openbach_django', '0019_status_retry_openbach_function_instance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collector',
+            name='statistics_refreshed',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='CollectedStatistic',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_name', models.CharField(max_length=500)),
+                ('name', models.CharField(max_length=500)),
+                ('collector', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='collected_statistics', to='openbach_django.Collector')),
+            ],
+            options={
+                'unique_together': {('collector', 'job_name', 'name')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.0 on 2026-10-19 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openbach_django', '0020_collected_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scenarioinstance',
+            name='stop_duration',
+            field=models.DurationField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.0 on 2026-10-19 15:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openbach_django', '0021_scenario_instance_stop_duration'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scenarioinstance',
+            name='json_snapshot',
+            field=models.TextField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.0 on 2026-10-19 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openbach_django', '0022_scenario_instance_json_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scenarioinstance',
+            index=models.Index(fields=['scenario_version', 'start_date'], name='scenario_instance_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scenarioinstance',
+            index=models.Index(fields=['status'], name='scenario_instance_status_idx'),
+        ),
+    ]
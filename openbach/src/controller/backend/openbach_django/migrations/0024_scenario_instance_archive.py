@@ -0,0 +1,33 @@
+# Generated by Django 3.0 on 2026-10-19 17:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('openbach_django', '0023_scenario_instance_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScenarioInstanceArchive',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('P', 'Scheduling'), ('R', 'Running'), ('AU', 'Agents Unreachable'), ('KO', 'Finished Ko'), ('OK', 'Finished Ok'), ('S', 'Stopped')], max_length=2)),
+                ('start_date', models.DateTimeField(blank=True, null=True)),
+                ('stop_date', models.DateTimeField(blank=True, null=True)),
+                ('archive_date', models.DateTimeField(auto_now_add=True)),
+                ('data', models.BinaryField()),
+                ('scenario_version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_instances', to='openbach_django.scenarioversion')),
+                ('started_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_scenario_instances', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='scenarioinstancearchive',
+            index=models.Index(fields=['scenario_version', 'start_date'], name='archived_instance_start_idx'),
+        ),
+    ]
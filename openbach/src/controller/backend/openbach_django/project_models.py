@@ -70,6 +70,7 @@ class Collector(models.Model):
     logstash_broadcast_mode = models.CharField(
             max_length=3, default='udp', choices=(('udp', 'UDP'), ('tcp', 'TCP')))
     logstash_broadcast_port = models.IntegerField(default=2223)
+    statistics_refreshed = models.DateTimeField(null=True, blank=True)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -135,6 +136,22 @@ class Collector(models.Model):
         }
 
 
+class CollectedStatistic(models.Model):
+    """Name of a statistic stored by a Collector for a given Job"""
+
+    collector = models.ForeignKey(
+            Collector, models.CASCADE,
+            related_name='collected_statistics')
+    job_name = models.CharField(max_length=500)
+    name = models.CharField(max_length=500)
+
+    class Meta:
+        unique_together = ('collector', 'job_name', 'name')
+
+    def __str__(self):
+        return '{0.name} of {0.job_name} on {0.collector}'.format(self)
+
+
 class Agent(models.Model):
     """Data associated to an Agent"""
 
@@ -40,14 +40,20 @@ __credits__ = '''Contributors:
 '''
 
 
-from django.db import models, IntegrityError, DataError
+import json
+import zlib
+from itertools import chain
+
+from django.db import models, transaction, IntegrityError, DataError
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.utils.functional import cached_property
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.contrib.auth.models import User
 
 from .base_models import Argument, ArgumentValue, ValuesType, OpenbachFunctionParameter
-from .job_models import Job, JobArgument, SubcommandJobArgument
+from .job_models import Job, JobArgument, SubcommandJobArgument, JobInstance
 from .utils import subcommand_names
 from . import openbach_function_models  # So we can getattr from this module
 from .openbach_function_models import (  # Shortcuts
@@ -59,6 +65,15 @@ from .openbach_function_models import (  # Shortcuts
 )
 
 
+def check_openbach_function_parameters(instance):
+    """Validate the values of the OpenbachFunctionParameter fields of
+    a model instance, as saving it would, without hitting the database.
+    """
+    for field in instance._meta.fields:
+        if isinstance(field, OpenbachFunctionParameter):
+            field.get_prep_value(getattr(instance, field.attname))
+
+
 def check_required_job_arguments_all_present(subcommand, arguments, error_template):
     required_arguments = subcommand.arguments.filter(
             requiredjobargument__isnull=False).exclude(name__in=arguments)
@@ -202,6 +217,7 @@ class Scenario(models.Model):
                 'openbach_functions': functions,
         }
 
+    @transaction.atomic
     def load_from_json(self, json_data):
         def extract_value(*keys, expected_type, mandatory=True, default=None):
             data = json_data
@@ -235,13 +251,15 @@ class Scenario(models.Model):
             if not isinstance(description, str):
                 raise Scenario.MalformedError(
                         'arguments.{}'.format(name), description, str)
-            ScenarioArgument.objects.create(
+        ScenarioArgument.objects.bulk_create(
+                ScenarioArgument(
                     scenario_version=scenario,
                     name=name, description=description)
+                for name, description in arguments.items())
         constants = extract_value('constants', expected_type=dict, mandatory=False)
-        existing_names = scenario.arguments.filter(name__in=list(constants))
+        existing_names = [name for name in constants if name in arguments]
         if existing_names:
-            keys = ', '.join('constants.{}'.format(arg.name) for arg in existing_names)
+            keys = ', '.join('constants.{}'.format(name) for name in existing_names)
             raise Scenario.MalformedError(
                     keys, override_error='Some constants are '
                     'named the same than some arguments')
@@ -251,9 +269,25 @@ class Scenario(models.Model):
             if not isinstance(value, str):
                 raise Scenario.MalformedError(
                         'constants.{}'.format(name), value, str)
-            ScenarioConstant.objects.create(
+        ScenarioConstant.objects.bulk_create(
+                ScenarioConstant(
                     scenario_version=scenario,
                     name=name, value=value)
+                for name, value in constants.items())
+        scenario_arguments = dict.fromkeys(chain(arguments, constants), 0)
+
+        # Rows depending on the OpenBACH Functions, inserted all
+        # at once when every function has been created
+        created_functions = {}
+        failure_policies = []
+        start_job_instance_arguments = []
+        waiters = {
+                WaitForRunning: [],
+                WaitForEnded: [],
+                WaitForLaunched: [],
+                WaitForFinished: [],
+        }
+        jobs = {}
 
         # Extract OpenBACH Functions definitions
         openbach_functions = extract_value('openbach_functions', expected_type=list)
@@ -312,6 +346,7 @@ class Scenario(models.Model):
                     raise Scenario.MalformedError(
                             'openbach_functions.{}.{}.{}'.format(index, function_name, name),
                             value=value, expected_type=expected_type)
+            created_functions[openbach_function.function_id] = openbach_function
 
             if failure_policy:
                 try:
@@ -326,32 +361,38 @@ class Scenario(models.Model):
                     failure_delay = extract_value(
                             'openbach_functions', index, 'on_fail', 'delay',
                             expected_type=(int, float, str), mandatory=False, default=5.0)
+                    failure_policy = FailurePolicy(
+                            openbach_function=openbach_function,
+                            policy=actual_policy,
+                            retry_limit=failure_retry,
+                            wait_time=failure_delay)
                     try:
-                        FailurePolicy.objects.create(
-                                openbach_function=openbach_function,
-                                policy=actual_policy,
-                                retry_limit=failure_retry,
-                                wait_time=failure_delay)
+                        check_openbach_function_parameters(failure_policy)
                     except ValidationError as e:
                         raise Scenario.MalformedError(
                                 'openbach_functions.{}.on_fail'.format(index),
                                 override_error=str(e))
+                    failure_policies.append(failure_policy)
                 else:
-                    FailurePolicy.objects.create(openbach_function=openbach_function, policy=actual_policy)
+                    failure_policies.append(FailurePolicy(openbach_function=openbach_function, policy=actual_policy))
 
             # Register required and optional arguments for a start_job_instance
             if function_name == 'start_job_instance':
                 job_name = openbach_function.job_name
                 error_hierarchy = 'openbach_functions.{}.{}.{}'.format(index, function_name, job_name)
                 try:
-                    job = Job.objects.get(name=job_name)
-                except Job.DoesNotExist:
-                    raise Scenario.MalformedError(
-                            error_hierarchy,
-                            override_error='No such job in the controller database: {}'.format(job_name))
+                    job, subcommand = jobs[job_name]
+                except KeyError:
+                    try:
+                        job = Job.objects.get(name=job_name)
+                    except Job.DoesNotExist:
+                        raise Scenario.MalformedError(
+                                error_hierarchy,
+                                override_error='No such job in the controller database: {}'.format(job_name))
+                    subcommand = job.subcommands.get(name=None, group=None)
+                    jobs[job_name] = job, subcommand
 
                 arguments = function[function_name][job_name]
-                subcommand = job.subcommands.get(name=None, group=None)
                 check_required_job_arguments_all_present(
                         subcommand, arguments, error_hierarchy + '.{}')
                 job_arguments = extract_start_job_instance_arguments(
@@ -361,10 +402,10 @@ class Scenario(models.Model):
                         # Test if subcommand is not, in fact, an argument
                         occurrence, job_argument, value = subcommand
                     except TypeError:
-                        StartJobInstanceArgument.objects.create(
+                        start_job_instance_arguments.append(StartJobInstanceArgument(
                                 name='', type=None, value='',
                                 hierarchy=list(subcommand_names(subcommand)),
-                                start_job_instance=openbach_function)
+                                start_job_instance=openbach_function))
                     else:
                         try:
                             # TODO automate the following line into StartJobInstanceArgument somehow
@@ -375,10 +416,13 @@ class Scenario(models.Model):
                                     override_error=str(e),
                                     expected_type=job_argument.type,
                                     value=value)
-                        StartJobInstanceArgument.objects.create(
+                        start_job_instance_arguments.append(StartJobInstanceArgument(
                                 name=job_argument.name, type=job_argument.type, value=value,
                                 hierarchy=list(subcommand_names(job_argument.subcommand)),
-                                start_job_instance=openbach_function, occurrence=occurrence)
+                                start_job_instance=openbach_function, occurrence=occurrence))
+
+        FailurePolicy.objects.bulk_create(failure_policies)
+        StartJobInstanceArgument.objects.bulk_create(start_job_instance_arguments)
 
         # Extract Waits
         # Start again the looping to be sure all referenced
@@ -395,36 +439,26 @@ class Scenario(models.Model):
                                 '{}.{}'.format(index, ids_key, idx),
                                 value=launched_id, expected_type=int)
                     try:
-                        waited_function = scenario.openbach_functions.get(function_id=launched_id)
-                    except OpenbachFunction.DoesNotExist:
+                        waited_function = created_functions[launched_id]
+                    except KeyError:
                         raise Scenario.MalformedError(
                                 'openbach_functions.{}.wait.'
                                 'launched_ids.{}'.format(index, idx),
                                 value=launched_id, override_error='The '
                                 'referenced openbach function does not exist')
-                    else:
-                        waited_function = waited_function.get_content_model()
-                    openbach_function_instance = scenario.openbach_functions.get(
-                            function_id=function['id']).get_content_model()
-                    Factory.objects.create(
+                    waiters[Factory].append(Factory(
                             openbach_function_waited=waited_function,
-                            openbach_function_instance=openbach_function_instance)
+                            openbach_function_instance=created_functions[function['id']]))
             waiter_factory('running_ids', WaitForRunning)
             waiter_factory('ended_ids', WaitForEnded)
             waiter_factory('launched_ids', WaitForLaunched)
             waiter_factory('finished_ids', WaitForFinished)
 
-        # Check that all arguments are used
-        scenario_arguments = {
-                argument.name: 0
-                for argument in scenario.arguments.all()
-        }
-        scenario_arguments.update(
-                (constant.name, 0)
-                for constant in scenario.constants.all()
-        )
+        for Factory, waiting_conditions in waiters.items():
+            Factory.objects.bulk_create(waiting_conditions)
 
-        for openbach_function in scenario.openbach_functions.all():
+        # Check that all arguments are used
+        for openbach_function in created_functions.values():
             try:
                 openbach_function.set_arguments_count(scenario_arguments)
             except KeyError as e:
@@ -485,11 +519,21 @@ class ScenarioInstance(models.Model):
             null=True, blank=True,
             related_name='private_scenario_instances')
     stop_date = models.DateTimeField(null=True, blank=True)
+    stop_duration = models.DurationField(null=True, blank=True)
     openbach_function_instance = models.OneToOneField(
             OpenbachFunctionInstance,
             models.CASCADE,
             null=True, blank=True,
             related_name='started_scenario')
+    # Serialized JSON of the whole instance tree, stored
+    # once it is finished since it will not change anymore
+    json_snapshot = models.TextField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+                models.Index(fields=['scenario_version', 'start_date'], name='scenario_instance_start_idx'),
+                models.Index(fields=['status'], name='scenario_instance_status_idx'),
+        ]
 
     def get_status(self):
         return self.Status(self.status)
@@ -509,6 +553,7 @@ class ScenarioInstance(models.Model):
         if self.stop_date is None or stop_status is not None:
             self.status = self.Status.STOPPED if stop_status is None else stop_status
             self.stop_date = timezone.now()
+            self.json_snapshot = None
             self.save()
 
     @cached_property
@@ -533,6 +578,117 @@ class ScenarioInstance(models.Model):
 
     @property
     def json(self):
+        if self.json_snapshot is not None:
+            return json.loads(self.json_snapshot)
+        return self.snapshot()
+
+    def snapshot(self):
+        """Build the JSON representation of this instance and
+        store it if neither this instance nor any of its job
+        instances and sub-scenario instances can change anymore.
+        """
+        json_data = self._build_json()
+        if self.is_stopped and _is_settled(json_data):
+            self.json_snapshot = json.dumps(json_data, cls=DjangoJSONEncoder)
+            self.save(update_fields=['json_snapshot'])
+        return json_data
+
+    def clear_snapshot(self):
+        """Forget the stored JSON of this instance and of the
+        scenario instances that started it, as one of their
+        job instances or sub-scenario instances changed.
+        """
+        scenario_ids = []
+        scenario_instance = self
+        while scenario_instance is not None:
+            scenario_ids.append(scenario_instance.id)
+            ofi = scenario_instance.openbach_function_instance
+            scenario_instance = None if ofi is None else ofi.scenario_instance
+
+        self.json_snapshot = None
+        ScenarioInstance.objects.filter(
+                id__in=scenario_ids,
+                json_snapshot__isnull=False,
+        ).update(json_snapshot=None)
+
+    @transaction.atomic
+    def archive(self):
+        """Move this finished instance, its sub-scenario instances
+        and the JobInstances they started into a ScenarioInstanceArchive.
+
+        Return None if some parts of this instance can still change.
+        """
+        json_data = self.json
+        if self.json_snapshot is None:
+            return None
+
+        scenario_ids = level = [self.id]
+        while level:
+            level = list(ScenarioInstance.objects.filter(
+                openbach_function_instance__scenario_instance__in=level,
+            ).values_list('id', flat=True))
+            scenario_ids = scenario_ids + level
+
+        job_instances = list(
+                JobInstance.objects
+                .filter(openbach_function_instance__scenario_instance__in=scenario_ids)
+                .select_related('openbach_function_instance__scenario_instance'))
+        jobs = [
+                {
+                    'id': job_instance.id,
+                    'job_name': job_instance.job_name,
+                    'agent_name': job_instance.agent_name,
+                    'entity_name': job_instance.entity_name,
+                    'agent_id': job_instance.agent_id,
+                    'collector_id': job_instance.collector_id,
+                    'start_date': job_instance.start_date,
+                    'stop_date': job_instance.stop_date,
+                    'scenario_instance_id': job_instance.scenario_id,
+                    'scenario_start_date': job_instance.openbach_function_instance.scenario_instance.start_date,
+                    'scenario_stop_date': job_instance.openbach_function_instance.scenario_instance.stop_date,
+                }
+                for job_instance in job_instances
+        ]
+        content = json.dumps({'json': json_data, 'job_instances': jobs}, cls=DjangoJSONEncoder)
+
+        archive = ScenarioInstanceArchive.objects.create(
+                id=self.id,
+                scenario_version=self.scenario_version,
+                status=self.status,
+                start_date=self.start_date,
+                started_by=self.started_by,
+                stop_date=self.stop_date,
+                data=zlib.compress(content.encode()))
+        JobInstance.objects.filter(id__in=[job['id'] for job in jobs]).delete()
+        self.delete()
+        return archive
+
+    def _openbach_functions_instances(self):
+        """Retrieve the OpenBACH Functions instances of this
+        scenario instance along with the objects needed to
+        build their JSON representation.
+        """
+        concrete_functions = [
+                'openbach_function__' + model._meta.model_name
+                for model in OpenbachFunction.__subclasses__()
+        ]
+        return (
+                self.openbach_functions_instances
+                .select_related(
+                    'openbach_function__on_failure',
+                    'started_job__agent',
+                    'started_scenario',
+                    *concrete_functions)
+                .prefetch_related(
+                    'openbach_function__launched_waiters__openbach_function_waited',
+                    'openbach_function__finished_waiters__openbach_function_waited',
+                    'openbach_function__startjobinstance__arguments',
+                    'started_job__required_arguments_values__argument__subcommand',
+                    'started_job__optional_arguments_values__argument__subcommand')
+                .order_by('launch_date')
+        )
+
+    def _build_json(self):
         owner_id = self.id
         ofi = self.openbach_function_instance
         while ofi is not None:
@@ -547,7 +703,7 @@ class ScenarioInstance(models.Model):
 
         functions = [
                 openbach_function.json for openbach_function in
-                self.openbach_functions_instances.order_by('launch_date')
+                self._openbach_functions_instances()
         ]
 
         return {
@@ -559,6 +715,7 @@ class ScenarioInstance(models.Model):
                 'status': self.get_status().label,
                 'start_date': self.start_date,
                 'stop_date': self.stop_date,
+                'stop_duration': None if self.stop_duration is None else self.stop_duration.total_seconds(),
                 'arguments': parameters,
                 'openbach_functions': functions,
         }
@@ -574,6 +731,136 @@ class ScenarioInstance(models.Model):
         }
 
 
+class ScenarioInstanceArchive(models.Model):
+    """Finished ScenarioInstance moved out of the active tables
+    along with its sub-scenario instances and JobInstances. The
+    whole tree is stored as compressed JSON.
+    """
+
+    id = models.IntegerField(primary_key=True)
+    scenario_version = models.ForeignKey(
+            ScenarioVersion, models.CASCADE,
+            related_name='archived_instances')
+    status = models.CharField(
+            max_length=max(map(len, ScenarioInstance.Status.values)),
+            choices=ScenarioInstance.Status.choices)
+    start_date = models.DateTimeField(null=True, blank=True)
+    started_by = models.ForeignKey(
+            User, models.CASCADE,
+            null=True, blank=True,
+            related_name='archived_scenario_instances')
+    stop_date = models.DateTimeField(null=True, blank=True)
+    archive_date = models.DateTimeField(auto_now_add=True)
+    data = models.BinaryField(editable=False)
+
+    class Meta:
+        indexes = [
+                models.Index(fields=['scenario_version', 'start_date'], name='archived_instance_start_idx'),
+        ]
+
+    def get_status(self):
+        return ScenarioInstance.Status(self.status)
+
+    @property
+    def is_stopped(self):
+        return True
+
+    @property
+    def scenario(self):
+        return self.scenario_version.scenario
+
+    def __str__(self):
+        return 'Archived Scenario Instance {}'.format(self.id)
+
+    @cached_property
+    def content(self):
+        return json.loads(zlib.decompress(self.data).decode())
+
+    @property
+    def json(self):
+        return self.content['json']
+
+    @property
+    def limited_json(self):
+        json_data = self.json
+        return {
+                'scenario_name': json_data['scenario_name'],
+                'scenario_instance_id': self.id,
+                'status': self.get_status().label,
+                'start_date': self.start_date,
+                'sub_scenario_instance_ids': json_data['sub_scenario_instance_ids'],
+        }
+
+    @property
+    def job_instances(self):
+        return [ArchivedJobInstance(job) for job in self.content['job_instances']]
+
+
+class ArchivedJobInstance:
+    """Read-only view of a JobInstance stored in a
+    ScenarioInstanceArchive, holding what is needed
+    to retrieve its statistics.
+    """
+
+    def __init__(self, data):
+        self.id = data['id']
+        self.job_name = data['job_name']
+        self.agent_name = data['agent_name']
+        self.entity_name = data['entity_name']
+        self.scenario_id = data['scenario_instance_id']
+        self.start_date = parse_datetime(data['start_date'])
+        self.stop_date = _parse_optional_datetime(data['stop_date'])
+        self.scenario_start_date = _parse_optional_datetime(data['scenario_start_date'])
+        self.scenario_stop_date = _parse_optional_datetime(data['scenario_stop_date'])
+        self.started_by = None
+        self._agent_id = data['agent_id']
+        self._collector_id = data['collector_id']
+
+    @cached_property
+    def agent(self):
+        if self._agent_id is None:
+            return None
+        model = JobInstance._meta.get_field('agent').related_model
+        return model.objects.filter(id=self._agent_id).first()
+
+    @cached_property
+    def collector(self):
+        # The collector may have been removed since the archive was made
+        model = JobInstance._meta.get_field('collector').related_model
+        return model.objects.filter(id=self._collector_id).first()
+
+
+def _parse_optional_datetime(value):
+    return None if value is None else parse_datetime(value)
+
+
+def _is_settled(json_data):
+    """Check that no part of the JSON representation of a
+    scenario instance is still running or waiting to run.
+    """
+    pending_functions = {
+            OpenbachFunctionInstance.Status.SCHEDULED.label,
+            OpenbachFunctionInstance.Status.RUNNING.label,
+    }
+    pending_jobs = {
+            JobInstance.Status.SCHEDULED.label,
+            JobInstance.Status.RUNNING.label,
+            JobInstance.Status.AGENT_UNREACHABLE.label,
+            JobInstance.Status.UNKNOWN.label,
+    }
+
+    for function in json_data['openbach_functions']:
+        if function['status'] in pending_functions:
+            return False
+        job = function.get('job')
+        if job is not None and (job['status'] in pending_jobs or job['stop_date'] == 'Not programmed yet'):
+            return False
+        scenario = function.get('scenario')
+        if scenario is not None and (scenario['stop_date'] is None or not _is_settled(scenario)):
+            return False
+    return True
+
+
 class ScenarioArgument(Argument):
     """Data associated to an Argument for a Scenario"""
 
@@ -27,7 +27,7 @@ from django.dispatch import receiver
 from django.db.models.signals import pre_delete, post_init, post_save
 from django.contrib.auth.models import User
 
-from .models import StartJobInstanceArgument, Job
+from .models import StartJobInstanceArgument, Job, JobInstance, ScenarioInstance
 
 
 @receiver(pre_delete, sender=User)
@@ -44,3 +44,26 @@ def assign_private_project_to_superuser(sender, instance, **kwargs):
 @receiver(post_save, sender=Job)
 def ensure_default_subcommand_exist_on_jobs(sender, instance, **kwargs):
     instance.subcommands.get_or_create(group=None)
+
+
+@receiver(post_save, sender=JobInstance)
+def clear_snapshot_on_job_instance_change(sender, instance, **kwargs):
+    # Running job instances, whose status is polled and saved
+    # repeatedly, cannot belong to a tree whose JSON is stored
+    if instance.stop_date is None:
+        return
+
+    # Only instances that are stopped may have stored their JSON
+    owner = ScenarioInstance.objects.filter(
+            openbach_functions_instances__started_job=instance,
+            stop_date__isnull=False).first()
+    if owner is not None:
+        owner.clear_snapshot()
+
+
+@receiver(post_save, sender=ScenarioInstance)
+def clear_snapshot_on_scenario_instance_change(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) == {'json_snapshot'}:
+        return
+    if instance.is_stopped:
+        instance.clear_snapshot()
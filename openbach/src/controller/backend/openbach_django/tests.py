@@ -23,15 +23,25 @@
 # You should have received a copy of the GNU General Public License along with
 # this program. If not, see http://www.gnu.org/licenses/.
 
+import os
+import json
+import tempfile
+
 from django.test import TestCase
 from django.utils import timezone
+from django.core.serializers.json import DjangoJSONEncoder
 
 from .models import (
         Collector, Agent, Project, Job,
         InstalledJob, RequiredJobArgument,
         OptionalJobArgument, JobInstance,
+        ScenarioInstance, ScenarioInstanceArchive,
+        OpenbachFunctionInstance, OperandStatistic,
 )
+from .condition_models import LATEST_STATISTICS
 from .base_models import ValuesType, OpenbachFunctionParameter
+from .utils import write_export_progress
+from .views import _follow_export
 
 
 class ProjectCheckerMixin:
@@ -90,6 +100,75 @@ class ProjectCheckerMixin:
             self.assertCountEqual(expected_function, actual_function)
 
 
+class FinishedScenarioInstanceMixin:
+    def create_finished_scenario_instance(self, name, functions=1):
+        """Create a finished scenario instance whose OpenBACH
+        Functions each started a ping job instance.
+
+        Return the scenario instance and its job instances.
+        """
+        job = Job.objects.create(name='ping')
+        RequiredJobArgument.objects.create(
+                name='destination', type='str',
+                subcommand=job.subcommands.get(name=None),
+                count='1', rank=0)
+        collector = Collector.objects.create(address='172.20.34.45')
+        agent = Agent.objects.create(
+                address='172.20.34.45', name='agent',
+                reachable=True, collector=collector)
+
+        project = Project.objects.create(name=name, description='')
+        project.load_from_json({
+            'name': name,
+            'description': '',
+            'entity': [{
+                'name': 'node',
+                'description': '',
+                'agent': None,
+                'networks': [],
+            }],
+            'network': [],
+            'scenario': [{
+                'name': 'Pings',
+                'description': '',
+                'arguments': {},
+                'constants': {},
+                'openbach_functions': [{
+                    'id': function_id,
+                    'start_job_instance': {
+                        'entity_name': 'node',
+                        'ping': {'destination': '172.20.0.{}'.format(function_id % 256)},
+                        'offset': 0,
+                    },
+                } for function_id in range(functions)],
+            }],
+        })
+
+        now = timezone.now()
+        scenario = project.scenarios.get(name='Pings').versions.last()
+        scenario_instance = ScenarioInstance.objects.create(
+                scenario_version=scenario,
+                status=ScenarioInstance.Status.FINISHED_OK,
+                start_date=now, stop_date=now)
+        job_instances = []
+        for openbach_function in scenario.openbach_functions.all():
+            openbach_function_instance = OpenbachFunctionInstance.objects.create(
+                    openbach_function=openbach_function,
+                    scenario_instance=scenario_instance,
+                    status=OpenbachFunctionInstance.Status.FINISHED,
+                    launch_date=now)
+            job_instance = JobInstance.objects.create(
+                    job_name='ping', agent_name='agent', entity_name='node',
+                    agent=agent, collector=collector,
+                    status=JobInstance.Status.NOT_RUNNING,
+                    update_status=now, start_date=now, stop_date=now,
+                    periodic=False,
+                    openbach_function_instance=openbach_function_instance)
+            job_instance.configure({'destination': '172.20.0.1'})
+            job_instances.append(job_instance)
+        return scenario_instance, job_instances
+
+
 class OpenbachFunctionArgumentTestCase(TestCase):
     def _check_conversions(self, field, argument, value, serialized):
         self.assertEqual(field.to_python(argument), value)
@@ -267,6 +346,123 @@ class JobInstanceTestCase(TestCase):
         job_instance.save()
 
 
+class ScenarioInstanceSnapshotTestCase(FinishedScenarioInstanceMixin, TestCase):
+    def setUp(self):
+        self.scenario_instance, (self.job_instance,) = self.create_finished_scenario_instance('Snapshot')
+        self.scenario_instance.json
+
+    def test_snapshot_stored(self):
+        scenario_instance = ScenarioInstance.objects.get(id=self.scenario_instance.id)
+        self.assertIsNotNone(scenario_instance.json_snapshot)
+
+    def test_job_instance_change(self):
+        self.job_instance.configure({'destination': '172.20.0.2'})
+        self.job_instance.save()
+        scenario_instance = ScenarioInstance.objects.get(id=self.scenario_instance.id)
+        self.assertIsNone(scenario_instance.json_snapshot)
+        job_json, = [
+                function['job']
+                for function in scenario_instance.json['openbach_functions']
+                if 'job' in function
+        ]
+        self.assertIn('172.20.0.2', json.dumps(job_json, cls=DjangoJSONEncoder))
+
+    def test_running_job_instance_change(self):
+        self.job_instance.set_status(JobInstance.Status.RUNNING)
+        with self.assertNumQueries(1):
+            self.job_instance.set_status(JobInstance.Status.RUNNING)
+
+    def test_scenario_instance_change(self):
+        self.scenario_instance.stop_duration = timezone.timedelta(seconds=3)
+        self.scenario_instance.save(update_fields=['stop_duration'])
+        scenario_instance = ScenarioInstance.objects.get(id=self.scenario_instance.id)
+        self.assertIsNone(scenario_instance.json_snapshot)
+
+
+class OperandStatisticTestCase(TestCase):
+    def setUp(self):
+        collector = Collector.objects.create(address='172.20.34.45')
+        Agent.objects.create(
+                address='172.20.34.46', name='agent',
+                reachable=True, collector=collector)
+        self.operand = OperandStatistic.objects.create(
+                field='rtt', job_name='fping',
+                agent_address='172.20.34.46')
+
+    def test_broadcasted_value(self):
+        LATEST_STATISTICS.feed({
+            '@scenario_instance_id': '42',
+            '@agent_name': 'agent',
+            '@job_name': 'fping',
+            'time': 1500000000000,
+            'rtt': 12.5,
+        })
+        self.assertEqual(self.operand.get_value(42, {}), 12.5)
+
+
+class ScenarioInstanceArchiveTestCase(FinishedScenarioInstanceMixin, TestCase):
+    def setUp(self):
+        self.scenario_instance, (self.job_instance,) = self.create_finished_scenario_instance('Archive')
+
+    def test_archive(self):
+        instance_id = self.scenario_instance.id
+        json_data = json.loads(json.dumps(self.scenario_instance.json, cls=DjangoJSONEncoder))
+
+        archive = self.scenario_instance.archive()
+        self.assertEqual(archive.id, instance_id)
+        self.assertFalse(ScenarioInstance.objects.filter(id=instance_id).exists())
+        self.assertFalse(JobInstance.objects.filter(id=self.job_instance.id).exists())
+
+        archive = ScenarioInstanceArchive.objects.get(id=instance_id)
+        self.assertEqual(archive.json, json_data)
+        self.assertEqual(archive.get_status(), ScenarioInstance.Status.FINISHED_OK)
+        job_instance, = archive.job_instances
+        self.assertEqual(job_instance.id, self.job_instance.id)
+        self.assertEqual(job_instance.scenario_id, instance_id)
+        self.assertEqual(job_instance.collector.address, '172.20.34.45')
+        self.assertEqual(job_instance.agent.name, 'agent')
+
+    def test_archive_removed_collector(self):
+        archive = self.scenario_instance.archive()
+        Collector.objects.all().delete()
+        job_instance, = archive.job_instances
+        self.assertIsNone(job_instance.collector)
+        self.assertIsNone(job_instance.agent)
+
+    def test_archive_running(self):
+        self.job_instance.set_status(JobInstance.Status.RUNNING)
+        self.assertIsNone(self.scenario_instance.archive())
+        self.assertFalse(ScenarioInstanceArchive.objects.exists())
+
+
+class FollowExportTestCase(TestCase):
+    def setUp(self):
+        with tempfile.NamedTemporaryFile('wb', delete=False) as f:
+            f.write(b'time,value\n1000,1\n')
+        self.path = f.name
+
+    def tearDown(self):
+        for path in (self.path, self.path + '.progress'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_finished_export(self):
+        write_export_progress(self.path, finished=True, error=None)
+        content = b''.join(_follow_export(open(self.path, 'rb'), self.path))
+        self.assertEqual(content, b'time,value\n1000,1\n')
+        self.assertFalse(os.path.exists(self.path))
+        self.assertFalse(os.path.exists(self.path + '.progress'))
+
+    def test_failed_export(self):
+        write_export_progress(self.path, finished=True, error='collector unreachable')
+        stream = _follow_export(open(self.path, 'rb'), self.path)
+        self.assertEqual(next(stream), b'time,value\n1000,1\n')
+        with self.assertRaises(RuntimeError):
+            next(stream)
+        self.assertFalse(os.path.exists(self.path))
+        self.assertFalse(os.path.exists(self.path + '.progress'))
+
+
 class ProjectTestCase(ProjectCheckerMixin, TestCase):
     def setUp(self):
         self.project_json = {
@@ -65,9 +65,14 @@ urlpatterns = [
     url(r'^job_instance/(?P<id>\d+)/state/?$',
         views.StateView.as_view(state_type='job_instance'),
         name='state_job_instance'),
+    url(r'^conductor/state/?$',
+        views.StateView.as_view(state_type='threaded_actions'),
+        name='state_threaded_actions'),
 
     url(r'^collector/?$', views.CollectorsView.as_view(),
         name='collectors_view'),
+    url(r'^collector/balance/?$', views.CollectorsBalanceView.as_view(),
+        name='collectors_balance_view'),
     url(r'^collector/(?P<address>[^/]+)/?$', views.CollectorView.as_view(),
         name='collector_view'),
 
@@ -87,10 +92,15 @@ urlpatterns = [
 
     url(r'^reboot/?$', views.Reboot.as_view(), name='reboot'),
 
+    url(r'^scenario_instance_archive/?$',
+        views.ScenarioInstancesArchiveView.as_view(), name='scenario_instances_archive_view'),
     url(r'^scenario_instance/(?P<id>[^/]+)/?$',
         views.ScenarioInstanceView.as_view(), name='scenario_instance_view'),
+    url(r'^scenario_instance/(?P<id>[^/]+)/events/?$',
+        views.ScenarioInstanceEventsView.as_view(), name='scenario_instance_events_view'),
     url(r'^scenario_instance/(?P<id>[^/]+)/csv/?$', views.download_csv, name='download_csv'),
     url(r'^scenario_instance/(?P<id>[^/]+)/archive/?$', views.download_archive, name='download_archive'),
+    url(r'^scenario_instance/(?P<id>[^/]+)/(?P<format>parquet|arrow)/?$', views.download_columnar, name='download_columnar'),
 
     url(r'^project/?$', views.ProjectsView.as_view(),
         name='projects_view'),
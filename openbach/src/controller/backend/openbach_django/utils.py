@@ -86,6 +86,35 @@ def send_fifo(message, local_port=1113):
     return msg
 
 
+def write_export_progress(path, **progress):
+    """Atomically store, alongside the file at `path`,
+    the progress of its ongoing export.
+
+    Nothing is stored once the exported file has been removed,
+    as happens when its download is aborted.
+    """
+    if not os.path.exists(path):
+        return
+
+    progress_path = path + '.progress'
+    temporary_path = progress_path + '.tmp'
+    with open(temporary_path, 'w') as f:
+        json.dump(progress, f)
+    os.replace(temporary_path, progress_path)
+
+
+def read_export_progress(path):
+    """Retrieve the progress of the export of the file at `path`.
+
+    Files exported without progress tracking are considered finished.
+    """
+    try:
+        with open(path + '.progress') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'finished': True}
+
+
 def nullable_json(model):
     """Return the json attribute of a model, or None if no model"""
     if model is None:
@@ -35,6 +35,7 @@ __credits__ = '''Contributors:
 '''
 
 import os
+import time
 import base64
 import tempfile
 import traceback
@@ -50,12 +51,12 @@ from django.views.generic import base
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, login, logout
-from django.http import JsonResponse, FileResponse, HttpResponse, Http404
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse, Http404
 from django.db.utils import IntegrityError
 
 import yaml
 
-from .utils import send_fifo, extract_integer, user_to_json, build_storage_path
+from .utils import send_fifo, extract_integer, user_to_json, build_storage_path, read_export_progress
 
 class GenericView(base.View):
     """Base class for our own class-based views"""
@@ -199,6 +200,10 @@ class StateView(GenericView):
                 command='state_job_instance',
                 instance_id=int(id))
 
+    def _state_threaded_actions(self, request):
+        """Return the queue depth and the running long-lasting actions"""
+        return self.conductor_execute(command='state_threaded_actions')
+
 
 class CollectorsView(GenericView):
     """Manage actions for agents without an ID"""
@@ -233,6 +238,28 @@ class CollectorsView(GenericView):
                 skip_playbook=request.JSON.get('skip_playbook', False))
 
 
+class CollectorsBalanceView(GenericView):
+    """Manage the distribution of agents amongst collectors"""
+
+    def get(self, request):
+        """compute the load of each collector and suggest reassignments"""
+        return self.conductor_execute(
+                command='balance_collectors', apply=False,
+                **self._tolerance(request.GET))
+
+    def post(self, request):
+        """reassign agents to collectors to balance their load"""
+        return self.conductor_execute(
+                command='balance_collectors', apply=True,
+                **self._tolerance(request.JSON))
+
+    @staticmethod
+    def _tolerance(container):
+        with suppress(KeyError, TypeError, ValueError):
+            return {'tolerance': float(container['tolerance'])}
+        return {}
+
+
 class CollectorView(GenericView):
     """Manage actions on specific agents"""
 
@@ -760,13 +787,26 @@ class ScenarioInstancesView(GenericView):
         except ValueError:
             limit = None
 
+        try:
+            cursor = extract_integer(request.GET, 'cursor')
+            started_after = extract_integer(request.GET, 'started_after')
+            started_before = extract_integer(request.GET, 'started_before')
+        except ValueError as e:
+            return {'msg': 'GET data malformed: \'{}\' is not an integer'.format(e)}, 400
+
         return self.conductor_execute(
                 command='list_scenario_instances',
                 project=project_name,
                 name=scenario_name,
                 page_offset=offset,
                 max_per_page=limit,
-                quiet='quiet' in request.GET)
+                cursor=cursor,
+                statuses=request.GET.getlist('status'),
+                started_after=started_after,
+                started_before=started_before,
+                quiet='quiet' in request.GET,
+                full='full' in request.GET,
+                archived='archived' in request.GET)
 
     def post(self, request, project_name, scenario_name=None):
         """start a new scenario instance"""
@@ -804,6 +844,37 @@ class ScenarioInstanceView(GenericView):
                 instance_id=int(id))
 
 
+class ScenarioInstancesArchiveView(GenericView):
+    """Manage the archival of old scenario instances"""
+
+    def post(self, request):
+        """archive scenario instances finished for a given amount of days"""
+        try:
+            older_than = extract_integer(request.JSON, 'older_than')
+        except ValueError as e:
+            return {'msg': 'POST data malformed: \'{}\' is not an integer'.format(e)}, 400
+
+        return self.conductor_execute(
+                command='archive_scenario_instances',
+                older_than=older_than)
+
+
+class ScenarioInstanceEventsView(GenericView):
+    """Follow the status transitions of a scenario instance"""
+
+    def get(self, request, id):
+        """wait for new status transitions in a scenario instance"""
+        try:
+            since = extract_integer(request.GET, 'since', default=0)
+            timeout = extract_integer(request.GET, 'timeout')
+        except ValueError as e:
+            return {'msg': 'GET data malformed: \'{}\' is not an integer'.format(e)}, 400
+
+        return self.conductor_execute(
+                command='watch_scenario_instance',
+                instance_id=int(id), since=since, timeout=timeout)
+
+
 class ProjectsView(GenericView):
     """Manage actions on projects without an ID"""
 
@@ -899,6 +970,7 @@ class LogsView(GenericView):
         try:
             level = extract_integer(request.GET, 'level', default=5)
             delay = extract_integer(request.GET, 'delay')
+            limit = extract_integer(request.GET, 'limit')
         except ValueError as e:
             return {'msg': 'GET data malformed: {} '
                     'should be an integer'.format(e)}, 400
@@ -906,7 +978,7 @@ class LogsView(GenericView):
         credentials = request.session.get('elasticsearch')
         return self.conductor_execute(
                 command='orphaned_logs',
-                level=level, delay=delay,
+                level=level, delay=delay, limit=limit,
                 credentials=credentials)
 
 
@@ -916,7 +988,8 @@ class StatisticsView(GenericView):
     def get(self, request, project):
         return self.conductor_execute(
                 command='statistics_names',
-                project=project)
+                project=project,
+                refresh='refresh' in request.GET)
 
 
 class StatisticView(GenericView):
@@ -954,12 +1027,18 @@ class StatisticView(GenericView):
                             suffix=suffix,
                             origin=origin)
                 else:
+                    try:
+                        points = extract_integer(request.GET, 'points')
+                    except ValueError as e:
+                        return {'msg': 'GET data malformed: \'{}\' is not an integer'.format(e)}, 400
                     return self.conductor_execute(
                             command='statistics_values',
                             instance_id=instance_id,
                             name=statistic_name,
                             suffix=suffix,
-                            origin=origin)
+                            origin=origin,
+                            points=points,
+                            aggregation=request.GET.get('aggregation'))
             else:
                 return self.conductor_execute(
                         command='statistics_histogram',
@@ -1229,35 +1308,71 @@ def mock_generic_view(request, command, **kwargs):
     return view.conductor_execute(command=command, **kwargs)
 
 
-def download_csv(request, id):
-    path, _ = mock_generic_view(request, 'export_scenario_instance', instance_id=int(id))
+def _follow_export(export_file, path, chunk_size=64 * 1024):
+    """Generate the content of an exported file while it is being written.
+
+    Abort the stream if the export failed so the client does not
+    mistake a truncated file for a complete one. The exported file
+    is removed once it has been served.
+    """
+    finished = False
     try:
-        response = FileResponse(
-                open(path, 'rb'),
-                as_attachment=True,
-                filename='scenario{}.csv'.format(id))
-    except TypeError:
+        with export_file:
+            while True:
+                chunk = export_file.read(chunk_size)
+                if chunk:
+                    yield chunk
+                elif finished:
+                    return
+                else:
+                    # Read once more after completion to catch the last bytes
+                    progress = read_export_progress(path)
+                    if progress.get('error'):
+                        raise RuntimeError('Export failed: {}'.format(progress['error']))
+                    finished = progress['finished']
+                    if not finished:
+                        time.sleep(0.5)
+    finally:
+        for exported in (path, path + '.progress'):
+            with suppress(OSError):
+                os.remove(exported)
+
+
+def _stream_export(path, filename, content_type):
+    if not isinstance(path, str):
         raise Http404
+
+    try:
+        export_file = open(path, 'rb')
     except OSError:
-        os.remove(path)
+        with suppress(OSError):
+            os.remove(path)
         raise
-    else:
-        return response
+
+    response = StreamingHttpResponse(
+            _follow_export(export_file, path),
+            content_type=content_type)
+    response['Content-Disposition'] = 'attachment; filename="{}"'.format(filename)
+    return response
+
+
+def download_csv(request, id):
+    path, _ = mock_generic_view(
+            request, 'export_scenario_instance',
+            instance_id=int(id), background=True)
+    return _stream_export(path, 'scenario{}.csv'.format(id), 'text/csv')
 
 
 def download_archive(request, id):
     path, _ = mock_generic_view(
             request, 'export_scenario_instance',
-            instance_id=int(id), **request.GET)
-    try:
-        response = FileResponse(
-                open(path, 'rb'),
-                as_attachment=True,
-                filename='scenario{}.tar.gz'.format(id))
-    except TypeError:
-        raise Http404
-    except OSError:
-        os.remove(path)
-        raise
-    else:
-        return response
+            instance_id=int(id), background=True, **request.GET)
+    return _stream_export(path, 'scenario{}.tar.gz'.format(id), 'application/gzip')
+
+
+def download_columnar(request, id, format):
+    path, _ = mock_generic_view(
+            request, 'export_scenario_instance',
+            instance_id=int(id), background=True,
+            format=format, **request.GET)
+    return _stream_export(path, 'scenario{}_{}.tar'.format(id, format), 'application/x-tar')
@@ -104,6 +104,16 @@ class UnreachableError(UnprocessableError):
     pass
 
 
+class TooManyRequestsError(ConductorError):
+    """Error dedicated to requests refused because too many similar ones are pending"""
+    ERROR_CODE = 429
+
+
+class UnavailableError(ConductorError):
+    """Error dedicated to requests refused because the controller is overloaded"""
+    ERROR_CODE = 503
+
+
 class ConductorWarning(ConductorError):
     """Exception dedicated to control flow allowing to
     set custom message in commands results.
@@ -38,7 +38,7 @@ import json
 import struct
 import socket
 
-from . import errors
+from . import errors, profiling
 
 
 DEFAULT_UNIX_DOMAIN = '/opt/openbach/controller/socket'
@@ -132,7 +132,8 @@ class OpenBachBaton(_BaseSocketCommunicator):
 
     def communicate(self, json_message):
         message = json.dumps(json_message)
-        response = super().communicate(message).decode()
+        with profiling.measure('agent'):
+            response = super().communicate(message).decode()
 
         try:
             message = json.loads(response)
@@ -181,6 +182,19 @@ class OpenBachBaton(_BaseSocketCommunicator):
         }
         return self.communicate(message)
 
+    def stop_job_instances(self, instances, date='now'):
+        message = {
+                'command_name': 'stop_job_instances_agent',
+                'command_arguments': {
+                    'instances': [
+                        {'name': job_name, 'instance_id': job_id}
+                        for job_name, job_id in instances
+                    ],
+                    'date': date,
+                },
+        }
+        return self.communicate(message)
+
     def restart_job_instance(self, job_name, job_id, scenario_id, owner_id, arguments, date=None, interval=None):
         message = {
                 'command_name': 'restart_job_instance_agent',
@@ -206,6 +220,18 @@ class OpenBachBaton(_BaseSocketCommunicator):
         }
         return self.communicate(message)
 
+    def status_job_instances(self, instances):
+        message = {
+                'command_name': 'status_job_instances_agent',
+                'command_arguments': {
+                    'instances': [
+                        {'name': job_name, 'instance_id': job_id}
+                        for job_name, job_id in instances
+                    ],
+                },
+        }
+        return self.communicate(message)
+
     def list_jobs(self):
         message = {
                 'command_name': 'status_jobs_agent',
@@ -304,3 +330,11 @@ class OpenBachClapperBoard(_BaseSocketCommunicator):
 
     def resume_scenario_instance(self, scenario_instance_id):
         return self.communicate(action='resume', scenario=scenario_instance_id)
+
+    def watch_scenario_instance(self, scenario_instance_id, since=0, timeout=0):
+        # The director holds the answer until something happens
+        # to the scenario instance or until `timeout` is elapsed
+        self.socket.settimeout(timeout + 2)
+        return self.communicate(
+                action='watch', scenario=scenario_instance_id,
+                arguments={'since': since, 'timeout': timeout})
@@ -45,9 +45,11 @@ __credits__ = '''Contributors:
 '''
 
 
+import io
 import os
 import re
 import csv
+import glob
 import shutil
 import syslog
 import tarfile
@@ -59,14 +61,14 @@ import traceback
 import configparser
 from time import sleep
 from pathlib import Path
-from functools import wraps
-from datetime import datetime
+from functools import wraps, partial
+from datetime import datetime, timedelta
 from contextlib import suppress
 from ipaddress import IPv4Network
-from collections import defaultdict, Counter
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed
+from collections import defaultdict, deque, Counter
 
 import yaml
-import numpy
 from fuzzywuzzy import fuzz
 from pkg_resources import parse_version as version
 from django import db
@@ -76,10 +78,17 @@ from django.contrib.auth.models import User, AnonymousUser
 
 from data_access import Timeout
 from data_access.elasticsearch_tools import ElasticSearchConnection
-from data_access.influxdb_tools import InfluxDBConnection, ConditionTag, Operator, parse_influx
-from data_access.post_processing import Statistics
+from data_access.influxdb_tools import (
+        InfluxDBConnection, ConditionTag, ConditionTimestamp,
+        Operator, parse_influx, ROLLUP_TIERS,
+)
+from data_access.post_processing import Statistics, largest_triangle_three_buckets
+try:
+    from data_access import arrow_tools
+except ImportError:
+    arrow_tools = None
 from openbach_django.models import (
-        CommandResult, CollectorCommandResult, Collector,
+        CommandResult, CollectorCommandResult, Collector, CollectedStatistic,
         AgentCommandResult, Agent, Job, Keyword,
         ArgumentChoice, SubcommandGroupArgument,
         Statistic, OsCommand, Entity, Network, Interface,
@@ -87,19 +96,51 @@ from openbach_django.models import (
         OptionalJobArgument, InstalledJob,
         InstalledJobCommandResult, JobInstance,
         JobInstanceCommandResult, StatisticInstance,
-        ScenarioInstance, OpenbachFunctionInstance,
+        ScenarioInstance, ScenarioInstanceArchive, OpenbachFunctionInstance,
         Scenario, Project, FileCommandResult,
         ScenarioArgument, ScenarioArgumentValue,
         StartJobInstance as OpenbachFunctionStartJobInstance,
         StartScenarioInstance as OpenbachFunctionStartScenarioInstance,
 )
-from openbach_django.utils import user_to_json
-from . import errors, external_jobs
+from openbach_django.utils import user_to_json, write_export_progress
+from . import errors, external_jobs, profiling
 from .playbook_builder import start_playbook
 from .openbach_communicator import OpenBachBaton, OpenBachClapperBoard
 
 
 TOPOLOGY_WORKERS = 10
+# Amount of collectors queried concurrently
+COLLECTORS_WORKERS = 10
+# Time window (in seconds) over which the ingest rate of collectors
+# is measured and maximal relative spread of their load before
+# agents are moved from one collector to another
+COLLECTORS_LOAD_WINDOW = 600
+COLLECTORS_BALANCE_TOLERANCE = 0.2
+# Amount of job instances exported concurrently and of exports
+# allowed to run in the background
+EXPORT_WORKERS = 8
+# Amount of agents or scenarios stopped concurrently by KillAll and
+# the delay (in seconds) after which it gives up on each of its phases
+# (stopping scenario instances, then remaining job instances)
+KILL_ALL_WORKERS = 32
+KILL_ALL_TIMEOUT = 60
+# Amount of threads dedicated to run ThreadedActions
+THREADED_ACTIONS_WORKERS = int(os.environ.get('OPENBACH_THREADED_ACTIONS_WORKERS', 32))
+# Amount of ThreadedActions allowed to wait for a free thread
+# before new requests are rejected
+THREADED_ACTIONS_BACKLOG = int(os.environ.get('OPENBACH_THREADED_ACTIONS_BACKLOG', 500))
+# Aggregation functions that InfluxDB can apply when
+# downsampling statistics values; 'lttb' is computed here
+STATISTICS_AGGREGATIONS = ('mean', 'median', 'min', 'max', 'first', 'last', 'sum', 'count')
+# Delay (in seconds) during which the statistics names
+# of a collector are served from the database
+STATISTICS_NAMES_TTL = int(os.environ.get('OPENBACH_STATISTICS_NAMES_TTL', 300))
+# Longest delay (in seconds) a client can wait for status
+# transitions of a scenario instance in a single request
+SCENARIO_WATCH_MAX_TIMEOUT = int(os.environ.get('OPENBACH_SCENARIO_WATCH_MAX_TIMEOUT', 30))
+# Age (in days) after which finished scenario instances are moved
+# to the archive tables by the director, 0 to keep them forever
+SCENARIO_ARCHIVE_AGE = int(os.environ.get('OPENBACH_SCENARIO_ARCHIVE_AGE', 0))
 _SEVERITY_MAPPING = {
     1: 3,   # Error
     2: 4,   # Warning
@@ -108,6 +149,60 @@ _SEVERITY_MAPPING = {
 }
 
 
+def bounded_ordered_map(executor, function, iterable, window):
+    """Equivalent to `executor.map` that never submit more than `window`
+    tasks ahead of the consumer so results do not pile up in memory.
+    """
+    pending = deque()
+    for item in iterable:
+        pending.append(executor.submit(function, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class ConcatenatedFiles(io.RawIOBase):
+    """Read-only file object going through the content of several
+    files in turn, removing each of them once it is entirely read.
+    """
+
+    def __init__(self, paths):
+        self._paths = iter(paths)
+        self._current = None
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        """Fill the buffer as much as possible, even
+        when spanning over several files.
+        """
+        view = memoryview(buffer)
+        filled = 0
+        while filled < len(view):
+            if self._current is None:
+                try:
+                    path = next(self._paths)
+                except StopIteration:
+                    break
+                self._current = open(path, 'rb')
+            read = self._current.readinto(view[filled:])
+            if read:
+                filled += read
+            else:
+                self._current.close()
+                os.remove(self._current.name)
+                self._current = None
+        return filled
+
+    def close(self):
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+        super().close()
+
+
 def convert_severity(severity):
     """Convert the syslog severity to the equivalent openbach severity"""
     return _SEVERITY_MAPPING.get(severity)
@@ -215,7 +310,8 @@ class ConductorAction:
 
     def action(self):
         """Public entry point to execute the required action"""
-        return self._action()
+        with profiling.ActionProfile(self.__class__.__name__):
+            return self._action()
 
     def _action(self):
         """Override this in subclasses to implement the desired action"""
@@ -256,6 +352,122 @@ class ConductorAction:
                 self.connected_user)
 
 
+class ThreadedActionsPool:
+    """Bounded pool of threads running ThreadedActions.
+
+    Actions are run in submission order, skipping over those
+    whose kind already reached its own concurrency limit, and
+    requests are refused once too many actions are waiting.
+    """
+
+    def __init__(self, workers, backlog):
+        self.workers = workers
+        self.backlog = backlog
+        self._condition = threading.Condition()
+        self._pending = []
+        self._running = {}
+        self._threads = 0
+        self._idle = 0
+
+    def submit(self, action, real_action, create_command_result):
+        """Queue the given action to be run on a worker thread.
+
+        Raise UnavailableError if the pool is saturated or
+        TooManyRequestsError if too many actions of the same
+        kind are already waiting. The CommandResult tracking the
+        action is only created, using `create_command_result`,
+        once the action is admitted so a refused request does
+        not alter the state of an already running one.
+        """
+        with self._condition:
+            self._check_admission(action)
+
+        command_result = create_command_result()
+        with self._condition:
+            self._pending.append((action, real_action, command_result, timezone.now()))
+            if len(self._pending) > self._idle and self._threads < self.workers:
+                self._threads += 1
+                threading.Thread(target=self._worker, daemon=True).start()
+            self._condition.notify()
+
+    def _check_admission(self, action):
+        action_name = action.__class__.__name__
+        if len(self._pending) >= self.backlog:
+            raise errors.UnavailableError(
+                    'The conductor is saturated, try again later',
+                    pending=len(self._pending),
+                    running=len(self._running))
+
+        max_pending = action.MAX_PENDING
+        if max_pending is not None:
+            same_kind = sum(
+                    1 for pending, *_ in self._pending
+                    if pending.__class__.__name__ == action_name)
+            if same_kind >= max_pending:
+                raise errors.TooManyRequestsError(
+                        'Too many {} actions are waiting to be '
+                        'launched, try again later'.format(action_name),
+                        pending=same_kind)
+
+    @property
+    def json(self):
+        with self._condition:
+            pending = [
+                    {'action': action.__class__.__name__, 'submitted': submitted}
+                    for action, _, _, submitted in self._pending
+            ]
+            running = [
+                    {'action': name, 'submitted': submitted, 'started': started}
+                    for name, submitted, started in self._running.values()
+            ]
+            threads = self._threads
+
+        return {
+                'workers': self.workers,
+                'threads': threads,
+                'backlog': self.backlog,
+                'queue_depth': len(pending),
+                'pending': pending,
+                'running': running,
+        }
+
+    def _next_action(self):
+        running = Counter(name for name, *_ in self._running.values())
+        for index, (action, *_) in enumerate(self._pending):
+            limit = action.MAX_RUNNING or self.workers
+            if running[action.__class__.__name__] < limit:
+                return self._pending.pop(index)
+
+    def _worker(self):
+        identifier = threading.get_ident()
+        while True:
+            with self._condition:
+                self._idle += 1
+                next_action = self._next_action()
+                while next_action is None:
+                    self._condition.wait()
+                    next_action = self._next_action()
+                self._idle -= 1
+                action, real_action, command_result, submitted = next_action
+                self._running[identifier] = (
+                        action.__class__.__name__,
+                        submitted, timezone.now())
+
+            try:
+                action._threaded_action(real_action, command_result)
+            except Exception:
+                # Already logged and stored into the CommandResult
+                pass
+            finally:
+                db.close_old_connections()
+                with self._condition:
+                    del self._running[identifier]
+                    self._condition.notify_all()
+
+
+_THREADED_ACTIONS = ThreadedActionsPool(THREADED_ACTIONS_WORKERS, THREADED_ACTIONS_BACKLOG)
+
+
 class ThreadedAction(ConductorAction):
     """Specific kind of action that is known to take a long time (usually
     by launching playbooks).
@@ -264,21 +476,28 @@ class ThreadedAction(ConductorAction):
     and set the state of the action in the backend database. Clients are
     responsible to check this state regularly to know when the action
     actually terminates.
+
+    Actions are run on a bounded pool of threads; subclasses can limit
+    the amount of concurrent runs of the same kind using MAX_RUNNING
+    and the amount of them waiting for a thread using MAX_PENDING.
     """
 
+    MAX_RUNNING = None
+    MAX_PENDING = None
+
     def action(self):
         """Public entry point to execute the required action"""
         real_action = super().action
-        thread = threading.Thread(target=self._threaded_action, args=(real_action,))
-        thread.start()
+        _THREADED_ACTIONS.submit(self, real_action, self._create_command_result)
         return {}, 202
 
     def _create_command_result(self):
         """Override this in subclasses to create the required CommandResult"""
         raise NotImplementedError
 
-    def _threaded_action(self, real_action):
-        command_result = self._create_command_result()
+    def _threaded_action(self, real_action, command_result=None):
+        if command_result is None:
+            command_result = self._create_command_result()
         try:
             real_action()
         except errors.ConductorError as e:
@@ -532,6 +751,157 @@ class ChangeCollectorAddress(CollectorAction):
         return None, 204
 
 
+class CollectorsLoad(CollectorAction):
+    """Action responsible for measuring the ingest rate and disk
+    usage of each Collector and of the Agents sending data to them.
+    """
+
+    @require_connected_user(admin=True)
+    def _action(self):
+        return [load.json for load in self._collectors_load()], 200
+
+    def _collectors_load(self):
+        collectors = list(Collector.objects.prefetch_related('agents'))
+        if not collectors:
+            return []
+
+        workers = min(len(collectors), COLLECTORS_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            loads = [
+                    executor.submit(self._collector_load, collector)
+                    for collector in collectors
+            ]
+        return [load.result() for load in loads]
+
+    @staticmethod
+    def _collector_load(collector):
+        load = _CollectorLoad(collector)
+        connection = InfluxDBConnection(
+                collector.address,
+                collector.stats_query_port,
+                collector.stats_database_name,
+                collector.stats_database_precision)
+        try:
+            rates = connection.ingest_rates(COLLECTORS_LOAD_WINDOW)
+            load.disk_usage = connection.disk_usage()
+        except OSError as e:
+            syslog.syslog(
+                    syslog.LOG_WARNING,
+                    'Cannot retrieve the load of collector at '
+                    '{}: {}'.format(collector.address, e))
+            load.error = str(e)
+        else:
+            load.ingest_rate = sum(rates.values())
+            for agent in collector.agents.all():
+                load.agents[agent.address] = rates.get(agent.name, 0.0)
+        return load
+
+
+class _CollectorLoad:
+    def __init__(self, collector):
+        self.address = collector.address
+        self.ingest_rate = None
+        self.disk_usage = None
+        self.error = None
+        self.agents = {}
+
+    @property
+    def balanced_rate(self):
+        return sum(self.agents.values())
+
+    @property
+    def json(self):
+        return {
+                'address': self.address,
+                'ingest_rate': self.ingest_rate,
+                'disk_usage': self.disk_usage,
+                'agents': self.agents,
+                'error': self.error,
+        }
+
+
+class BalanceCollectors(CollectorsLoad):
+    """Action responsible for suggesting, and optionally applying,
+    reassignments of Agents to Collectors so that the ingest rate of
+    each Collector stays within `tolerance` of the average one.
+    """
+
+    def __init__(self, apply=False, tolerance=COLLECTORS_BALANCE_TOLERANCE):
+        super().__init__(apply=apply, tolerance=tolerance)
+
+    @require_connected_user(admin=True)
+    def _action(self):
+        loads = self._collectors_load()
+        moves = self._plan_reassignments([
+            load for load in loads
+            if load.error is None
+        ])
+
+        if self.apply:
+            for move in moves:
+                assignment = AssignCollector(move['agent'], move['to'])
+                self.share_user(assignment)
+                assignment.action()
+
+        return {
+                'collectors': [load.json for load in loads],
+                'reassignments': moves,
+        }, 202 if self.apply and moves else 200
+
+    def _plan_reassignments(self, loads):
+        if len(loads) < 2:
+            return []
+
+        # The agent installed alongside a collector stays with it
+        movable = {
+                load.address: {
+                    address: rate
+                    for address, rate in load.agents.items()
+                    if address != load.address and rate > 0
+                } for load in loads
+        }
+        totals = {load.address: load.balanced_rate for load in loads}
+        threshold = self.tolerance * sum(totals.values()) / len(totals)
+
+        moves = []
+        while True:
+            reassignment = self._next_reassignment(totals, movable, threshold)
+            if reassignment is None:
+                break
+
+            busiest, idlest, address, rate = reassignment
+            # Agents are moved at most once
+            del movable[busiest][address]
+            totals[busiest] -= rate
+            totals[idlest] += rate
+            moves.append({
+                'agent': address,
+                'from': busiest,
+                'to': idlest,
+                'ingest_rate': rate,
+            })
+        return moves
+
+    @staticmethod
+    def _next_reassignment(totals, movable, threshold):
+        idlest = min(totals, key=totals.get)
+        for busiest in sorted(totals, key=totals.get, reverse=True):
+            gap = totals[busiest] - totals[idlest]
+            if gap <= threshold:
+                return None
+
+            # Pick the agent bringing both collectors closest to each
+            # other; moving agents smaller than the gap always reduces it
+            candidates = [
+                    (rate, address)
+                    for address, rate in movable[busiest].items()
+                    if rate < gap
+            ]
+            if candidates:
+                rate, address = min(candidates, key=lambda candidate: abs(gap - 2 * candidate[0]))
+                return busiest, idlest, address, rate
+
+
 #########
 # Agent #
 #########
@@ -1386,6 +1756,9 @@ class InstalledJobAction(ConductorAction):
 class InstallJob(ThreadedAction, InstalledJobAction):
     """Action responsible for installing a Job on an Agent"""
 
+    MAX_RUNNING = 8
+    MAX_PENDING = 200
+
     def __init__(self, address, name, severity=2, local_severity=2, skip_playbook=False, cookie=None):
         super().__init__(address=address, name=name, skip_playbook=skip_playbook,
                          severity=severity, local_severity=local_severity, cookie=cookie)
@@ -1466,6 +1839,9 @@ class InstallJob(ThreadedAction, InstalledJobAction):
         installed_job.update_status = timezone.now()
         installed_job.save()
 
+        # Make sure statistics of the new job are looked up
+        Collector.objects.filter(pk=agent.collector_id).update(statistics_refreshed=None)
+
         if not self.skip_playbook:
             with suppress(errors.ConductorError):
                 severity_setter = SetLogSeverityJob(
@@ -1506,6 +1882,9 @@ class InstallJobs(InstalledJobAction):
 class UninstallJob(ThreadedAction, InstalledJobAction):
     """Action responsible for uninstalling a Job on an Agent"""
 
+    MAX_RUNNING = 8
+    MAX_PENDING = 200
+
     def __init__(self, address, name):
         super().__init__(address=address, name=name)
 
@@ -2250,7 +2629,7 @@ class ListScenarios(ScenarioAction):
 class ScenarioInstanceAction(ConductorAction):
     """Base class that defines helper methods to deal with ScenarioInstances"""
 
-    def get_scenario_instance_or_not_found_error(self, quiet=False):
+    def get_scenario_instance_or_not_found_error(self, quiet=False, archived=False):
         try:
             scenario_instance_id = self.instance_id
         except AttributeError:
@@ -2267,6 +2646,11 @@ class ScenarioInstanceAction(ConductorAction):
         try:
             instance = queryset.get(id=scenario_instance_id)
         except ScenarioInstance.DoesNotExist:
+            if archived:
+                with suppress(ScenarioInstanceArchive.DoesNotExist):
+                    return (ScenarioInstanceArchive.objects
+                            .select_related('scenario_version__scenario__project')
+                            .get(id=scenario_instance_id))
             raise errors.NotFoundError(
                     'The requested Scenario Instance is not in the database',
                     scenario_instance_id=self.instance_id)
@@ -2409,6 +2793,24 @@ class StopScenarioInstance(ScenarioInstanceAction):
         return clapper.stop_scenario_instance(self.instance_id)
 
 
+class WatchScenarioInstance(ScenarioInstanceAction):
+    """Action responsible of waiting for the status transitions
+    of an existing Scenario Instance, its OpenBACH Functions and
+    its Job Instances.
+    """
+
+    def __init__(self, instance_id, since=0, timeout=None):
+        if timeout is None or timeout > SCENARIO_WATCH_MAX_TIMEOUT:
+            timeout = SCENARIO_WATCH_MAX_TIMEOUT
+        timeout = max(timeout, 0)
+        super().__init__(instance_id=instance_id, since=since, timeout=timeout)
+
+    def _action(self):
+        clapper = OpenBachClapperBoard()
+        self.share_user(clapper)
+        return clapper.watch_scenario_instance(self.instance_id, self.since, self.timeout)
+
+
 class RemoveScenarioInstance(ScenarioInstanceAction):
     """Action responsible of removing an existing
     Scenario Instance from the database.
@@ -2418,7 +2820,7 @@ class RemoveScenarioInstance(ScenarioInstanceAction):
         super().__init__(instance_id=instance_id)
 
     def _action(self):
-        scenario_instance = self.get_scenario_instance_or_not_found_error()
+        scenario_instance = self.get_scenario_instance_or_not_found_error(archived=True)
         if not scenario_instance.is_stopped:
             raise errors.ConflictError(
                     'Trying to remove a scenario_instance still running',
@@ -2434,7 +2836,7 @@ class InfosScenarioInstance(ScenarioInstanceAction):
         super().__init__(instance_id=instance_id, quiet=quiet)
 
     def _action(self):
-        scenario_instance = self.get_scenario_instance_or_not_found_error(self.quiet)
+        scenario_instance = self.get_scenario_instance_or_not_found_error(self.quiet, archived=True)
         if self.quiet:
             result = scenario_instance.limited_json
         else:
@@ -2445,32 +2847,56 @@ class InfosScenarioInstance(ScenarioInstanceAction):
 class ListScenarioInstances(ScenarioInstanceAction):
     """Action responsible for information retrieval about all
     ScenarioInstances of a given Scenario.
+
+    Instances are listed from the most recent one and can be
+    paginated using either an offset or a cursor: the ID of the
+    last instance of the previous page. Unless `quiet` or `full`
+    are requested, only a summary of each instance is returned.
+    Archived instances are listed instead when `archived` is set.
     """
 
-    def __init__(self, project, name=None, max_per_page=None, page_offset=None, quiet=False):
-        super().__init__(name=name, project=project, max_per_page=max_per_page, page_offset=page_offset, quiet=quiet)
+    def __init__(
+            self, project, name=None, max_per_page=None, page_offset=None,
+            cursor=None, statuses=None, started_after=None,
+            started_before=None, quiet=False, full=False, archived=False):
+        super().__init__(
+                name=name, project=project, max_per_page=max_per_page,
+                page_offset=page_offset, cursor=cursor, statuses=statuses,
+                started_after=started_after, started_before=started_before,
+                quiet=quiet, full=full, archived=archived)
 
     def _action(self):
         scenario_info = InfosScenario(self.name, self.project)
         self.share_user(scenario_info)
         project = scenario_info._get_project_if_own()
-        
+
+        model = ScenarioInstanceArchive if self.archived else ScenarioInstance
+        instances_query = model.objects.filter(scenario_version__scenario__project=self.project)
         if self.name is not None:
-            try:
-                instances_query = ScenarioInstance.objects.filter(scenario_version__scenario__name=self.name,scenario_version__scenario__project=self.project)
-            except Scenario.DoesNotExist:
-                raise errors.NotFoundError(
-                        'The requested Scenario is not in the database',
-                        scenario_name=self.name,
-                        project_name=self.project)
-        else:
-            instances_query = ScenarioInstance.objects.filter(scenario_version__scenario__project=self.project)
+            instances_query = instances_query.filter(scenario_version__scenario__name=self.name)
+        instances_query = self._filter(instances_query).order_by('-id')
 
         if self.max_per_page is not None:
             offset = self.page_offset or 0
-            page = instances_query.order_by('-id')[offset:offset+self.max_per_page]
+            page = instances_query[offset:offset+self.max_per_page]
         else:
-            page = instances_query.order_by('-id')
+            page = instances_query
+
+        if not self.full and not self.quiet:
+            summary = page.values_list(
+                    'id', 'scenario_version__scenario__name',
+                    'status', 'start_date', 'stop_date')
+            instances = [
+                    {
+                        'scenario_instance_id': instance_id,
+                        'scenario_name': scenario_name,
+                        'status': ScenarioInstance.Status(status).label,
+                        'start_date': start_date,
+                        'stop_date': stop_date,
+                    }
+                    for instance_id, scenario_name, status, start_date, stop_date in summary
+            ]
+            return instances, 200
 
         serialize = operator.attrgetter('limited_json' if self.quiet else 'json')
         instances = [
@@ -2479,10 +2905,44 @@ class ListScenarioInstances(ScenarioInstanceAction):
 
         return instances, 200
 
+    def _filter(self, instances_query):
+        if self.cursor is not None:
+            instances_query = instances_query.filter(id__lt=self.cursor)
+
+        if self.statuses:
+            statuses = {status.label: status for status in ScenarioInstance.Status}
+            try:
+                instances_query = instances_query.filter(status__in=[statuses[label] for label in self.statuses])
+            except KeyError as e:
+                raise errors.BadRequestError(
+                        'Unknown scenario instance status',
+                        status=e.args[0], expected=list(statuses))
+
+        tz = timezone.get_current_timezone()
+        if self.started_after is not None:
+            date = datetime.fromtimestamp(self.started_after / 1000, tz=tz)
+            instances_query = instances_query.filter(start_date__gte=date)
+        if self.started_before is not None:
+            date = datetime.fromtimestamp(self.started_before / 1000, tz=tz)
+            instances_query = instances_query.filter(start_date__lt=date)
+
+        return instances_query
 
 
 class RecursiveScenarioInstanceAction(ScenarioInstanceAction):
     def _recurse_into_scenario_instance(self, scenario_instance, action, *args):
+        if isinstance(scenario_instance, ScenarioInstanceArchive):
+            for job_instance in scenario_instance.job_instances:
+                dates = {
+                        '@job_name': job_instance.job_name,
+                        '@scenario_start_date': job_instance.scenario_start_date,
+                        '@job_instance_start_date': job_instance.start_date,
+                        '@scenario_stop_date': job_instance.scenario_stop_date,
+                        '@job_instance_stop_date': job_instance.stop_date,
+                }
+                action(job_instance, *args, dates=dates)
+            return
+
         functions = scenario_instance.openbach_functions_instances.exclude(
                 started_job__isnull=True, started_scenario__isnull=True)
         for openbach_function in functions:
@@ -2510,6 +2970,10 @@ class StatisticsFilesCount(RecursiveScenarioInstanceAction):
         super().__init__(instance_id=instance_id)
 
     def _update_files_count(self, start_job_instance, files_found, condition, **kwargs):
+        if start_job_instance.collector is None:
+            # Archived job whose collector was removed since
+            return
+
         connection = InfluxDBConnection(
                 start_job_instance.collector.address,
                 start_job_instance.collector.stats_query_port,
@@ -2529,18 +2993,81 @@ class StatisticsFilesCount(RecursiveScenarioInstanceAction):
         files_found = defaultdict(Counter)
         files_only = ConditionTag('@stored_file', Operator.Equal, 'true')
 
-        scenario_instance = self.get_scenario_instance_or_not_found_error()
+        scenario_instance = self.get_scenario_instance_or_not_found_error(archived=True)
         self._recurse_into_scenario_instance(scenario_instance, self._update_files_count, files_found, files_only)
 
         return files_found, 200
 
 
+class RollupScenarioInstance(RecursiveScenarioInstanceAction):
+    """Action that downsample the statistics of a finished
+    ScenarioInstance, and its subscenarios, into the rollup tiers
+    of the collectors that stored them.
+    """
+
+    def __init__(self, instance_id):
+        super().__init__(instance_id=instance_id)
+
+    def _list_collector(self, start_job_instance, collectors, **kwargs):
+        collector = start_job_instance.collector
+        collectors[collector.address] = collector
+
+    def _action(self):
+        scenario_instance = self.get_scenario_instance_or_not_found_error()
+        if not scenario_instance.is_stopped:
+            raise errors.ConflictError(
+                    'Cannot rollup the statistics of a running Scenario Instance',
+                    scenario_instance_id=self.instance_id)
+
+        collectors = {}
+        self._recurse_into_scenario_instance(scenario_instance, self._list_collector, collectors)
+
+        condition = None
+        if scenario_instance.start_date is not None:
+            # Align on the coarsest tier so its first bucket is complete
+            coarsest = ROLLUP_TIERS[0].interval
+            start = int(scenario_instance.start_date.timestamp() * 1000)
+            condition = ConditionTimestamp(Operator.GreaterOrEqual, start - start % coarsest)
+
+        rolled_up = {'collectors': []}
+        for address, collector in collectors.items():
+            connection = InfluxDBConnection(
+                    collector.address,
+                    collector.stats_query_port,
+                    collector.stats_database_name,
+                    collector.stats_database_precision)
+            try:
+                connection.rollup_statistics(scenario=scenario_instance.id, condition=condition)
+            except (OSError, ValueError) as e:
+                syslog.syslog(
+                        syslog.LOG_ERR,
+                        'Rolling up statistics of scenario instance {} '
+                        'on collector {} failed: {}'.format(self.instance_id, address, e))
+                rolled_up.setdefault('errors', {})[address] = str(e)
+            else:
+                rolled_up['collectors'].append(address)
+
+        return rolled_up, 200
+
+
 class ExportScenarioInstance(RecursiveScenarioInstanceAction):
-    """Action responsible for information retrieval about a ScenarioInstance"""
+    """Action responsible for exporting the statistics of a ScenarioInstance.
 
-    def __init__(self, instance_id, **files):
+    Statistics of job instances are retrieved concurrently and
+    streamed into the exported file while generated files are
+    fetched from the agents. When run in the background, the
+    path to the file being written is returned immediately and
+    the progress of the export is stored alongside it.
+
+    Statistics are exported as a single CSV file by default; the
+    'parquet' and 'arrow' formats instead store one typed table per
+    job instance in an archive, along with the generated files.
+    """
+
+    def __init__(self, instance_id, background=False, format='csv', **files):
         super().__init__(
                 instance_id=instance_id, files=files,
+                background=background, format=format,
                 tz=timezone.get_current_timezone())
 
     def _compute_headers(self, start_job_instance, headers, stats_names, **kwargs):
@@ -2548,7 +3075,21 @@ class ExportScenarioInstance(RecursiveScenarioInstanceAction):
         with suppress(KeyError):
             headers |= set(stats_names[job_name])
 
-    def _export_start_job_instance(self, start_job_instance, csv_writer, dates):
+    def _list_start_job_instance(self, start_job_instance, job_instances, dates):
+        # Make sure related objects are fetched now so the
+        # exporting threads do not need to access the database
+        start_job_instance.collector
+        start_job_instance.agent
+        start_job_instance.started_by
+        start_job_instance.scenario_id
+        job_instances.append((start_job_instance, dates))
+
+    def _export_start_job_instance(self, start_job_instance, dates):
+        if start_job_instance.collector is None:
+            # Archived job whose collector was removed since
+            yield from self._export_scenario_metadata(start_job_instance, dates)
+            return
+
         connection = InfluxDBConnection(
                 start_job_instance.collector.address,
                 start_job_instance.collector.stats_query_port,
@@ -2563,9 +3104,9 @@ class ExportScenarioInstance(RecursiveScenarioInstanceAction):
                 stats['time'] = datetime.fromtimestamp(
                         stats['time'] / 1000,
                         tz=self.tz)
-            csv_writer.writerow(stats)
+            yield stats
 
-    def _export_scenario_metadata(self, start_job_instance, csv_writer, dates):
+    def _export_scenario_metadata(self, start_job_instance, dates):
         stats = {
                 '@agent_name': start_job_instance.agent_name,
                 '@scenario_instance_id': start_job_instance.scenario_id,
@@ -2573,11 +3114,42 @@ class ExportScenarioInstance(RecursiveScenarioInstanceAction):
                 '@owner_scenario_instance_id': start_job_instance.started_by,
         }
         stats.update(dates)
-        csv_writer.writerow(stats)
+        return [stats]
+
+    def _export_columnar_job_instance(self, start_job_instance, directory, dates):
+        metadata = {
+                '@agent_name': start_job_instance.agent_name,
+                '@scenario_instance_id': start_job_instance.scenario_id,
+                '@job_instance_id': start_job_instance.id,
+                '@owner_scenario_instance_id': start_job_instance.started_by,
+        }
+        metadata.update(dates)
+        collector = start_job_instance.collector
+        if collector is None:
+            # Archived job whose collector was removed since
+            return None
+
+        connection = InfluxDBConnection(
+                collector.address,
+                collector.stats_query_port,
+                collector.stats_database_name,
+                collector.stats_database_precision)
+        statistics = connection.raw_statistics(
+                job=start_job_instance.job_name,
+                job_instance=start_job_instance.id)
+        table = arrow_tools.statistics_to_table(
+                statistics, collector.stats_database_precision, metadata)
+        table_path = Path(directory, '{}.{}_({}){}'.format(
+                '_'.join(start_job_instance.agent_name.split()),
+                '_'.join(start_job_instance.job_name.split()),
+                start_job_instance.id,
+                arrow_tools.FORMATS[self.format]))
+        arrow_tools.write_table(table, table_path.as_posix(), self.format)
+        return table_path
 
     def _fetch_generated_files(self, start_job_instance, collect_directory, dates):
         stats_names = self.files.get(start_job_instance.job_name)
-        if stats_names and start_job_instance.agent:
+        if stats_names and start_job_instance.agent and start_job_instance.collector:
             collector = start_job_instance.collector
             connection = InfluxDBConnection(
                 collector.address,
@@ -2595,7 +3167,7 @@ class ExportScenarioInstance(RecursiveScenarioInstanceAction):
                 # Scenario should have generated the requested
                 # statistic but somehow the job failed to do so,
                 # so we don't get anything in here. Just bail out!
-                return
+                return []
             job = scenario.get_or_create_job(
                     start_job_instance.job_name,
                     start_job_instance.id,
@@ -2604,6 +3176,7 @@ class ExportScenarioInstance(RecursiveScenarioInstanceAction):
                     '_'.join(start_job_instance.agent_name.split()),
                     '_'.join(start_job_instance.job_name.split()),
                     start_job_instance.id)
+            archive_prefixes = []
             for stats in job.statistics_data.values():
                 for stat_name in stats_names:
                     files_to_fetch = [
@@ -2612,15 +3185,19 @@ class ExportScenarioInstance(RecursiveScenarioInstanceAction):
                             if stat_name in file_paths
                     ]
                     if files_to_fetch:
+                        archive_prefix = normalized_job_name + '_'.join(stat_name.split())
                         start_playbook(
                                 'fetch_file',
                                  start_job_instance.agent.address,
-                                 normalized_job_name + '_'.join(stat_name.split()),
+                                 archive_prefix,
                                  collect_directory,
                                  files_to_fetch)
+                        archive_prefixes.append(archive_prefix)
+            return archive_prefixes
+        return []
 
     def _action(self):
-        scenario_instance = self.get_scenario_instance_or_not_found_error()
+        scenario_instance = self.get_scenario_instance_or_not_found_error(archived=True)
         project = scenario_instance.scenario.project
         self._assert_user_in(project.owners.all())
 
@@ -2629,6 +3206,18 @@ class ExportScenarioInstance(RecursiveScenarioInstanceAction):
                     'Trying to export the statistics of a scenario_instance still running',
                     scenario_instance_id=self.instance_id)
 
+        if self.format != 'csv':
+            if arrow_tools is None:
+                raise errors.UnprocessableError(
+                        'Columnar exports require the pyarrow '
+                        'package to be installed on the controller',
+                        format=self.format)
+            if self.format not in arrow_tools.FORMATS:
+                raise errors.BadRequestError(
+                        'Unknown export format',
+                        format=self.format,
+                        available=['csv', *arrow_tools.FORMATS])
+
         get_stats_names = StatisticsNames(project.name)
         self.share_user(get_stats_names)
         stats_names = get_stats_names.action()[0]
@@ -2658,35 +3247,188 @@ class ExportScenarioInstance(RecursiveScenarioInstanceAction):
         if has_jobs_stats:
             headers.add('time')
 
-        csv_path = None
-        with tempfile.NamedTemporaryFile('w', newline='', delete=False, prefix='openbach_files/', suffix='.csv') as csvfile:
-            csv_writer = csv.DictWriter(csvfile.file, fieldnames=sorted(headers))
-            csv_writer.writeheader()
-            self._recurse_into_scenario_instance(
-                    scenario_instance,
-                    self._export_start_job_instance if has_jobs_stats
-                    else self._export_scenario_metadata,
-                    csv_writer)
-            csv_path = csvfile.name
+        job_instances = []
+        self._recurse_into_scenario_instance(
+                scenario_instance,
+                self._list_start_job_instance,
+                job_instances)
 
-        if not self.files:
-            return csv_path, 200
+        if self.format != 'csv':
+            suffix = '.tar'
+        elif self.files:
+            suffix = '.tar.gz'
+        else:
+            suffix = '.csv'
+        with tempfile.NamedTemporaryFile('wb', prefix='openbach_files/', suffix=suffix, delete=False) as f:
+            export_path = f.name
+        write_export_progress(
+                export_path, finished=False, error=None,
+                exported=0, total=len(job_instances))
+
+        arguments = (export_path, sorted(headers), has_jobs_stats, job_instances)
+        if self.background:
+            _EXPORTS.submit(self._export, *arguments)
+            return export_path, 202
+
+        self._export(*arguments)
+        return export_path, 200
+
+    def _export(self, export_path, headers, has_jobs_stats, job_instances):
+        try:
+            if self.format != 'csv':
+                self._export_columnar(export_path, job_instances)
+            elif self.files:
+                self._export_archive(export_path, headers, has_jobs_stats, job_instances)
+            else:
+                self._export_csv(export_path, headers, has_jobs_stats, job_instances)
+        except Exception as e:
+            syslog.syslog(
+                    syslog.LOG_ERR,
+                    'Export of scenario instance {} failed: {}'
+                    .format(self.instance_id, e))
+            write_export_progress(
+                    export_path, finished=True, error=str(e),
+                    exported=None, total=len(job_instances))
+            raise
+        else:
+            write_export_progress(
+                    export_path, finished=True, error=None,
+                    exported=len(job_instances), total=len(job_instances))
+        finally:
+            db.close_old_connections()
+
+    def _export_csv_part(self, export, directory, headers, start_job_instance, dates):
+        with tempfile.NamedTemporaryFile(
+                'w', newline='', dir=directory,
+                suffix='.csv', delete=False) as part:
+            csv_writer = csv.DictWriter(part, fieldnames=headers)
+            csv_writer.writerows(export(start_job_instance, dates))
+        return Path(part.name)
+
+    def _export_csv_parts(self, directory, headers, has_jobs_stats, job_instances, progress_path):
+        """Write the statistics of each job instance concurrently into
+        their own CSV file in `directory` and yield the path to these
+        files in order, preceded by the one holding the headers.
+        """
+        export = self._export_start_job_instance if has_jobs_stats else self._export_scenario_metadata
+        total = len(job_instances)
+
+        headers_path = Path(directory, 'headers.csv')
+        with headers_path.open('w', newline='') as part:
+            csv.DictWriter(part, fieldnames=headers).writeheader()
+        yield headers_path
+
+        with ThreadPoolExecutor(max_workers=EXPORT_WORKERS) as executor:
+            parts = bounded_ordered_map(
+                    executor, lambda job: self._export_csv_part(export, directory, headers, *job),
+                    job_instances, 2 * EXPORT_WORKERS)
+            for exported, part in enumerate(parts, 1):
+                yield part
+                write_export_progress(
+                        progress_path, finished=False, error=None,
+                        exported=exported, total=total)
+
+    def _export_csv(self, csv_path, headers, has_jobs_stats, job_instances):
+        with tempfile.TemporaryDirectory(prefix='openbach_files/') as parts_dir, open(csv_path, 'wb') as csvfile:
+            parts = self._export_csv_parts(parts_dir, headers, has_jobs_stats, job_instances, csv_path)
+            for part in parts:
+                with ConcatenatedFiles([part]) as rows:
+                    shutil.copyfileobj(rows, csvfile)
+                csvfile.flush()
+
+    def _export_archive(self, archive_path, headers, has_jobs_stats, job_instances):
+        with tempfile.TemporaryDirectory(prefix='openbach_files/') as generated_dir:
+            parts_dir = Path(generated_dir, 'statistics')
+            parts_dir.mkdir()
+            archived = set()
+            with ThreadPoolExecutor(max_workers=EXPORT_WORKERS + 1) as executor:
+                # Fetch files from the agents while statistics are exported
+                exporting = executor.submit(lambda: list(self._export_csv_parts(
+                        parts_dir, headers, has_jobs_stats,
+                        job_instances, archive_path)))
+                fetching = {
+                        executor.submit(self._fetch_generated_files, job_instance, generated_dir + '/', dates)
+                        for job_instance, dates in job_instances
+                }
 
+                with open(archive_path, 'wb') as f, tarfile.open(fileobj=f, mode='w|gz') as tar:
+                    for future in as_completed(fetching | {exporting}):
+                        if future is exporting:
+                            # Tar entries need their size upfront: stream the
+                            # parts once they are all written, without first
+                            # gathering them into an intermediate CSV file
+                            parts = future.result()
+                            csv_info = tarfile.TarInfo('scenario_instance_{}.csv'.format(self.instance_id))
+                            csv_info.size = sum(part.stat().st_size for part in parts)
+                            csv_info.mtime = timezone.now().timestamp()
+                            csv_info.mode = 0o644
+                            with ConcatenatedFiles(parts) as csv_file:
+                                tar.addfile(csv_info, csv_file)
+                        else:
+                            for prefix in future.result():
+                                for extra_file in Path(generated_dir).glob(glob.escape(prefix) + '.*.tar.gz'):
+                                    if extra_file not in archived:
+                                        archived.add(extra_file)
+                                        tar.add(extra_file.as_posix(), extra_file.name)
+                        f.flush()
+
+    def _export_columnar(self, archive_path, job_instances):
+        total = len(job_instances)
         with tempfile.TemporaryDirectory(prefix='openbach_files/') as generated_dir:
-            self._recurse_into_scenario_instance(
-                    scenario_instance,
-                    self._fetch_generated_files,
-                    generated_dir + '/')
+            archived = set()
+            with ThreadPoolExecutor(max_workers=EXPORT_WORKERS) as executor:
+                exporting = {
+                        executor.submit(self._export_columnar_job_instance, job_instance, generated_dir, dates)
+                        for job_instance, dates in job_instances
+                }
+                fetching = {
+                        executor.submit(self._fetch_generated_files, job_instance, generated_dir + '/', dates)
+                        for job_instance, dates in job_instances
+                }
+
+                # Tables and files are already compressed, no need to gzip them
+                exported = 0
+                with open(archive_path, 'wb') as f, tarfile.open(fileobj=f, mode='w|') as tar:
+                    for future in as_completed(exporting | fetching):
+                        if future in exporting:
+                            table_path = future.result()
+                            if table_path is not None:
+                                tar.add(table_path.as_posix(), table_path.name)
+                            exported += 1
+                            write_export_progress(
+                                    archive_path, finished=False, error=None,
+                                    exported=exported, total=total)
+                        else:
+                            for prefix in future.result():
+                                for extra_file in Path(generated_dir).glob(glob.escape(prefix) + '.*.tar.gz'):
+                                    if extra_file not in archived:
+                                        archived.add(extra_file)
+                                        tar.add(extra_file.as_posix(), extra_file.name)
+                        f.flush()
 
-            with tempfile.NamedTemporaryFile('wb', prefix='openbach_files/', suffix='.tar.gz', delete=False) as f:
-                with tarfile.open(fileobj=f, mode='w:gz') as tar:
-                    tar.add(csv_path, 'scenario_instance_{}.csv'.format(self.instance_id))
-                    for extra_file in Path(generated_dir).glob('*.tar.gz'):
-                        tar.add(extra_file.as_posix(), extra_file.name)
 
-        os.remove(csv_path)
+_EXPORTS = ThreadPoolExecutor(max_workers=EXPORT_WORKERS)
 
-        return f.name, 200
+
+class ArchiveScenarioInstances(ConductorAction):
+    """Action that moves the finished ScenarioInstances older
+    than `older_than` days, and their whole tree, out of the
+    active tables and into compact archives.
+    """
+
+    def __init__(self, older_than=None):
+        if older_than is None:
+            older_than = SCENARIO_ARCHIVE_AGE
+        super().__init__(older_than=older_than)
+
+    @require_connected_user(admin=True)
+    def _action(self):
+        if self.older_than <= 0:
+            raise errors.BadRequestError(
+                    'The age of the scenario instances to '
+                    'archive should be a positive amount of days',
+                    older_than=self.older_than)
+        return {'archived': archive_scenario_instances(self.older_than)}, 200
 
 
 ###########
@@ -3240,6 +3982,13 @@ class StateJobInstance(ConductorAction):
         return command_result.json, 200
 
 
+class StateThreadedActions(ConductorAction):
+    """Action that retrieve the actions waiting for or running in the threads pool"""
+
+    def _action(self):
+        return _THREADED_ACTIONS.json, 200
+
+
 #########
 # Users #
 #########
@@ -3346,10 +4095,16 @@ class ListUsers(ConductorAction):
 ##############
 
 class StatisticsNames(ProjectAction):
-    """Action that retrieve the names of statistics in InfluxDB"""
+    """Action that retrieve the names of statistics in InfluxDB.
 
-    def __init__(self, project):
-        super().__init__(name=project)
+    Names are kept in a per-collector catalogue in the database
+    which is synchronized with InfluxDB once it gets older than
+    STATISTICS_NAMES_TTL or when jobs are installed on one of the
+    agents of the collector.
+    """
+
+    def __init__(self, project, refresh=False):
+        super().__init__(name=project, refresh=refresh)
 
     def _action(self):
         project = self.get_project_or_not_found_error()
@@ -3364,20 +4119,69 @@ class StatisticsNames(ProjectAction):
         else:
             collectors = Collector.objects.all()
 
-        stats_names = defaultdict(set)
         for collector in collectors:
+            self._refresh_catalogue(collector)
+
+        stats_names = defaultdict(list)
+        catalogue = (
+                CollectedStatistic.objects
+                .filter(collector__in=collectors)
+                .order_by('job_name', 'name')
+                .values_list('job_name', 'name')
+                .distinct())
+        for job_name, name in catalogue:
+            stats_names[job_name].append(name)
+
+        return dict(stats_names), 200
+
+    def _refresh_catalogue(self, collector):
+        with _STATISTICS_NAMES_LOCKS[collector.address]:
+            refreshed = (
+                    Collector.objects
+                    .values_list('statistics_refreshed', flat=True)
+                    .get(pk=collector.pk))
+            now = timezone.now()
+            if (not self.refresh and refreshed is not None
+                    and (now - refreshed).total_seconds() < STATISTICS_NAMES_TTL):
+                return
+
             connection = InfluxDBConnection(
                     collector.address,
                     collector.stats_query_port,
                     collector.stats_database_name,
                     collector.stats_database_precision)
-            for job_name, fields in connection.get_field_keys().items():
-                stats_names[job_name].update(fields)
+            try:
+                field_keys = connection.get_field_keys()
+            except OSError as e:
+                if refreshed is None:
+                    raise
+                syslog.syslog(
+                        syslog.LOG_WARNING,
+                        'Cannot refresh statistics names of collector {}, '
+                        'serving cached values: {}'.format(collector.address, e))
+                return
 
-        return {
-                job_name: sorted(names)
-                for job_name, names in stats_names.items()
-        }, 200
+            fresh = {
+                    (job_name, name)
+                    for job_name, names in field_keys.items()
+                    for name in names
+            }
+            with db.transaction.atomic():
+                known = collector.collected_statistics.all()
+                stale = [
+                        statistic.id for statistic in known
+                        if (statistic.job_name, statistic.name) not in fresh
+                ]
+                missing = fresh.difference((s.job_name, s.name) for s in known)
+                collector.collected_statistics.filter(id__in=stale).delete()
+                CollectedStatistic.objects.bulk_create([
+                    CollectedStatistic(collector=collector, job_name=job_name, name=name)
+                    for job_name, name in missing
+                ], ignore_conflicts=True)
+                Collector.objects.filter(pk=collector.pk).update(statistics_refreshed=now)
+
+
+_STATISTICS_NAMES_LOCKS = defaultdict(threading.Lock)
 
 
 class StatisticsAction(JobInstanceAction):
@@ -3437,20 +4241,45 @@ class StatisticsNamesAndSuffixes(StatisticsAction):
 
 
 class StatisticsValues(StatisticsAction):
-    """Action that retrieve values associated to a statistic in InfluxDB"""
+    """Action that retrieve values associated to a statistic in InfluxDB.
 
-    def __init__(self, instance_id, name, suffix=None, origin=None):
+    When a target amount of `points` is requested, values are
+    aggregated by InfluxDB over time intervals using the given
+    `aggregation` function, out of the statistics rollups if they
+    are fine enough, or downsampled using the Largest-
+    Triangle-Three-Buckets algorithm if `aggregation` is 'lttb'.
+    """
+
+    def __init__(self, instance_id, name, suffix=None, origin=None, points=None, aggregation=None):
         super().__init__(
                 instance_id=instance_id, name=name,
-                suffix=suffix, origin=origin)
+                suffix=suffix, origin=origin,
+                points=points, aggregation=aggregation)
 
     def _action(self):
+        if self.points is not None:
+            if self.points < 3:
+                raise errors.BadRequestError(
+                        'Cannot downsample statistics values to less than 3 points',
+                        points=self.points)
+            aggregation = self.aggregation or 'mean'
+            if aggregation in STATISTICS_AGGREGATIONS:
+                return self._aggregated_values(aggregation), 200
+            if aggregation != 'lttb':
+                raise errors.BadRequestError(
+                        'Unknown aggregation for statistics values',
+                        aggregation=aggregation,
+                        available=['lttb', *STATISTICS_AGGREGATIONS])
+
         try:
             statistics_data = self._retrieve_statistics_data(self.origin)
         except StopIteration:
             return [], 200
 
         time_series = statistics_data.time_series()
+        if self.points is not None and len(time_series.index) > self.points:
+            return self._downsampled_values(time_series), 200
+
         statistics = {
                 name[-1]: time_series[name].tolist()
                 for name in time_series
@@ -3458,6 +4287,54 @@ class StatisticsValues(StatisticsAction):
         statistics['time'] = time_series.index.tolist()
         return statistics, 200
 
+    def _aggregated_values(self, aggregation):
+        job_name, connection = self._build_connection(raw=True)
+        time_span = connection.time_span(
+                job=job_name, job_instance=self.instance_id,
+                suffix=self.suffix, fields=[self.name])
+        if time_span is None:
+            return []
+
+        first, last = time_span
+        start = first if self.origin is None else max(first, self.origin)
+        origin = first if self.origin is None else self.origin
+        interval = max(1, -(-(last - start + 1) // self.points))
+        values = connection.aggregated_statistics(
+                job_name, self.name, [aggregation],
+                job_instance=self.instance_id, suffix=self.suffix,
+                condition=ConditionTimestamp.from_timestamps((start, last)),
+                interval=interval, offset=start % interval,
+                group_by=['@suffix'])
+
+        statistics = {self.name: [], 'time': []}
+        suffix = self.suffix
+        for _, value in values:
+            if suffix is None:
+                # Mimic raw values by only keeping the first suffix
+                suffix = value['@suffix']
+            if value['@suffix'] == suffix and aggregation in value:
+                statistics[self.name].append(value[aggregation])
+                statistics['time'].append(value['time'] - origin)
+        return statistics if statistics['time'] else []
+
+    def _downsampled_values(self, time_series):
+        statistics = {}
+        times = set()
+        for name in time_series:
+            serie = time_series[name].dropna()
+            indices = largest_triangle_three_buckets(serie.index, serie.values, self.points)
+            downsampled = serie.iloc[indices]
+            statistics[name[-1]] = downsampled
+            times.update(downsampled.index)
+
+        index = sorted(times)
+        statistics = {
+                name: serie.reindex(index).tolist()
+                for name, serie in statistics.items()
+        }
+        statistics['time'] = index
+        return statistics
+
 
 class StatisticsHistogram(StatisticsAction):
     """Action that retrieve values associated to a statistic
@@ -3483,8 +4360,8 @@ class StatisticsHistogram(StatisticsAction):
 
 
 class StatisticsComparison(StatisticsAction):
-    """Action that retrieve values associated to a statistic
-    in InfluxDB and convert them to an histogram.
+    """Action that retrieve the mean and standard deviation
+    of a statistic as computed by InfluxDB.
     """
 
     def __init__(self, instance_id, name, suffix=None, origin=None):
@@ -3493,18 +4370,21 @@ class StatisticsComparison(StatisticsAction):
                 suffix=suffix, origin=origin)
 
     def _action(self):
-        try:
-            statistics_data = self._retrieve_statistics_data(self.origin)
-        except StopIteration:
-            return [], 200
-
-        statistics = statistics_data.comparison()
-        mean = statistics.Ε.iloc[0]
-        variance = statistics.δ.iloc[0]
-        if numpy.isnan(mean) or numpy.isnan(variance):
-            return None, 200
-
-        return {'mean': mean, 'variance': variance}, 200
+        job_name, connection = self._build_connection(raw=True)
+        condition = None
+        if self.origin is not None:
+            condition = ConditionTimestamp(Operator.GreaterOrEqual, self.origin)
+        summaries = connection.aggregated_statistics(
+                job_name, self.name, ['mean', 'stddev'],
+                job_instance=self.instance_id, suffix=self.suffix,
+                condition=condition, group_by=['@suffix'])
+
+        # Mimic raw values by only considering the first suffix
+        with suppress(StopIteration):
+            _, summary = next(summaries)
+            with suppress(KeyError):
+                return {'mean': summary['mean'], 'variance': summary.get('stddev', 0)}, 200
+        return None, 200
 
 
 ################
@@ -3611,59 +4491,277 @@ class PullFile(ConductorAction):
         return None, 204
 
 
+def stop_agent_job_instances(address, port, instances, date='now'):
+    """Stop several job instances running on the same agent using
+    a single request, falling back on a request per instance for
+    agents that do not support it.
+
+    Return a list of the instances that could not be stopped
+    along with the reason why.
+    """
+    baton = OpenBachBaton(address, port)
+    try:
+        return baton.stop_job_instances(instances, date)
+    except errors.UnprocessableError as e:
+        agent_message = e.error.get('agent_message', {})
+        if not str(agent_message.get('error')).startswith('Unknown action'):
+            raise
+
+    failures = []
+    for job_name, job_id in instances:
+        try:
+            baton.refresh().stop_job_instance(job_name, job_id, date)
+        except errors.ConductorError as e:
+            failures.append({'instance_id': job_id, 'error': e.error})
+    return failures
+
+
+def archive_scenario_instances(age):
+    """Archive the finished top-level scenario instances that stopped
+    more than `age` days ago, along with their sub-scenario instances.
+
+    Return the IDs of the archived scenario instances.
+    """
+    deadline = timezone.now() - timedelta(days=age)
+    candidates = ScenarioInstance.objects.filter(
+            openbach_function_instance__isnull=True,
+            stop_date__lt=deadline,
+    ).order_by('id').values_list('id', flat=True)
+
+    archived = []
+    for scenario_instance_id in list(candidates):
+        try:
+            scenario_instance = ScenarioInstance.objects.get(id=scenario_instance_id)
+            if scenario_instance.archive() is not None:
+                archived.append(scenario_instance_id)
+        except (ScenarioInstance.DoesNotExist, db.DatabaseError) as e:
+            syslog.syslog(
+                    syslog.LOG_WARNING,
+                    'Cannot archive scenario instance {}: {}'
+                    .format(scenario_instance_id, e))
+    return archived
+
+
+def status_agent_job_instances(address, port, instances):
+    """Retrieve the status of several job instances running on the
+    same agent using a single request, falling back on a request per
+    instance for agents that do not support it.
+
+    Return a dictionary mapping job instances IDs to their status
+    as reported by the agent, and a dictionary mapping the IDs of
+    job instances started at a given date to how late, in
+    milliseconds, the agent actually started them.
+    """
+    baton = OpenBachBaton(address, port)
+    try:
+        statuses = baton.status_job_instances(instances)
+    except errors.UnprocessableError as e:
+        agent_message = e.error.get('agent_message', {})
+        if not str(agent_message.get('error')).startswith('Unknown action'):
+            raise
+    else:
+        lateness = {
+                status['instance_id']: status['lateness']
+                for status in statuses if 'lateness' in status
+        }
+        return {status['instance_id']: status['status'] for status in statuses}, lateness
+
+    statuses = {}
+    for job_name, job_id in instances:
+        try:
+            statuses[job_id] = baton.refresh().status_job_instance(job_name, job_id)
+        except errors.UnreachableError:
+            statuses[job_id] = 'Agent Unreachable'
+        except errors.UnprocessableError:
+            statuses[job_id] = 'Error'
+    return statuses, {}
+
+
 class KillAll(ConductorAction):
     """Action that kills all instances: Scenarios and Jobs"""
 
-    def __init__(self, date=None):
-        super().__init__(date=date)
+    def __init__(self, date=None, timeout=KILL_ALL_TIMEOUT):
+        super().__init__(date=date, timeout=timeout)
 
     @require_connected_user(admin=True)
     def _action(self):
-        for scenario in ScenarioInstance.objects.filter(stop_date__isnull=True):
-            stop_scenario = StopScenarioInstance(scenario.id)
-            self.share_user(stop_scenario)
-            stop_scenario.action()
+        report = {}
+
+        scenarios = ScenarioInstance.objects.filter(stop_date__isnull=True).values_list('id', flat=True)
+        failures = self._run_concurrently(self.timeout, {
+            scenario_id: partial(self._stop_scenario, scenario_id)
+            for scenario_id in scenarios
+        })
+        if failures:
+            report['scenario_instances'] = [
+                    {'scenario_instance_id': scenario_id, 'error': error.error}
+                    for scenario_id, error in failures.items()
+            ]
+
+        date = 'now' if self.date is None else self.date
+        jobs_per_agent = defaultdict(list)
+        orphaned_jobs = []
+        for job in JobInstance.objects.filter(stop_date__isnull=True).select_related('agent'):
+            if job.agent is None:
+                orphaned_jobs.append(job.id)
+            else:
+                jobs_per_agent[job.agent].append((job.job_name, job.id))
 
-        for job in JobInstance.objects.filter(stop_date__isnull=True):
-            stop_job = StopJobInstance(job.id)
-            self.share_user(stop_job)
-            stop_job.action()
+        failures = self._run_concurrently(self.timeout, {
+            agent: partial(stop_agent_job_instances, agent.address, agent.port, jobs, date)
+            for agent, jobs in jobs_per_agent.items()
+        })
+
+        stop_errors = {
+                job_id: errors.ConductorWarning(
+                    'The Agent associated to this JobInstance was '
+                    'uninstalled. Marking the JobInstance stopped anyway.',
+                    job_instance_id=job_id)
+                for job_id in orphaned_jobs
+        }
+        failed_jobs = []
+        for agent, jobs in jobs_per_agent.items():
+            error = failures.get(agent)
+            if error is None:
+                continue
+            if isinstance(error, list):
+                job_errors = {
+                        failure['instance_id']: errors.UnprocessableError(
+                            'The Agent failed to stop the JobInstance',
+                            agent_message=failure['error'])
+                        for failure in error
+                }
+            else:
+                job_errors = {job_id: error for _, job_id in jobs}
+            stop_errors.update(job_errors)
+            failed_jobs.extend(
+                    {'instance_id': job_id, 'agent': agent.address, 'error': job_error.error}
+                    for job_id, job_error in job_errors.items())
+
+        # Mark every job instance stopped, even those whose Agent could
+        # not be reached, as StopJobInstance does
+        stopped_ids = orphaned_jobs + [
+                job_id
+                for jobs in jobs_per_agent.values()
+                for _, job_id in jobs
+        ]
+        if self.date is None:
+            stop_date = timezone.now()
+        else:
+            tz = timezone.get_current_timezone()
+            stop_date = datetime.fromtimestamp(self.date / 1000, tz=tz)
+        JobInstance.objects.filter(id__in=stopped_ids).update(stop_date=stop_date)
+        self._record_stop_results(stopped_ids, stop_errors)
+
+        if failed_jobs:
+            report['job_instances'] = failed_jobs
 
+        if report:
+            return report, 200
         return None, 204
 
+    def _stop_scenario(self, scenario_id):
+        stop_scenario = StopScenarioInstance(scenario_id)
+        self.share_user(stop_scenario)
+        stop_scenario.action()
+
+    @staticmethod
+    def _record_stop_results(job_ids, stop_errors):
+        """Store the outcome of the stop order of each job instance
+        in its CommandResult, as StopJobInstance would have done.
+        """
+        with db.transaction.atomic():
+            for job_id in job_ids:
+                results, _ = JobInstanceCommandResult.objects.get_or_create(job_instance_id=job_id)
+                command_result = ThreadedAction.set_running(results, 'status_stop')
+                error = stop_errors.get(job_id)
+                if error is None:
+                    command_result.update(None, 204)
+                else:
+                    command_result.update(error.json, error.ERROR_CODE)
+
+    @staticmethod
+    def _run_concurrently(timeout, tasks):
+        """Run the given tasks concurrently for at most timeout
+        seconds and return the errors of those that failed or did
+        not complete on time; or the result of those returning
+        a non-empty list of failures.
+        """
+        if not tasks:
+            return {}
+
+        failures = {}
+        executor = ThreadPoolExecutor(max_workers=min(len(tasks), KILL_ALL_WORKERS))
+        futures = {executor.submit(task): key for key, task in tasks.items()}
+        done, not_done = wait(futures, timeout=timeout)
+        for future in not_done:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+        for future in not_done:
+            failures[futures[future]] = errors.UnreachableError(
+                    'Could not complete before the deadline',
+                    timeout=timeout)
+
+        for future in done:
+            try:
+                result = future.result()
+            except errors.ConductorError as e:
+                failures[futures[future]] = e
+            except Exception as e:
+                failures[futures[future]] = errors.ConductorError(str(e))
+            else:
+                if isinstance(result, list) and result:
+                    failures[futures[future]] = result
+
+        return failures
+
 
 class OrphanedLogs(ConductorAction):
     """Action that retrieve orphaned logs from all collectors"""
 
-    def __init__(self, level=7, delay=None, credentials=None):
-        super().__init__(level=level, delay=delay, credentials=credentials)
+    def __init__(self, level=7, delay=None, limit=None, credentials=None):
+        super().__init__(level=level, delay=delay, limit=limit, credentials=credentials)
 
     def _action(self):
-        return list(self._retrieve_orphans()), 200
+        logs = sorted(self._retrieve_orphans(), key=operator.itemgetter(1))
+        if self.limit is not None:
+            logs = logs[-self.limit:]
+        return logs, 200
 
     def _retrieve_orphans(self):
-        severity = self.level
-        credentials = self.credentials
         if self.delay is None:
             timestamps = None
         else:
             now = int(datetime.now().timestamp() * 1000)
             timestamps = (now - self.delay, now)
 
-        for collector in Collector.objects.all():
-            connection = ElasticSearchConnection(collector.address, collector.logs_query_port, credentials)
-            try:
-                logs = connection.orphans(timestamps=timestamps)
-            except Timeout:
-                syslog.syslog(
-                        syslog.LOG_WARNING,
-                        'Cannot retrieve logs from collector at '
-                        '{}: Timeout'.format(collector.address))
-            else:
-                for log in logs.numbered_data.values():
-                    if log.severity <= severity:
+        collectors = list(Collector.objects.all())
+        if not collectors:
+            return
+
+        workers = min(len(collectors), COLLECTORS_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                    executor.submit(self._collector_orphans, collector, timestamps): collector
+                    for collector in collectors
+            }
+            for future, collector in futures.items():
+                try:
+                    logs = future.result()
+                except Timeout:
+                    syslog.syslog(
+                            syslog.LOG_WARNING,
+                            'Cannot retrieve logs from collector at '
+                            '{}: Timeout'.format(collector.address))
+                else:
+                    for log in logs.numbered_data.values():
                         yield log._id, log._timestamp, log.severity_label, log.logsource, log.message
 
+    def _collector_orphans(self, collector, timestamps):
+        connection = ElasticSearchConnection(collector.address, collector.logs_query_port, self.credentials)
+        return connection.orphans(timestamps, self.level, self.limit)
+
 
 class DatabasesInfos(CollectorAction):
     """Action that retreive some influxdb and elasticsearch infos"""
@@ -3722,6 +4820,14 @@ class DeleteDatabases(CollectorAction):
         deleted = {'influxdb': False, 'elasticsearch': False}
 
         if self.influxdb:
+            connection = InfluxDBConnection(
+                    collector.address,
+                    collector.stats_query_port,
+                    collector.stats_database_name,
+                    collector.stats_database_precision)
+            with suppress(OSError):
+                # Rollup tiers are recreated on the next rollup
+                connection.drop_rollup_tiers()
             try:
                 start_playbook(
                         'manage_retention_policies', self.address, 
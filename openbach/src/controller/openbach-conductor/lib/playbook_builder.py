@@ -37,17 +37,20 @@ __credits__ = '''Contributors:
 
 
 import os
+import time
 import atexit
+import syslog
 import tempfile
 import multiprocessing
+from queue import Empty, Full
 from contextlib import suppress
-from collections import defaultdict
+from collections import defaultdict, deque, OrderedDict
 
 from ansible.cli import CLI
 from ansible.executor.playbook_executor import PlaybookExecutor
 from ansible.plugins.callback import CallbackBase
 
-from . import errors
+from . import errors, profiling
 
 
 try:
@@ -56,6 +59,16 @@ except ImportError:
     context = None
 
 
+# Amount of playbooks allowed to run concurrently, each one
+# of them spawning up to `forks` Ansible workers of its own
+PLAYBOOK_WORKERS = int(os.environ.get('OPENBACH_PLAYBOOK_WORKERS', 4))
+# Amount of playbooks allowed to wait for a free worker
+# before new requests are rejected
+PLAYBOOK_BACKLOG = int(os.environ.get('OPENBACH_PLAYBOOK_BACKLOG', 100))
+# Delay (in seconds) to wait for the manager to accept a request
+PLAYBOOK_QUEUE_TIMEOUT = 10
+
+
 class Options:
     """Utility class that mimic a namedtuple or an argparse's Namespace
     so that Ansible can extract out whatever option we pass in.
@@ -449,20 +462,43 @@ class PlaybookBuilder():
         self.add_variables(influxdb_port=influxdb_port)
         self.launch_playbook('manage_retention_policies', session_cookie=cookie)
 
-def _run_playbook(queue):
-    running_playbooks = set()
+def _run_playbook(queue, workers=PLAYBOOK_WORKERS, backlog=PLAYBOOK_BACKLOG):
+    running_playbooks = {}
+    pending_playbooks = _FairQueue()
+    shutting_down = False
+
+    while not shutting_down or running_playbooks:
+        _clean_finished_playbooks(running_playbooks)
+        while pending_playbooks and len(running_playbooks) < workers:
+            play, pipe, args, kwargs, order, enqueued = pending_playbooks.pop()
+            play_book = multiprocessing.Process(
+                    target=_execute_playbook,
+                    args=(play, pipe, args, kwargs))
+            play_book.start()
+            started = time.time()
+            running_playbooks[play_book] = (order, started, started - enqueued)
+
+        if shutting_down:
+            continue
+
+        try:
+            action = queue.get(timeout=0.05)
+        except Empty:
+            continue
 
-    while True:
-        check_error = None
-        action = queue.get()
         if action is None:
-            for playbook in running_playbooks:
-                playbook.join()
-            return
+            shutting_down = True
+            for _, pipe, *_ in pending_playbooks.drain():
+                error = errors.UnavailableError(
+                        'Playbook manager is shutting down')
+                _terminate_playbook(pipe, error.json)
+            continue
 
+        check_error = None
         try:
-            pipe, order, args, kwargs = action
+            pipe, order, args, kwargs, enqueued = action
         except ValueError as e:
+            pipe = action[0]
             check_error = errors.ConductorError(
                     'Playbook manager received the wrong '
                     'number of arguments: {}'.format(e))
@@ -482,24 +518,68 @@ def _run_playbook(queue):
                             'Playbook builder method {} '
                             'is not a classmethod'.format(order))
 
+        if check_error is None and len(pending_playbooks) >= backlog:
+            check_error = errors.UnavailableError(
+                    'Too many playbooks are waiting to be launched, '
+                    'try again later', pending=len(pending_playbooks),
+                    running=len(running_playbooks))
+
         if check_error is not None:
             _terminate_playbook(pipe, check_error.json)
         else:
-            play_book = multiprocessing.Process(
-                    target=_execute_playbook,
-                    args=(play, pipe, args, kwargs))
-            play_book.start()
-            running_playbooks.add(play_book)
-
-        _clean_finished_playbooks(running_playbooks)
+            # Playbooks launched on behalf of the same session share
+            # a lane so a burst from one user can not starve the others
+            owner = kwargs.get('cookie')
+            pending_playbooks.push(owner, (play, pipe, args, kwargs, order, enqueued))
 
 
 def _clean_finished_playbooks(playbooks):
+    if not playbooks:
+        return
+
     for playbook in playbooks:
-        playbook.join(0.05)
+        playbook.join(0.05 / len(playbooks))
     terminated = [playbook for playbook in playbooks if not playbook.is_alive()]
     for playbook in terminated:
-        playbooks.remove(playbook)
+        order, started, waited = playbooks.pop(playbook)
+        syslog.syslog(
+                syslog.LOG_INFO,
+                'Playbook {} finished with exit code {} in {:.3f}s '
+                'after waiting {:.3f}s in queue ({} still running)'
+                .format(order, playbook.exitcode, time.time() - started,
+                        waited, len(playbooks)))
+
+
+class _FairQueue:
+    """Round-robin queue of playbooks grouped by owner so that
+    each owner gets its turn whatever the amount of playbooks
+    they requested.
+    """
+
+    def __init__(self):
+        self._lanes = OrderedDict()
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def push(self, owner, item):
+        self._lanes.setdefault(owner, deque()).append(item)
+        self._size += 1
+
+    def pop(self):
+        owner, lane = next(iter(self._lanes.items()))
+        item = lane.popleft()
+        if lane:
+            self._lanes.move_to_end(owner)
+        else:
+            del self._lanes[owner]
+        self._size -= 1
+        return item
+
+    def drain(self):
+        while self:
+            yield self.pop()
 
 
 def _execute_playbook(method, pipe, args, kwargs):
@@ -523,19 +603,27 @@ def _terminate_playbook(pipe, error=None):
 
 def start_playbook(name, *args, **kwargs):
     parent_conn, child_conn = multiprocessing.Pipe()
-    _COMMUNICATOR.put((child_conn, name, args, kwargs))
-    result = parent_conn.recv()
+    try:
+        _COMMUNICATOR.put(
+                (child_conn, name, args, kwargs, time.time()),
+                timeout=PLAYBOOK_QUEUE_TIMEOUT)
+    except Full:
+        raise errors.UnavailableError(
+                'Playbook manager is not accepting new playbooks, '
+                'try again later', playbook=name)
+    with profiling.measure('playbook'):
+        result = parent_conn.recv()
     if result is not None and 'response' in result and 'returncode' in result:
         raise errors.ConductorError.copy_from(result)
     return result
 
 
-def setup_playbook_manager():
+def setup_playbook_manager(workers=PLAYBOOK_WORKERS, backlog=PLAYBOOK_BACKLOG):
     playbook_manager = multiprocessing.Process(
-            target=_run_playbook, args=(_COMMUNICATOR,))
+            target=_run_playbook, args=(_COMMUNICATOR, workers, backlog))
     playbook_manager.start()
     atexit.register(playbook_manager.join)
     atexit.register(_COMMUNICATOR.put, None)
 
 
-_COMMUNICATOR = multiprocessing.Queue()
+_COMMUNICATOR = multiprocessing.Queue(PLAYBOOK_BACKLOG)
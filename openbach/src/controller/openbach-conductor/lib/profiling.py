@@ -0,0 +1,185 @@
+# OpenBACH is a generic testbed able to control/configure multiple
+# network/physical entities (under test) and collect data from them. It is
+# composed of an Auditorium (HMIs), a Controller, a Collector and multiple
+# Agents (one for each network entity that wants to be tested).
+#
+#
+# Copyright © 2016-2023 CNES
+#
+#
+# This file is part of the OpenBACH testbed.
+#
+#
+# OpenBACH is a free software : you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY, without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program. If not, see http://www.gnu.org/licenses/.
+
+
+"""Profiling of the actions run by the conductor.
+
+Each profiled action records its wall time along with the amount
+and duration of the database queries, agents requests and playbooks
+launched on its behalf. Results are written to a rotating log file
+and, if the collect-agent bindings are installed, sent as OpenBACH
+statistics.
+"""
+
+
+__author__ = 'Viveris Technologies'
+__credits__ = '''Contributors:
+ * Mathias ETTINGER <mathias.ettinger@toulouse.viveris.com>
+'''
+
+
+import os
+import time
+import json
+import syslog
+import logging
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+from django.db import connection
+
+try:
+    import collect_agent
+except ImportError:
+    collect_agent = None
+
+
+PROFILING_LOG = '/var/log/openbach/{}_profiling.log'
+PROFILING_LOG_SIZE = 10 * 1024 * 1024
+PROFILING_LOG_BACKUPS = 5
+RSTATS_CONFIG = Path(__file__).with_name('profiling_rstats_filter.conf')
+
+_LOGGER = logging.getLogger(__name__)
+_LOGGER.propagate = False
+_STATS_ENABLED = False
+_ACTIVE_PROFILES = threading.local()
+
+
+def setup_profiling(name):
+    """Configure the outputs of the profiled actions for
+    the process identified by `name`.
+    """
+    global _STATS_ENABLED
+
+    try:
+        handler = RotatingFileHandler(
+                PROFILING_LOG.format(name),
+                maxBytes=PROFILING_LOG_SIZE,
+                backupCount=PROFILING_LOG_BACKUPS)
+    except OSError as e:
+        syslog.syslog(
+                syslog.LOG_WARNING,
+                'Cannot open profiling log file, actions '
+                'profiles will not be stored: {}'.format(e))
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        _LOGGER.addHandler(handler)
+        _LOGGER.setLevel(logging.INFO)
+
+    if collect_agent is not None:
+        os.environ.setdefault('JOB_NAME', name)
+        _STATS_ENABLED = collect_agent.register_collect(str(RSTATS_CONFIG))
+        if not _STATS_ENABLED:
+            syslog.syslog(
+                    syslog.LOG_WARNING,
+                    'Cannot connect to collect-agent, actions '
+                    'profiles will not be sent as statistics')
+
+
+class ActionProfile:
+    """Context manager gathering timings of the action named `name`"""
+
+    CATEGORIES = ('database', 'agent', 'playbook')
+
+    def __init__(self, name):
+        self.name = name
+        self.counts = dict.fromkeys(self.CATEGORIES, 0)
+        self.durations = dict.fromkeys(self.CATEGORIES, 0.0)
+        self.wall_time = None
+        self._wrapper = None
+
+    def __enter__(self):
+        profiles = _current_profiles()
+        profiles.append(self)
+        if len(profiles) == 1:
+            # Nested profiles share the queries of the outermost one
+            self._wrapper = connection.execute_wrapper(_profile_query)
+            self._wrapper.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.wall_time = time.perf_counter() - self._start
+        if self._wrapper is not None:
+            self._wrapper.__exit__(None, None, None)
+        _current_profiles().remove(self)
+        self.emit(exc_type is None)
+
+    def record(self, category, duration):
+        self.counts[category] += 1
+        self.durations[category] += duration
+
+    @property
+    def json(self):
+        statistics = {'action': self.name, 'wall_time': self.wall_time}
+        for category in self.CATEGORIES:
+            statistics[category + '_count'] = self.counts[category]
+            statistics[category + '_time'] = self.durations[category]
+        return statistics
+
+    def emit(self, succeeded=True):
+        statistics = self.json
+        statistics['succeeded'] = succeeded
+        _LOGGER.info(json.dumps(statistics))
+
+        if _STATS_ENABLED:
+            action = statistics.pop('action')
+            collect_agent.send_stat(
+                    collect_agent.now(), suffix=action,
+                    **statistics)
+
+
+def _current_profiles():
+    try:
+        return _ACTIVE_PROFILES.stack
+    except AttributeError:
+        _ACTIVE_PROFILES.stack = stack = []
+        return stack
+
+
+def _profile_query(execute, sql, params, many, context):
+    with measure('database'):
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def measure(category):
+    """Account the time spent in this context to the
+    actions being profiled in the current thread.
+    """
+    profiles = _current_profiles()
+    if not profiles:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        for profile in profiles:
+            profile.record(category, duration)
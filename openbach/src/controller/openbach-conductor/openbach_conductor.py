@@ -55,6 +55,7 @@ import socketserver
 from contextlib import suppress
 
 from lib import errors
+from lib.profiling import setup_profiling
 from lib.playbook_builder import setup_playbook_manager
 
 # We need to use ansible from Python code so we can easily get failure
@@ -77,6 +78,7 @@ from openbach_django.models import ScenarioInstance, CommandResult, InstalledJob
 
 
 syslog.openlog('openbach_conductor', syslog.LOG_PID, syslog.LOG_USER)
+setup_profiling('openbach_conductor')
 
 
 def class_from_name(name):
@@ -50,19 +50,26 @@ import os
 import sys
 import json
 import time
+import heapq
+import queue
 import struct
 import syslog
+import statistics
 import pathlib
 import threading
+import itertools
 import traceback
 import socketserver
 from contextlib import suppress
-from collections import defaultdict
+from collections import defaultdict, deque, OrderedDict
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.jobstores.base import JobLookupError
 
 from lib import errors
+from lib.profiling import setup_profiling
 from lib.playbook_builder import setup_playbook_manager
 
 # We need to use ansible from Python code so we can easily get failure
@@ -78,6 +85,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 application = get_wsgi_application()
 
+from django import db
 from django.utils import timezone
 from django.db.models import Q
 from django.core.exceptions import ObjectDoesNotExist
@@ -87,6 +95,7 @@ from openbach_django.models import (
         StartScenarioInstance as StartScenarioInstanceOpenbachFunction,
         FailurePolicy,
 )
+from openbach_django.condition_models import LATEST_STATISTICS
 
 from lib.utils import OpenbachJSONEncoder
 from lib.openbach_communicator import receive_all, DEFAULT_UNIX_DOMAIN
@@ -94,6 +103,7 @@ from lib.openbach_conductor import (
         StatusJobInstance as StatusJobInstanceConductor,
         StartScenarioInstance as StartScenarioInstanceConductor,
         StopScenarioInstance as StopScenarioInstanceConductor,
+        WatchScenarioInstance as WatchScenarioInstanceConductor,
         StartJobInstance as StartJobInstanceConductor,
         StopJobInstance as StopJobInstanceConductor,
         StopJobInstances as StopJobInstancesConductor,
@@ -102,19 +112,52 @@ from lib.openbach_conductor import (
         PullFile as PullFileConductor,
         Reboot as RebootConductor,
         ThreadedAction, ScenarioInstanceAction, InfosScenarioInstance,
+        RollupScenarioInstance, status_agent_job_instances,
+        stop_agent_job_instances, archive_scenario_instances,
+        SCENARIO_ARCHIVE_AGE,
 )
 
 
 syslog.openlog('openbach_director', syslog.LOG_PID, syslog.LOG_USER)
-
-
-ERRORED_FUNCTIONS_NOT_IGNORED = Q(status=OpenbachFunctionInstance.Status.ERROR, retries_left__isnull=False)
-PLANNED_FUNCTIONS = Q(status=OpenbachFunctionInstance.Status.SCHEDULED)
-FINISHED_FUNCTIONS = Q(status=OpenbachFunctionInstance.Status.FINISHED)
-UNFINISHED_FUNCTIONS = Q(status__in=(
-    OpenbachFunctionInstance.Status.SCHEDULED,
-    OpenbachFunctionInstance.Status.RUNNING,
-))
+setup_profiling('openbach_director')
+
+
+# Bounds (in seconds) of the delay between two checks of the
+# status of a JobInstance; the upper bound is the delay after which
+# a finished JobInstance is noticed in the worst case
+JOB_STATUS_MIN_INTERVAL = 1
+JOB_STATUS_MAX_INTERVAL = float(os.environ.get('OPENBACH_JOB_STATUS_MAX_INTERVAL', 2))
+# Fraction of the age of a JobInstance to wait before checking
+# its status again when its completion date cannot be estimated
+JOB_STATUS_BACKOFF = 0.1
+# Amount of previous runs of a job used to estimate its duration
+JOB_STATUS_HISTORY = 10
+# Amount of threads running OpenBACH Functions once their
+# waiting time is elapsed, shared by all scenario instances
+OPENBACH_FUNCTIONS_WORKERS = int(os.environ.get('OPENBACH_FUNCTIONS_WORKERS', 64))
+# Amount of threads running OpenBACH Functions that block on a playbook
+# (file transfers, reboots), kept apart so they cannot delay job starts
+OPENBACH_FUNCTIONS_BLOCKING_WORKERS = int(os.environ.get('OPENBACH_FUNCTIONS_BLOCKING_WORKERS', 16))
+# Delay (in seconds) ahead of their due date at which job instances
+# started after a waiting time are sent to their agent
+JOB_START_LOOKAHEAD = float(os.environ.get('OPENBACH_JOB_START_LOOKAHEAD', 2))
+# Amount of agents and sub-scenarios concurrently
+# stopped when stopping a scenario instance
+SCENARIO_STOP_WORKERS = int(os.environ.get('OPENBACH_SCENARIO_STOP_WORKERS', 32))
+# Delay (in seconds) after which a scenario without any
+# event rebuilds its scheduling state from the database
+SCENARIO_RECONCILIATION_INTERVAL = 10
+# Amount of status transitions kept for each scenario instance and
+# amount of finished scenario instances whose transitions are kept
+STATUS_EVENTS_HISTORY = 1000
+STATUS_EVENTS_SCENARIOS = 200
+# Delay (in seconds) between two archivals of old scenario instances
+SCENARIO_ARCHIVE_INTERVAL = 3600
+# Port (0 to disable) and protocol ('udp' or 'tcp') on which the
+# statistics broadcasted by the collectors are received, so that
+# conditions can be evaluated without querying the collectors
+CONDITIONS_BROADCAST_PORT = int(os.environ.get('OPENBACH_CONDITIONS_BROADCAST_PORT', 0))
+CONDITIONS_BROADCAST_MODE = os.environ.get('OPENBACH_CONDITIONS_BROADCAST_MODE', 'udp')
 
 FAILED_JOBS = Q(stop_date__isnull=False, status__in=(
     JobInstance.Status.ERROR,
@@ -134,13 +177,68 @@ SCENARIOS_ENDED = SCENARIOS_ERRORED | SCENARIOS_STOPPED | SCENARIOS_UNREACHABLE
 # Threads management #
 ######################
 
+class JobWatch:
+    """Schedule of the status checks of a watched JobInstance.
+
+    Checks are spaced proportionally to the age of the instance,
+    unless its completion date can be estimated from previous runs
+    of the same job on the same agent, in which case checks tighten
+    as this date approaches. Either way, checks are never spaced by
+    more than JOB_STATUS_MAX_INTERVAL so that finished instances are
+    noticed promptly even when the estimate is off.
+    """
+
+    def __init__(self, job_instance, scenario_id):
+        self.job_instance_id = job_instance.id
+        self.scenario_id = scenario_id
+        self.start = job_instance.start_date.timestamp()
+        self.expected_end = None
+        if not job_instance.periodic:
+            self.expected_end = self._estimate_end(job_instance)
+        self.reschedule(time.time())
+
+    def _estimate_end(self, job_instance):
+        previous_runs = (
+                JobInstance.objects
+                .filter(
+                    job_name=job_instance.job_name,
+                    agent_name=job_instance.agent_name,
+                    periodic=False,
+                    status=JobInstance.Status.NOT_RUNNING)
+                .exclude(id=job_instance.id)
+                .order_by('-start_date')
+                .values_list('start_date', 'stop_date')
+                [:JOB_STATUS_HISTORY])
+        durations = [
+                (stop_date - start_date).total_seconds()
+                for start_date, stop_date in previous_runs
+                if stop_date is not None and stop_date > start_date
+        ]
+        if durations:
+            return self.start + statistics.median(durations)
+
+    def reschedule(self, now):
+        if now < self.start:
+            # Job not started yet
+            delay = self.start - now
+        elif self.expected_end is not None and now < self.expected_end:
+            delay = (self.expected_end - now) / 2
+        else:
+            delay = (now - self.start) * JOB_STATUS_BACKOFF
+        self.next_check = now + min(max(delay, JOB_STATUS_MIN_INTERVAL), JOB_STATUS_MAX_INTERVAL)
+
+
 class StatusManager:
     """Manage watches on the director to regularly check in
     agents for JobInstances statuses.
+
+    Each agent is polled by a single watch that checks all of
+    its JobInstances whose next check is due at once.
     """
 
     __state = {
             'job_instances': defaultdict(set),
+            'watches': defaultdict(dict),
             'scenarios': {},
             '_mutex': threading.Lock(),
             'scheduler': None,
@@ -155,29 +253,72 @@ class StatusManager:
                 self.scheduler.start()
 
     def _stop_watch(self, job_id):
-        with suppress(JobLookupError):
-            self.scheduler.remove_job('watch_{}'.format(job_id))
+        for address, watches in list(self.watches.items()):
+            if watches.pop(job_id, None) is not None and not watches:
+                del self.watches[address]
+                with suppress(JobLookupError):
+                    self.scheduler.remove_job('watch_{}'.format(address))
 
     def add_job(self, scenario_id, job_id, username):
+        try:
+            job_instance = JobInstance.objects.select_related('agent').get(id=job_id)
+        except JobInstance.DoesNotExist:
+            return
+
+        if job_instance.agent is None:
+            syslog.syslog(
+                    syslog.LOG_WARNING,
+                    'The Agent of JobInstance {} was uninstalled. '
+                    'Status will not be updated.'.format(job_id))
+            return
+
+        address = job_instance.agent.address
+        watch = JobWatch(job_instance, scenario_id)
         with self._mutex:
             self.job_instances[scenario_id].add(job_id)
-            self.scheduler.add_job(
-                    status_manager, 'interval', seconds=2,
-                    args=(job_id, scenario_id, username),
-                    id='watch_{}'.format(job_id))
+            watches = self.watches[address]
+            if not watches:
+                self.scheduler.add_job(
+                        agent_status_manager, 'interval',
+                        seconds=JOB_STATUS_MIN_INTERVAL,
+                        args=(address, job_instance.agent.port),
+                        id='watch_{}'.format(address),
+                        coalesce=True, replace_existing=True)
+            watches[job_id] = watch
+        _STATUS_EVENTS.record(scenario_id, 'job', job_id, job_instance.get_status())
+
+    def due_jobs(self, address, now):
+        with self._mutex:
+            return [
+                    watch for watch in self.watches.get(address, {}).values()
+                    if watch.next_check <= now
+            ]
 
     def remove_job(self, scenario_id, job_id):
         with self._mutex:
             jobs = self.job_instances[scenario_id]
-            jobs.remove(job_id)
+            jobs.discard(job_id)
             self._stop_watch(job_id)
             if not jobs:
                 del self.job_instances[scenario_id]
+        self.notify_scenario(scenario_id, 'job', job_id)
 
     def add_scenario(self, thread, scenario_id):
-        thread.start()
         with self._mutex:
             self.scenarios[scenario_id] = thread
+        thread.start()
+
+    def notify_scenario(self, scenario_id, event, *args):
+        with self._mutex:
+            thread = self.scenarios.get(scenario_id)
+        if thread is not None:
+            thread.notify(event, *args)
+
+    def report_start_lateness(self, scenario_id, job_id, lateness):
+        with self._mutex:
+            thread = self.scenarios.get(scenario_id)
+        if thread is not None:
+            thread.record_start_lateness(job_id, lateness)
 
     def remove_scenario(self, scenario_id):
         with suppress(KeyError):
@@ -186,39 +327,177 @@ class StatusManager:
             thread.stop()
 
 
-def status_manager(job_instance_id, scenario_instance_id, username):
-    """Check and update the status of a job instance based
-    on the informations returned by its agent.
+class StatusEvents:
+    """Journal of the status transitions of the scenario instances
+    run by the director, of their OpenBACH Functions and of their
+    JobInstances, that clients can wait upon.
+
+    Events are numbered using a sequence shared by all scenarios
+    so clients can resume following a scenario instance from the
+    last event they received. Events of a subscenario are also
+    journaled for each of its owners.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._sequence = itertools.count(1)
+        self._last = 0
+        self._journals = OrderedDict()
+        self._owners = {}
+        self._finished = set()
+
+    def __contains__(self, scenario_id):
+        with self._condition:
+            return scenario_id in self._journals
+
+    def register(self, scenario_id, owner_id=None):
+        with self._condition:
+            self._journals[scenario_id] = deque(maxlen=STATUS_EVENTS_HISTORY)
+            self._finished.discard(scenario_id)
+            if owner_id is not None:
+                self._owners[scenario_id] = owner_id
+            self._evict()
+
+    def record(self, scenario_id, kind, instance_id, status):
+        """Journal that the `kind` instance identified by `instance_id`
+        and belonging to the given scenario changed to `status`.
+        """
+        with self._condition:
+            self._last = next(self._sequence)
+            event = {
+                    'sequence': self._last,
+                    'date': int(time.time() * 1000),
+                    'type': kind,
+                    'id': instance_id,
+                    'scenario_instance_id': scenario_id,
+                    'status': status.label,
+            }
+            while scenario_id is not None:
+                journal = self._journals.get(scenario_id)
+                if journal is not None:
+                    journal.append(event)
+                scenario_id = self._owners.get(scenario_id)
+            self._condition.notify_all()
+
+    def finish(self, scenario_id):
+        with self._condition:
+            self._finished.add(scenario_id)
+            self._condition.notify_all()
+
+    def wait(self, scenario_id, since=0, timeout=None):
+        """Wait at most `timeout` seconds for events of the given
+        scenario more recent than the `since` sequence number.
+
+        Return these events and whether the scenario is finished.
+        """
+        with self._condition:
+            if since > self._last:
+                # Sequence restarted along with the director
+                since = 0
+            self._condition.wait_for(
+                    lambda: scenario_id in self._finished or self._pending(scenario_id, since),
+                    timeout)
+            return self._pending(scenario_id, since), scenario_id in self._finished
+
+    def _pending(self, scenario_id, since):
+        return [
+                event for event in self._journals.get(scenario_id, ())
+                if event['sequence'] > since
+        ]
+
+    def _evict(self):
+        # Forget the oldest finished scenarios only, running
+        # ones are still interesting to their clients
+        finished = [
+                scenario_id for scenario_id in self._journals
+                if scenario_id in self._finished
+        ]
+        exceeding = len(self._journals) - STATUS_EVENTS_SCENARIOS
+        for scenario_id in finished[:max(exceeding, 0)]:
+            del self._journals[scenario_id]
+            self._owners.pop(scenario_id, None)
+            self._finished.discard(scenario_id)
+
+
+_STATUS_EVENTS = StatusEvents()
+
+
+def scenario_archiver(age):
+    """Move the scenario instances finished for more than
+    `age` days out of the active tables.
+    """
+    archived = archive_scenario_instances(age)
+    if archived:
+        syslog.syslog(
+                syslog.LOG_INFO,
+                'Archived {} scenario instances finished more than '
+                '{} days ago'.format(len(archived), age))
+
+
+def agent_status_manager(address, port):
+    """Check and update the status of the job instances of an
+    agent whose check is due, based on the informations returned
+    by the agent in response to a single request.
 
     When jobs finish, remove them from StatusManager watches.
     """
-    job_status_manager = StatusJobInstance(job_instance_id, update=True)
-    job_status_manager.configure_user(username)
-    try:
-        job_instance = job_status_manager.get_job_instance_or_not_found_error()
-    except errors.ConductorError:
-        StatusManager().remove_job(scenario_instance_id, job_instance_id)
+    manager = StatusManager()
+    now = time.time()
+    watches = manager.due_jobs(address, now)
+    if not watches:
         return
 
-    if job_instance.get_status() is JobInstance.Status.SCHEDULED:
-        # Openbach Function did not finish properly yet
+    job_instances = JobInstance.objects.select_related(
+            'openbach_function_instance').in_bulk(
+            [watch.job_instance_id for watch in watches])
+
+    checked = []
+    for watch in watches:
+        try:
+            job_instance = job_instances[watch.job_instance_id]
+        except KeyError:
+            manager.remove_job(watch.scenario_id, watch.job_instance_id)
+            continue
+
+        watch.reschedule(now)
+        if job_instance.get_status() is not JobInstance.Status.SCHEDULED:
+            # Otherwise Openbach Function did not finish properly yet
+            checked.append((watch, job_instance))
+
+    if not checked:
         return
 
+    lateness = {}
     try:
-        job_status_manager.action()
-    except errors.ConductorWarning:
-        job_instance.set_status(JobInstance.Status.AGENT_UNREACHABLE)
+        statuses, lateness = status_agent_job_instances(address, port, [
+            (job_instance.job_name, job_instance.id)
+            for _, job_instance in checked
+        ])
+    except errors.UnreachableError:
+        statuses = {job_instance.id: 'Agent Unreachable' for _, job_instance in checked}
     except errors.ConductorError:
-        job_instance.set_status(JobInstance.Status.ERROR)
+        statuses = {job_instance.id: 'Error' for _, job_instance in checked}
 
-    if job_instance.is_stopped:
-        StatusManager().remove_job(scenario_instance_id, job_instance_id)
-    elif job_instance.get_status() is JobInstance.Status.AGENT_UNREACHABLE:
-        # TODO: do we need to check if job_instance.openbach_function_instance is not None ?
-        if job_instance.last_status > job_instance.openbach_function_instance.status_retry_delay:
-            job_instance.stop_date = job_instance.update_status
-            job_instance.save()
-            StatusManager().remove_job(scenario_instance_id, job_instance_id)
+    for watch, job_instance in checked:
+        with suppress(KeyError):
+            manager.report_start_lateness(watch.scenario_id, job_instance.id, lateness[job_instance.id])
+
+        status = statuses.get(job_instance.id, '')
+        previous_status = job_instance.get_status()
+        job_instance.set_status(job_instance.get_status(status.title()))
+        if job_instance.get_status() is not previous_status:
+            _STATUS_EVENTS.record(
+                    watch.scenario_id, 'job',
+                    job_instance.id, job_instance.get_status())
+
+        if job_instance.is_stopped:
+            manager.remove_job(watch.scenario_id, job_instance.id)
+        elif job_instance.get_status() is JobInstance.Status.AGENT_UNREACHABLE:
+            # TODO: do we need to check if job_instance.openbach_function_instance is not None ?
+            if job_instance.last_status > job_instance.openbach_function_instance.status_retry_delay:
+                job_instance.stop_date = job_instance.update_status
+                job_instance.save()
+                manager.remove_job(watch.scenario_id, job_instance.id)
 
 
 #################################
@@ -230,6 +509,13 @@ class OpenbachFunctionMixin:
     called as an OpenBACH Function.
     """
 
+    # Date (as a timestamp in milliseconds) at which the OpenBACH
+    # Function is due, when it is run ahead of time
+    due_date = None
+    # Whether the OpenBACH Function blocks on a playbook and should
+    # run on the workers dedicated to such functions
+    BLOCKING = False
+
     def openbach_function(self, openbach_function_instance):
         """Public entry point to execute the required OpenBACH Function"""
         self.openbach_function_instance = openbach_function_instance
@@ -248,13 +534,15 @@ class StartJobInstance(OpenbachFunctionMixin, StartJobInstanceConductor):
         self.openbach_function_instance = openbach_function_instance
 
         if self.offset is None:
-            self._build_job_instance()
+            self._build_job_instance(self.due_date if self.date is None else None)
         else:
             date = self.offset * 1000
-            if self.date is None:
-                date += int(timezone.now().timestamp() * 1000)
-            else:
+            if self.date is not None:
                 date += self.date
+            elif self.due_date is not None:
+                date += self.due_date
+            else:
+                date += int(timezone.now().timestamp() * 1000)
 
             self._build_job_instance(date)
 
@@ -395,44 +683,201 @@ class StopScenarioInstance(OpenbachFunctionMixin, StopScenarioInstanceConductor)
     def _action(self):
         scenario_instance = self.get_scenario_instance_or_not_found_error()
         if not scenario_instance.is_stopped:
+            start = time.monotonic()
             scenario_instance.stop()
-            for openbach_function in scenario_instance.openbach_functions_instances.all():
+
+            jobs_per_agent = defaultdict(list)
+            stopped_jobs = []
+            subscenarios = []
+            openbach_functions = (
+                    scenario_instance.openbach_functions_instances
+                    .select_related('started_job__agent', 'started_scenario')
+            )
+            for openbach_function in openbach_functions:
                 with suppress(JobInstance.DoesNotExist):
                     job_instance = openbach_function.started_job
                     if not job_instance.is_stopped:
-                        stopper = StopJobInstance(job_instance.id)
-                        self.share_user(stopper)
-                        stopper.action()
+                        stopped_jobs.append(job_instance.id)
+                        if job_instance.agent is not None:
+                            jobs_per_agent[job_instance.agent].append(
+                                    (job_instance.job_name, job_instance.id))
                 with suppress(ScenarioInstance.DoesNotExist):
                     subscenario_instance = openbach_function.started_scenario
                     if not subscenario_instance.is_stopped:
-                        stopper = StopScenarioInstance(subscenario_instance.id)
-                        self.share_user(stopper)
-                        stopper.action()
+                        subscenarios.append(subscenario_instance.id)
                 if openbach_function.get_status() is OpenbachFunctionInstance.Status.RUNNING:
                     openbach_function.set_status(OpenbachFunctionInstance.Status.STOPPED)
+                    _STATUS_EVENTS.record(
+                            self.instance_id, 'openbach_function',
+                            openbach_function.id, OpenbachFunctionInstance.Status.STOPPED)
+
+            tasks = [
+                    (agent.address, stop_agent_job_instances, agent.address, agent.port, jobs)
+                    for agent, jobs in jobs_per_agent.items()
+            ]
+            tasks.extend(
+                    ('scenario {}'.format(subscenario_id), self._stop_subscenario, subscenario_id)
+                    for subscenario_id in subscenarios
+            )
+            self._run_concurrently(tasks)
+            JobInstance.objects.filter(id__in=stopped_jobs).update(stop_date=timezone.now())
             StatusManager().remove_scenario(self.instance_id)
+
+            scenario_instance.stop_duration = timedelta(seconds=time.monotonic() - start)
+            scenario_instance.save(update_fields=['stop_duration'])
         return None, 204
 
+    def _stop_subscenario(self, subscenario_id):
+        stopper = StopScenarioInstance(subscenario_id)
+        self.share_user(stopper)
+        stopper.action()
+
+    def _run_concurrently(self, tasks):
+        """Run the stop orders concurrently and log those that failed"""
+        if not tasks:
+            return
+
+        workers = min(len(tasks), SCENARIO_STOP_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                    executor.submit(function, *args): target
+                    for target, function, *args in tasks
+            }
+            for future in as_completed(futures):
+                try:
+                    failures = future.result()
+                except errors.ConductorError as e:
+                    failures = e.json
+                except Exception as e:
+                    failures = str(e)
+                if failures:
+                    syslog.syslog(syslog.LOG_WARNING, str({
+                        'message': 'Failed to stop some parts of a scenario instance',
+                        'scenario_instance_id': self.instance_id,
+                        'target': futures[future],
+                        'error': failures,
+                    }))
+
+
+class WatchScenarioInstance(WatchScenarioInstanceConductor):
+    def _action(self):
+        scenario_instance = self.get_scenario_instance_or_not_found_error()
+        if scenario_instance.is_stopped and self.instance_id not in _STATUS_EVENTS:
+            # Finished before the director was (re)started
+            events, finished = [], True
+        else:
+            events, finished = _STATUS_EVENTS.wait(self.instance_id, self.since, self.timeout)
+            scenario_instance.refresh_from_db(fields=['status'])
+
+        return {
+                'scenario_instance_id': self.instance_id,
+                'status': scenario_instance.get_status().label,
+                'finished': finished,
+                'sequence': events[-1]['sequence'] if events else self.since,
+                'events': events,
+        }, 200
+
 
 class PushFile(OpenbachFunctionMixin, PushFileConductor):
-    pass
+    BLOCKING = True
 
 class PullFile(OpenbachFunctionMixin, PullFileConductor):
-    pass
+    BLOCKING = True
 
 class Reboot(OpenbachFunctionMixin, RebootConductor):
-    pass
+    BLOCKING = True
 
 
 ##############################
 # OpenbachFunctions handling #
 ##############################
 
-class OpenbachFunctionThread(threading.Thread):
+class OpenbachFunctionsScheduler:
+    """Run OpenBACH Functions on bounded pools of workers
+    once their waiting time is elapsed.
+
+    A single timer thread keeps the functions waiting to be
+    run ordered by due date, so they do not hold a thread each.
+    Functions blocking on a playbook run on their own pool so
+    they cannot exhaust the workers starting and stopping jobs.
+    """
+
+    def __init__(self, workers, blocking_workers):
+        self._workers = ThreadPoolExecutor(max_workers=workers)
+        self._blocking_workers = ThreadPoolExecutor(max_workers=blocking_workers)
+        self._condition = threading.Condition()
+        self._timers = []
+        self._sequence = itertools.count()
+        self._thread = None
+
+    def schedule(self, task, delay, function=None, blocking=False):
+        """Run the given task, or the given function on its
+        behalf, on a worker after `delay` seconds.
+        """
+        if function is None:
+            function = task.run
+        workers = self._blocking_workers if blocking else self._workers
+
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run_timers, daemon=True)
+                self._thread.start()
+            heapq.heappush(self._timers, (time.monotonic() + delay, next(self._sequence), task, function, workers))
+            self._condition.notify()
+
+    def cancel(self, task):
+        """Remove the given task from the waiting ones.
+
+        Return whether it was still waiting to be run.
+        """
+        with self._condition:
+            timers = [timer for timer in self._timers if timer[2] is not task]
+            cancelled = len(timers) != len(self._timers)
+            if cancelled:
+                heapq.heapify(timers)
+                self._timers[:] = timers
+        return cancelled
+
+    def _run_timers(self):
+        while True:
+            with self._condition:
+                while not self._timers or self._timers[0][0] > time.monotonic():
+                    timeout = self._timers[0][0] - time.monotonic() if self._timers else None
+                    self._condition.wait(timeout)
+                _, _, _, function, workers = heapq.heappop(self._timers)
+            workers.submit(self._run_function, function)
+
+    @staticmethod
+    def _run_function(function):
+        try:
+            function()
+        finally:
+            # Workers live as long as the director, do not
+            # let them hold on to their database connection
+            db.close_old_connections()
+
+
+_OPENBACH_FUNCTIONS = OpenbachFunctionsScheduler(
+        OPENBACH_FUNCTIONS_WORKERS,
+        OPENBACH_FUNCTIONS_BLOCKING_WORKERS)
+
+
+class OpenbachFunctionTask:
+    """Execution of an OpenBACH Function instance scheduled on
+    the OpenbachFunctionsScheduler after its waiting time.
+
+    Job instances started after a waiting time are sent to their
+    agent ahead of time with the absolute date they are due, so
+    their start does not depend on the latency of the request.
+    The function is only considered finished once this date is
+    reached.
+    """
+
     def __init__(self, openbach_function_instance):
-        super().__init__()
         self._stopped = threading.Event()
+        self._done = threading.Event()
+        self.due_date = None
+        self.start_margin = None
 
         openbach_function = openbach_function_instance.openbach_function
         self._set_action(
@@ -455,6 +900,13 @@ class OpenbachFunctionThread(threading.Thread):
                     'An OpenbachFunction is not implemented',
                     openbach_function_name=verbose_name)
 
+    def start(self):
+        delay = self.openbach_function.wait_time
+        if self.action is StartJobInstance and delay > 0:
+            self.due_date = time.time() + delay
+            delay = max(delay - JOB_START_LOOKAHEAD, 0)
+        _OPENBACH_FUNCTIONS.schedule(self, delay, blocking=self.action.BLOCKING)
+
     def run(self):
         try:
             self._run()
@@ -465,12 +917,15 @@ class OpenbachFunctionThread(threading.Thread):
                     'traceback': traceback.format_exc(),
             }
             syslog.syslog(syslog.LOG_ERR, str(log_message))
-            self.openbach_function.set_status(OpenbachFunctionInstance.Status.ERROR)
+            try:
+                self._set_status(OpenbachFunctionInstance.Status.ERROR)
+            finally:
+                self._done.set()
 
     def _run(self):
-        time.sleep(self.openbach_function.wait_time)
         if self._stopped.is_set():
-            self.openbach_function.set_status(OpenbachFunctionInstance.Status.STOPPED)
+            self._set_status(OpenbachFunctionInstance.Status.STOPPED)
+            self._done.set()
             return
 
         try:
@@ -479,13 +934,28 @@ class OpenbachFunctionThread(threading.Thread):
             syslog.syslog(syslog.LOG_WARNING, str(error.json))
         except errors.ConductorError as error:
             syslog.syslog(syslog.LOG_ERR, str(error.json))
-            self.openbach_function.set_status(OpenbachFunctionInstance.Status.ERROR)
+            self._set_status(OpenbachFunctionInstance.Status.ERROR)
+            self._done.set()
             return
 
-        if self._stopped.is_set():
-            self.openbach_function.set_status(OpenbachFunctionInstance.Status.STOPPED)
-        else:
-            self.openbach_function.set_status(OpenbachFunctionInstance.Status.FINISHED)
+        if self.due_date is not None:
+            self.start_margin = self.due_date - time.time()
+            if self.start_margin > 0 and not self._stopped.is_set():
+                _OPENBACH_FUNCTIONS.schedule(self, self.start_margin, self._finish)
+                return
+
+        self._finish()
+
+    def _finish(self):
+        # Also run on its own by the scheduler, make sure
+        # the scenario does not wait on this task forever
+        try:
+            if self._stopped.is_set():
+                self._set_status(OpenbachFunctionInstance.Status.STOPPED)
+            else:
+                self._set_status(OpenbachFunctionInstance.Status.FINISHED)
+        finally:
+            self._done.set()
 
     def _run_openbach_function(self):
         self.openbach_function.start()
@@ -504,19 +974,209 @@ class OpenbachFunctionThread(threading.Thread):
         action = self.action(**arguments)
         if owner is not None:
             action.connected_user = owner
+        if self.due_date is not None:
+            action.due_date = int(self.due_date * 1000)
         if not self._stopped.is_set():
             return action.openbach_function(self.openbach_function)
 
+    def _set_status(self, status):
+        scenario_id = self.openbach_function.scenario_instance_id
+        self.openbach_function.set_status(status)
+        _STATUS_EVENTS.record(scenario_id, 'openbach_function', self.instance_id, status)
+        StatusManager().notify_scenario(scenario_id, 'function', self.instance_id, status)
+
     def stop(self):
         self._stopped.set()
+        if _OPENBACH_FUNCTIONS.cancel(self):
+            # Still waiting to be run or for its job to start
+            self._set_status(OpenbachFunctionInstance.Status.STOPPED)
+            self._done.set()
+
+    def join(self):
+        self._done.wait()
+
+
+class OpenbachFunctionsGraph:
+    """In-memory view of the OpenBACH Functions of a ScenarioInstance
+    and of their dependencies.
+
+    The graph is advanced by the events received by the scenario
+    so scheduling decisions do not need to query the database; it
+    can be rebuilt out of the database at any time to recover from
+    missed events.
+    """
+
+    WAITERS = ('running', 'ended', 'launched', 'finished')
+
+    def __init__(self, scenario_instance):
+        self.scenario_instance = scenario_instance
+        self.waits = {}
+        self.reload(waits=True)
+
+    def reload(self, waits=False):
+        """Rebuild the state of the graph from the database"""
+        scenario_instance = self.scenario_instance
+        functions_instances = scenario_instance.openbach_functions_instances.order_by('id')
+        if waits:
+            functions_instances = functions_instances.prefetch_related(*(
+                'openbach_function__{}_waiters'.format(waiter)
+                for waiter in self.WAITERS))
+
+        # Only the latest instance of each function is relevant
+        # as the other ones have been retried
+        self.instances = {}
+        self.statuses = {}
+        for instance in functions_instances:
+            function_id = instance.openbach_function_id
+            self.instances[function_id] = instance
+            self.statuses[function_id] = instance.get_status()
+            if waits:
+                self.waits[function_id] = {
+                        waiter: [
+                            waited.openbach_function_waited_id
+                            for waited in getattr(instance.openbach_function, waiter + '_waiters').all()
+                        ] for waiter in self.WAITERS
+                }
+
+        spawned_jobs = JobInstance.objects.filter(
+                openbach_function_instance__scenario_instance=scenario_instance)
+        spawned_scenarios = ScenarioInstance.objects.filter(
+                openbach_function_instance__scenario_instance=scenario_instance)
+        self.started_jobs = {}
+        self.ended_jobs = set()
+        for function_instance_id, job_id, stop_date in spawned_jobs.values_list(
+                'openbach_function_instance', 'id', 'stop_date'):
+            self.started_jobs[function_instance_id] = job_id
+            if stop_date is not None:
+                self.ended_jobs.add(job_id)
+        self.started_scenarios = dict(spawned_scenarios.values_list('openbach_function_instance', 'id'))
+        self.ended_scenarios = set(spawned_scenarios.filter(SCENARIOS_ENDED).values_list('id', flat=True))
+        self.has_failed_jobs = spawned_jobs.filter(FAILED_JOBS).exclude(IGNORABLE_JOBS).exists()
+
+    def apply(self, event, *args):
+        """Update the graph with the given event"""
+        if event == 'function':
+            self._function_updated(*args)
+        elif event == 'job':
+            self._job_ended(*args)
+        elif event == 'scenario':
+            self.ended_scenarios.add(*args)
+
+    def launched(self, instance):
+        """Register that the given OpenBACH Function instance started"""
+        function_id = instance.openbach_function_id
+        self.instances[function_id] = instance
+        self.statuses[function_id] = OpenbachFunctionInstance.Status.RUNNING
+
+    def _function_updated(self, instance_id, status):
+        function_id = next((
+            function_id
+            for function_id, instance in self.instances.items()
+            if instance.id == instance_id), None)
+        if function_id is None:
+            # Event of a retried instance
+            return
+
+        self.statuses[function_id] = status
+        if status is not OpenbachFunctionInstance.Status.RUNNING:
+            # Jobs or scenarios started by this function are now in the database
+            jobs = JobInstance.objects.filter(openbach_function_instance=instance_id)
+            for job_id, stop_date in jobs.values_list('id', 'stop_date'):
+                self.started_jobs[instance_id] = job_id
+                if stop_date is not None:
+                    self.ended_jobs.add(job_id)
+            scenarios = ScenarioInstance.objects.filter(openbach_function_instance=instance_id)
+            for scenario_id, ended in scenarios.values_list('id', 'stop_date'):
+                self.started_scenarios[instance_id] = scenario_id
+                if ended is not None:
+                    self.ended_scenarios.add(scenario_id)
+
+    def _job_ended(self, job_id):
+        self.ended_jobs.add(job_id)
+        failed = JobInstance.objects.filter(FAILED_JOBS, id=job_id).exclude(IGNORABLE_JOBS)
+        if failed.exists():
+            self.has_failed_jobs = True
+
+    def errored(self):
+        """Generate the OpenBACH Functions instances that
+        failed and are not allowed to be ignored.
+        """
+        for function_id, status in list(self.statuses.items()):
+            instance = self.instances[function_id]
+            if status is OpenbachFunctionInstance.Status.ERROR and instance.retries_left is not None:
+                yield instance
+
+    def launchable(self):
+        """Generate the scheduled OpenBACH Functions
+        instances whose waiting conditions are met.
+        """
+        for function_id, status in list(self.statuses.items()):
+            if status is OpenbachFunctionInstance.Status.SCHEDULED and self._is_ready(function_id):
+                yield self.instances[function_id]
+
+    def _is_ready(self, function_id):
+        Status = OpenbachFunctionInstance.Status
+        waits = self.waits.get(function_id, {})
+
+        def waited_statuses(waiter):
+            return [
+                    self.statuses[waited]
+                    for waited in waits.get(waiter, ())
+                    if waited in self.statuses
+            ]
+
+        if Status.SCHEDULED in waited_statuses('running'):
+            # Wait for running openbach functions are not all started yet
+            return False
+        if {Status.SCHEDULED, Status.RUNNING}.intersection(waited_statuses('ended')):
+            # Wait for ended openbach functions are not all started yet
+            return False
+        if any(status is not Status.FINISHED for status in waited_statuses('launched')):
+            # Wait for launched openbach functions are not all launched yet
+            return False
+        return all(map(self._has_finished, waits.get('finished', ())))
+
+    def _has_finished(self, function_id):
+        try:
+            instance_id = self.instances[function_id].id
+        except KeyError:
+            return False
+
+        if instance_id in self.started_jobs:
+            return self.started_jobs[instance_id] in self.ended_jobs
+        if instance_id in self.started_scenarios:
+            return self.started_scenarios[instance_id] in self.ended_scenarios
+        return False
+
+    @property
+    def has_unfinished_functions(self):
+        unfinished = {OpenbachFunctionInstance.Status.SCHEDULED, OpenbachFunctionInstance.Status.RUNNING}
+        return not unfinished.isdisjoint(self.statuses.values())
+
+    @property
+    def has_instances_running(self):
+        return (
+                not self.ended_jobs.issuperset(self.started_jobs.values())
+                or not self.ended_scenarios.issuperset(self.started_scenarios.values())
+        )
 
 
 class ScenarioInstanceStatus(threading.Thread):
     def __init__(self, scenario_instance_id):
         super().__init__()
-        self.scenario_instance = ScenarioInstance.objects.get(id=scenario_instance_id)
+        self.scenario_instance = (
+                ScenarioInstance.objects
+                .select_related('openbach_function_instance')
+                .get(id=scenario_instance_id))
         self._openbach_functions = []
         self._is_stopped = threading.Event()
+        self._events = queue.Queue()
+        self._start_lateness = {}
+
+        owner = self.scenario_instance.openbach_function_instance
+        _STATUS_EVENTS.register(
+                scenario_instance_id,
+                None if owner is None else owner.scenario_instance_id)
 
     def run(self):
         try:
@@ -532,18 +1192,65 @@ class ScenarioInstanceStatus(threading.Thread):
             }
             syslog.syslog(syslog.LOG_ERR, str(log_message))
             self._terminate_instance()
+        finally:
+            self._snapshot()
+            self._publish_status(finished=True)
+            owner = self.scenario_instance.openbach_function_instance
+            if owner is None:
+                self._rollup_statistics()
+            else:
+                StatusManager().notify_scenario(
+                        owner.scenario_instance_id,
+                        'scenario', self.scenario_instance.id)
+
+    def _snapshot(self):
+        # Serialize the finished instance once and for all; this is
+        # retried when first requested if some jobs are not done yet
+        try:
+            ScenarioInstance.objects.get(id=self.scenario_instance.id).snapshot()
+        except Exception as error:
+            syslog.syslog(syslog.LOG_WARNING, str({
+                'message': 'Cannot store the JSON of a finished scenario instance',
+                'scenario_instance_id': self.scenario_instance.id,
+                'error': str(error),
+            }))
+
+    def _publish_status(self, finished=False):
+        scenario_id = self.scenario_instance.id
+        try:
+            status = ScenarioInstance.objects.values_list('status', flat=True).get(id=scenario_id)
+        except Exception as error:
+            syslog.syslog(syslog.LOG_WARNING, str({
+                'message': 'Cannot retrieve the status of a scenario instance',
+                'scenario_instance_id': scenario_id,
+                'error': str(error),
+            }))
+        else:
+            _STATUS_EVENTS.record(scenario_id, 'scenario', scenario_id, ScenarioInstance.Status(status))
+
+        if finished:
+            _STATUS_EVENTS.finish(scenario_id)
+
+    def _rollup_statistics(self):
+        # Subscenarios are rolled up along with their owner
+        rollup = RollupScenarioInstance(self.scenario_instance.id)
+        try:
+            rollup.action()
+        except errors.ConductorError as error:
+            syslog.syslog(syslog.LOG_ERR, str(error.json))
+
+    def notify(self, event, *args):
+        """Wake up the scheduling of this scenario with
+        an event related to one of its components.
+        """
+        self._events.put((event, args))
 
     def _run(self):
         self.scenario_instance.status = ScenarioInstance.Status.RUNNING
         self.scenario_instance.save()
+        self._publish_status()
 
-        openbach_functions_instances = self.scenario_instance.openbach_functions_instances
-        spawned_jobs = OpenbachFunctionInstance.objects.filter(
-                id__in=StartJobInstanceOpenbachFunction.objects.values('instances'),
-                scenario_instance=self.scenario_instance).values('started_job')
-        spawned_scenarios = OpenbachFunctionInstance.objects.filter(
-                id__in=StartScenarioInstanceOpenbachFunction.objects.values('instances'),
-                scenario_instance=self.scenario_instance).values('started_scenario')
+        graph = OpenbachFunctionsGraph(self.scenario_instance)
 
         # Create all openbach functions threads with respect to dependencies
         while True:
@@ -552,105 +1259,118 @@ class ScenarioInstanceStatus(threading.Thread):
                 self._join_openbach_functions()
                 return
 
-            if JobInstance.objects.filter(FAILED_JOBS, id__in=spawned_jobs).exclude(IGNORABLE_JOBS).exists():
+            if graph.has_failed_jobs:
                 self._terminate_instance()
                 self._join_openbach_functions()
                 return
 
-            for failed_obf_instance in openbach_functions_instances.filter(ERRORED_FUNCTIONS_NOT_IGNORED):
+            for failed_obf_instance in graph.errored():
                 if failed_obf_instance.retries_left > 0:
                     try:
-                        self._launch_openbach_function_instance(failed_obf_instance, True)
+                        retried = self._launch_openbach_function_instance(failed_obf_instance, True)
                     except FailurePolicy.DoesNotExist:
                         # Could not validate_restart on duplicated function instance
                         pass
                     else:
+                        graph.launched(retried)
                         continue
 
                 self._terminate_instance()
                 self._join_openbach_functions()
                 return
 
-            for openbach_function_instance in openbach_functions_instances.filter(PLANNED_FUNCTIONS):
-                function = openbach_function_instance.openbach_function
-                if OpenbachFunctionInstance.objects.filter(
-                        openbach_function__id__in=function.running_waiters.values('openbach_function_waited'),
-                        scenario_instance=self.scenario_instance).filter(PLANNED_FUNCTIONS).exists():
-                    # Wait for running openbach functions are not all started yet
-                    continue
-                if OpenbachFunctionInstance.objects.filter(
-                        openbach_function__id__in=function.ended_waiters.values('openbach_function_waited'),
-                        scenario_instance=self.scenario_instance).filter(UNFINISHED_FUNCTIONS).exists():
-                    # Wait for ended openbach functions are not all started yet
-                    continue
-                if OpenbachFunctionInstance.objects.filter(
-                        openbach_function__id__in=function.launched_waiters.values('openbach_function_waited'),
-                        scenario_instance=self.scenario_instance).exclude(FINISHED_FUNCTIONS).exists():
-                    # Wait for launched openbach functions are not all launched yet
-                    continue
-
-                if self._has_waited_instances_finished(function):
-                    self._launch_openbach_function_instance(openbach_function_instance)
-
-            if openbach_functions_instances.filter(UNFINISHED_FUNCTIONS).exists():
-                time.sleep(0.2)
-                continue
+            for openbach_function_instance in graph.launchable():
+                graph.launched(self._launch_openbach_function_instance(openbach_function_instance))
 
-            if self._has_instances_running(spawned_jobs, spawned_scenarios):
-                time.sleep(1)
-            else:
+            if not graph.has_unfinished_functions and not graph.has_instances_running:
                 break
 
+            self._wait_for_events(graph)
+
         self._join_openbach_functions()
         self.scenario_instance.stop(stop_status=ScenarioInstance.Status.FINISHED_OK)
         StatusManager().remove_scenario(self.scenario_instance.id)
 
+    def _wait_for_events(self, graph):
+        try:
+            event, args = self._events.get(timeout=SCENARIO_RECONCILIATION_INTERVAL)
+        except queue.Empty:
+            graph.reload()
+            return
+
+        # Process every pending event before taking new decisions
+        while True:
+            graph.apply(event, *args)
+            try:
+                event, args = self._events.get_nowait()
+            except queue.Empty:
+                return
+
     def stop(self):
         self._is_stopped.set()
+        self.notify('stop')
 
-    @staticmethod
-    def _has_instances_running(started_jobs, started_scenarios):
-        jobs_not_finished = JobInstance.objects.filter(stop_date__isnull=True, id__in=started_jobs)
-        scenarios_not_finished = ScenarioInstance.objects.filter(~SCENARIOS_ENDED, id__in=started_scenarios)
-        return jobs_not_finished.exists() or scenarios_not_finished.exists()
-
-    def _has_waited_instances_finished(self, function):
-        waited_instances = function.finished_waiters.values('openbach_function_waited')
-        wait_for_finished = OpenbachFunctionInstance.objects.filter(
-                openbach_function__id__in=waited_instances,
-                scenario_instance=self.scenario_instance)
-
-        instances_keywords = ('started_job', 'started_scenario')
-        started_instances = wait_for_finished.values(*instances_keywords).exclude(
-                **{'{}__isnull'.format(k): True for k in instances_keywords})
-        if waited_instances.count() != started_instances.count():
-            return False
-
-        return not self._has_instances_running(
-                wait_for_finished.values('started_job'),
-                wait_for_finished.values('started_scenario'))
+    def record_start_lateness(self, job_id, lateness):
+        """Store how late, in milliseconds, the agent
+        started a job instance sent ahead of its date.
+        """
+        self._start_lateness[job_id] = lateness
 
     def _launch_openbach_function_instance(self, openbach_function_instance, use_retry=False):
         if use_retry:
             retries_left = openbach_function_instance.retries_left - 1
             openbach_function_instance.set_status(OpenbachFunctionInstance.Status.RETRIED)
+            _STATUS_EVENTS.record(
+                    self.scenario_instance.id, 'openbach_function',
+                    openbach_function_instance.id, OpenbachFunctionInstance.Status.RETRIED)
             openbach_function_instance = OpenbachFunctionInstance.objects.create(
                     openbach_function=openbach_function_instance.openbach_function,
                     scenario_instance=openbach_function_instance.scenario_instance,
                     status=OpenbachFunctionInstance.Status.SCHEDULED)
             openbach_function_instance.validate_restart(retries_left)
-        openbach_function_thread = OpenbachFunctionThread(openbach_function_instance)
-        self._openbach_functions.append(openbach_function_thread)
-        openbach_function_thread.start()
+        openbach_function_task = OpenbachFunctionTask(openbach_function_instance)
+        self._openbach_functions.append(openbach_function_task)
+        openbach_function_task.start()
+        return openbach_function_instance
 
     def _join_openbach_functions(self):
-        for thread in self._openbach_functions:
-            thread.join()
+        for task in self._openbach_functions:
+            task.join()
+        self._report_start_skew()
         self._openbach_functions.clear()
 
+    def _report_start_skew(self):
+        # Lead time of the dated starts as seen from the controller,
+        # late ones were started as soon as they were received
+        margins = [
+                task.start_margin * 1000
+                for task in self._openbach_functions
+                if task.start_margin is not None
+        ]
+        if not margins:
+            return
+
+        late = sum(1 for margin in margins if margin < 0)
+        message = (
+                'Scenario instance {}: {} job instances sent ahead of their '
+                'start date, {} too late; minimal lead time {:.1f} ms'.format(
+                    self.scenario_instance.id, len(margins), late, min(margins)))
+
+        # Start skew actually achieved, as measured by the agents
+        lateness = list(self._start_lateness.values())
+        if lateness:
+            message += (
+                    '; start skew {:.1f} ms measured by the agents over {} job '
+                    'instances, latest started {:.1f} ms after its date'.format(
+                        max(lateness) - min(lateness), len(lateness), max(lateness)))
+        else:
+            message += '; no start skew measured by the agents yet'
+
+        syslog.syslog(syslog.LOG_WARNING if late else syslog.LOG_INFO, message)
+
     def _stop_instance(self):
-        for thread in self._openbach_functions:
-            thread.stop()
+        for task in self._openbach_functions:
+            task.stop()
 
         stop_scenario = StopScenarioInstance(self.scenario_instance.id)
         user = self.scenario_instance.started_by
@@ -710,11 +1430,42 @@ class ScenarioHandler(socketserver.BaseRequestHandler):
         scenario_instance_id = request['scenario']
         action_name = '{}ScenarioInstance'.format(request['action'].capitalize())
         action = getattr(sys.modules[__name__], action_name)
-        command = action(scenario_instance_id)
+        command = action(scenario_instance_id, **request.get('arguments', {}))
         command.configure_user(request['user_name'])
         return command.action()
 
 
+class StatisticsBroadcastHandler(socketserver.BaseRequestHandler):
+    """Feed the statistics broadcasted by the collectors
+    to the cache used when evaluating conditions.
+    """
+
+    def handle(self):
+        if isinstance(self.request, tuple):
+            # Datagrams hold a single message each
+            data, _ = self.request
+            messages = [data]
+        else:
+            messages = self.request.makefile('rb')
+
+        for message in messages:
+            try:
+                statistics = json.loads(message)
+            except ValueError:
+                continue
+            if isinstance(statistics, dict):
+                LATEST_STATISTICS.feed(statistics)
+
+
+def listen_statistics_broadcast(port, mode='udp'):
+    if mode == 'tcp':
+        server = socketserver.ThreadingTCPServer(('', port), StatisticsBroadcastHandler)
+    else:
+        server = socketserver.UDPServer(('', port), StatisticsBroadcastHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
 def main(socket_name=DEFAULT_UNIX_DOMAIN):
     # Remove old socket file if any
     socket = pathlib.Path(socket_name)
@@ -734,6 +1485,23 @@ def main(socket_name=DEFAULT_UNIX_DOMAIN):
         stopper.connected_user = owner
         stopper.action()
 
+    if SCENARIO_ARCHIVE_AGE > 0:
+        status_manager.scheduler.add_job(
+                scenario_archiver, 'interval',
+                seconds=SCENARIO_ARCHIVE_INTERVAL,
+                args=(SCENARIO_ARCHIVE_AGE,),
+                id='scenario_archiver',
+                coalesce=True, replace_existing=True)
+
+    if CONDITIONS_BROADCAST_PORT:
+        try:
+            listen_statistics_broadcast(CONDITIONS_BROADCAST_PORT, CONDITIONS_BROADCAST_MODE)
+        except OSError as e:
+            syslog.syslog(
+                    syslog.LOG_WARNING,
+                    'Cannot receive statistics broadcasted by the collectors, '
+                    'conditions will query them instead: {}'.format(e))
+
     # Start listening for orders
     server = DirectorServer(socket_name, ScenarioHandler)
     try: